@@ -0,0 +1,61 @@
+"""ad_watch_counters
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+
+- Composite index on ad_watches (user_id, watched_date) for per-day lookups.
+- ad_watches.reward_id: AdMob reward callback id, unique, so a replayed
+  reward can never be granted twice.
+- ad_watch_counters: one row per user per day, incremented with a conditional
+  upsert instead of COUNT(*) over ad_watches on every reward. Backfilled from
+  the existing ad_watches rows.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# ---------------------------------------------------------------------------
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+# ---------------------------------------------------------------------------
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_ad_watches_user_id_watched_date",
+        "ad_watches",
+        ["user_id", "watched_date"],
+        unique=False,
+    )
+
+    op.add_column("ad_watches", sa.Column("reward_id", sa.String(length=100), nullable=True))
+    op.create_unique_constraint("uq_ad_watches_reward_id", "ad_watches", ["reward_id"])
+
+    op.create_table(
+        "ad_watch_counters",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("watch_date", sa.Date(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "watch_date"),
+    )
+
+    op.execute(
+        """
+        INSERT INTO ad_watch_counters (user_id, watch_date, count)
+        SELECT user_id, watched_date, COUNT(*)
+        FROM ad_watches
+        WHERE watched_date IS NOT NULL
+        GROUP BY user_id, watched_date
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("ad_watch_counters")
+    op.drop_constraint("uq_ad_watches_reward_id", "ad_watches", type_="unique")
+    op.drop_column("ad_watches", "reward_id")
+    op.drop_index("ix_ad_watches_user_id_watched_date", table_name="ad_watches")
@@ -0,0 +1,57 @@
+"""payment_webhook_events
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+
+Durable inbox for Razorpay webhooks. Events are stored by the webhook
+endpoint and applied by a background batch processor; the unique event_id
+makes redelivered webhooks a no-op. The partial index keeps the
+"next pending batch" query cheap however large the processed history grows.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# ---------------------------------------------------------------------------
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+# ---------------------------------------------------------------------------
+
+
+def upgrade() -> None:
+    op.create_table(
+        "payment_webhook_events",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("event_id", sa.String(length=100), nullable=False),
+        sa.Column("event_type", sa.String(length=50), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("last_error", sa.String(length=500), nullable=True),
+        sa.Column(
+            "received_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.Column("processed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("event_id"),
+    )
+    op.create_index(op.f("ix_payment_webhook_events_id"), "payment_webhook_events", ["id"], unique=False)
+    op.create_index(
+        "ix_payment_webhook_events_pending",
+        "payment_webhook_events",
+        ["id"],
+        unique=False,
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_payment_webhook_events_pending", table_name="payment_webhook_events")
+    op.drop_index(op.f("ix_payment_webhook_events_id"), table_name="payment_webhook_events")
+    op.drop_table("payment_webhook_events")
@@ -0,0 +1,51 @@
+"""user_stats
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+
+Per-user public profile counters (public, non-deleted creations and the
+likes on them), maintained incrementally instead of COUNT / SUM over
+`creations` on every profile view. Backfilled from the existing creations.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# ---------------------------------------------------------------------------
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+# ---------------------------------------------------------------------------
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_stats",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("creations_count", sa.Integer(), nullable=False),
+        sa.Column("total_likes", sa.Integer(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+
+    op.execute(
+        """
+        INSERT INTO user_stats (user_id, creations_count, total_likes)
+        SELECT user_id, COUNT(*), COALESCE(SUM(likes_count), 0)
+        FROM creations
+        WHERE is_public AND NOT is_deleted
+        GROUP BY user_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("user_stats")
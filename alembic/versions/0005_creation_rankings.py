@@ -0,0 +1,72 @@
+"""creation_rankings
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+
+Materialised sort keys for the community feed's ?sort=hot / ?sort=top
+(see app/core/feed_ranking.py), with one index per sort so both are index
+scans. Backfilled from the existing feed creations using the default
+FEED_HOT_DECAY_SECONDS (45000); the periodic refresh rescores them if the
+setting differs.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# ---------------------------------------------------------------------------
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+# ---------------------------------------------------------------------------
+
+
+def upgrade() -> None:
+    op.create_table(
+        "creation_rankings",
+        sa.Column("creation_id", sa.Integer(), nullable=False),
+        sa.Column("likes_count", sa.Integer(), nullable=False),
+        sa.Column("views_count", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("hot_score", sa.Float(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(["creation_id"], ["creations.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("creation_id"),
+    )
+    op.create_index(
+        "ix_creation_rankings_hot",
+        "creation_rankings",
+        [sa.text("hot_score DESC"), sa.text("creation_id DESC")],
+    )
+    op.create_index(
+        "ix_creation_rankings_top",
+        "creation_rankings",
+        [sa.text("likes_count DESC"), sa.text("creation_id DESC")],
+    )
+
+    # HOT_EPOCH = 2026-01-01T00:00:00Z (1767225600), VIEW_WEIGHT = 0.1
+    op.execute(
+        """
+        INSERT INTO creation_rankings (creation_id, likes_count, views_count, created_at, hot_score)
+        SELECT id,
+               COALESCE(likes_count, 0),
+               COALESCE(views_count, 0),
+               created_at,
+               log(greatest(COALESCE(likes_count, 0) + COALESCE(views_count, 0) * 0.1, 1.0))
+                 + (extract(epoch FROM created_at) - 1767225600) / 45000.0
+        FROM creations
+        WHERE is_public AND NOT is_deleted AND challenge_id IS NULL AND created_at IS NOT NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_creation_rankings_top", table_name="creation_rankings")
+    op.drop_index("ix_creation_rankings_hot", table_name="creation_rankings")
+    op.drop_table("creation_rankings")
@@ -0,0 +1,71 @@
+"""creation access-path indexes
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+
+One index per hot creation query, partial on the soft-delete / feed filters
+those queries always apply, so each is an index range scan instead of a
+filter over the whole table:
+
+- ix_creations_feed_new          community feed, ?sort=new (+ keyset cursor)
+- ix_creations_user_history      /creations/mine and the per-user feed
+- ix_creations_challenge_leaderboard
+                                 /challenges/{id}/leaderboard
+- ix_creation_likes_user_created /creations/liked (newest likes first)
+
+Built CONCURRENTLY (outside the migration transaction) so writes to
+`creations` are not blocked on a large table. Check the plans with
+scripts/check_query_plans.py.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# ---------------------------------------------------------------------------
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+# ---------------------------------------------------------------------------
+
+FEED_WHERE = "is_public AND NOT is_deleted AND challenge_id IS NULL"
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_creations_feed_new",
+            "creations",
+            [sa.text("created_at DESC"), sa.text("id DESC")],
+            postgresql_where=sa.text(FEED_WHERE),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_creations_user_history",
+            "creations",
+            ["user_id", sa.text("created_at DESC"), sa.text("id DESC")],
+            postgresql_where=sa.text("NOT is_deleted"),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_creations_challenge_leaderboard",
+            "creations",
+            ["challenge_id", sa.text("similarity_score DESC NULLS LAST"), "id"],
+            postgresql_where=sa.text("NOT is_deleted AND challenge_id IS NOT NULL"),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_creation_likes_user_created",
+            "creation_likes",
+            ["user_id", sa.text("created_at DESC")],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_creation_likes_user_created", table_name="creation_likes", postgresql_concurrently=True)
+        op.drop_index("ix_creations_challenge_leaderboard", table_name="creations", postgresql_concurrently=True)
+        op.drop_index("ix_creations_user_history", table_name="creations", postgresql_concurrently=True)
+        op.drop_index("ix_creations_feed_new", table_name="creations", postgresql_concurrently=True)
@@ -0,0 +1,46 @@
+"""challenge schedule notifications
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+
+A statement trigger on `challenges` that sends NOTIFY challenge_schedule
+on every INSERT / UPDATE / DELETE / TRUNCATE, so each API worker reloads
+its in-memory challenge schedule (app/core/challenge_schedule.py) as soon
+as any writer commits, including the push_*_challenge.py scripts. The
+notification is delivered on commit, and only if the transaction commits.
+"""
+
+from alembic import op
+
+# ---------------------------------------------------------------------------
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+# ---------------------------------------------------------------------------
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION notify_challenge_schedule() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('challenge_schedule', TG_OP);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER challenges_notify_schedule
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON challenges
+        FOR EACH STATEMENT EXECUTE FUNCTION notify_challenge_schedule()
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS challenges_notify_schedule ON challenges")
+    op.execute("DROP FUNCTION IF EXISTS notify_challenge_schedule()")
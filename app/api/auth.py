@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from ..core import security, database
+from ..core import security, database, credits as credit_service, user_stats, object_cache
 from ..core.config import settings
 from ..core.firebase import verify_firebase_android_token, get_firebase_status
 from ..models import user as models
@@ -13,7 +13,6 @@ import secrets
 import random
 import string
 
-from ..models.style import Creation, CreationLike # For stats calculation in public profile
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +27,13 @@ def generate_referral_code():
     return ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
 
 
+def _user_out(user: models.User) -> schemas.User:
+    """User as returned by the API, with today's effective daily credits (read-only)."""
+    out = schemas.User.model_validate(user)
+    out.daily_credits = credit_service.effective_daily_credits(user)
+    return out
+
+
 def get_current_user(
     token: str = Depends(security.oauth2_scheme),
     db: Session = Depends(get_db),
@@ -122,7 +128,7 @@ def signup(user: schemas.UserCreate, db: Session = Depends(get_db)):
     return {
         "success": True,
         "data": {
-            "user": new_user,
+            "user": _user_out(new_user),
             "access_token": access_token,
             "refresh_token": refresh_token,
             "token_type": "bearer",
@@ -256,6 +262,7 @@ def login_with_google(google_data: schemas.GoogleLoginRequest, db: Session = Dep
         if updated:
             db.commit()
             db.refresh(user)
+            object_cache.users.invalidate(user.id)
 
     access_token = security.create_access_token(user.email)
     refresh_token = security.create_refresh_token(user.email)
@@ -263,7 +270,7 @@ def login_with_google(google_data: schemas.GoogleLoginRequest, db: Session = Dep
     return {
         "success": True,
         "data": {
-            "user": user,
+            "user": _user_out(user),
             "access_token": access_token,
             "refresh_token": refresh_token,
             "token_type": "bearer",
@@ -315,7 +322,7 @@ def login(user_credentials: schemas.UserLogin, db: Session = Depends(get_db)):
     return {
         "success": True,
         "data": {
-            "user": user,
+            "user": _user_out(user),
             "access_token": access_token,
             "refresh_token": refresh_token,
             "token_type": "bearer",
@@ -332,7 +339,7 @@ def get_me(current_user: models.User = Depends(get_current_user)):
     """
     return {
         "success": True,
-        "data": {"user": current_user},
+        "data": {"user": _user_out(current_user)},
         "message": "OK",
     }
 
@@ -354,10 +361,12 @@ def update_profile(
     db.add(current_user)
     db.commit()
     db.refresh(current_user)
+    user_stats.invalidate_profile(current_user.id)
+    object_cache.users.invalidate(current_user.id)
     
     return {
         "success": True,
-        "data": {"user": current_user},
+        "data": {"user": _user_out(current_user)},
         "message": "Profile updated successfully"
     }
 
@@ -387,6 +396,8 @@ async def upload_user_avatar(
     db.add(current_user)
     db.commit()
     db.refresh(current_user)
+    user_stats.invalidate_profile(current_user.id)
+    object_cache.users.invalidate(current_user.id)
     
     return {
         "success": True,
@@ -426,28 +437,13 @@ def refresh_token(token: str = Depends(security.oauth2_scheme), db: Session = De
         "expires_in": 1800
     }
 
-@router.get("/profile/{user_id}", response_model=None)
-def get_public_profile(user_id: int, db: Session = Depends(get_db)):
-    """
-    Publicly accessible information about a user for sharing.
-    Returns: name, avatar, creation count, total likes, and a share URL.
-    """
+def _load_public_profile(db: Session, user_id: int) -> dict:
     user = db.query(models.User).filter(models.User.id == user_id, models.User.is_active == True).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    # Calculate stats
-    creations_count = db.query(Creation).filter(
-        Creation.user_id == user_id, 
-        Creation.is_public == True, 
-        Creation.is_deleted == False
-    ).count()
-    
-    total_likes = db.query(func.sum(Creation.likes_count)).filter(
-        Creation.user_id == user_id,
-        Creation.is_public == True,
-        Creation.is_deleted == False
-    ).scalar() or 0
+    # Counters are maintained incrementally in user_stats (no per-view aggregation)
+    creations_count, total_likes = user_stats.get_stats(db, user_id)
     
     # Construct response manually to match shared schema but keep it simple here
     return {
@@ -467,6 +463,20 @@ def get_public_profile(user_id: int, db: Session = Depends(get_db)):
     }
 
 
+@router.get("/profile/{user_id}", response_model=None)
+async def get_public_profile(user_id: int, reader: database.DBReader = Depends(database.get_db_reader)):
+    """
+    Publicly accessible information about a user for sharing.
+    Returns: name, avatar, creation count, total likes, and a share URL.
+    Cached per worker for PUBLIC_PROFILE_CACHE_SECONDS (share links are hot).
+    """
+    profile = user_stats.public_profile_cache.get(user_id)
+    if profile is None:
+        profile = await reader.run(_load_public_profile, user_id)
+        user_stats.public_profile_cache.set(user_id, profile)
+    return profile
+
+
 @router.delete("/account")
 def delete_account(
     current_user: models.User = Depends(get_current_user),
@@ -1,16 +1,21 @@
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session, joinedload
 from typing import Optional, List
 from datetime import datetime, timezone
 
-from app.core.database import get_db
-from app.core import security, s3 as s3_service, gemini as gemini_service
+from app.core.config import settings
+from app.core.database import get_db, get_db_reader, DBReader
+from app.core import security, s3 as s3_service, gemini as gemini_service, credits as credit_service, user_stats
+from app.core import object_cache, similarity
+from app.core.challenge_schedule import challenge_schedule, current_challenge
+from app.core.leaderboard import LeaderboardEntry, leaderboards
+from app.core.pagination import decode_cursor, encode_cursor
 from app.models.user import User
 from app.models.style import Challenge, Creation
 from app.schemas.style import CreationOut, ChallengeOut, ChallengeLeaderboardEntry, StoryStep
-from app.core.config import settings
 
 router = APIRouter(prefix="/challenges", tags=["Challenges"])
 
@@ -30,58 +35,27 @@ def get_current_user(
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
     return user
 
-def _refresh_daily_credits(user: User, db: Session) -> User:
-    now = datetime.now(timezone.utc)
-    today = now.date()
-
-    if user.daily_credits_date is None or user.daily_credits_date.date() != today:
-        user.daily_credits = settings.DAILY_FREE_CREDITS
-        user.daily_credits_date = now
-        user = db.merge(user)
-        db.commit()
-        db.refresh(user)
-
-    return user
-
 # --- Endpoints ---
 
 @router.get("/current", response_model=ChallengeOut)
-def get_current_challenge(db: Session = Depends(get_db)):
+async def get_current_challenge():
     """Return the currently active challenge (if any)."""
-    now = datetime.now(timezone.utc)
-    challenge = (
-        db.query(Challenge)
-        .filter(Challenge.is_active == True, Challenge.starts_at <= now, Challenge.ends_at >= now)
-        .order_by(Challenge.challenge_type.desc(), Challenge.id.desc()) # Prefer mystery, then latest
-        .first()
-    )
+    challenge = await current_challenge()
     if not challenge:
         raise HTTPException(status_code=404, detail="No active challenge found.")
     return challenge
 
 
 @router.get("/collaborative/current", response_model=ChallengeOut)
-def get_current_collaborative_challenge(db: Session = Depends(get_db)):
+async def get_current_collaborative_challenge():
     """Return the currently active collaborative story challenge."""
-    now = datetime.now(timezone.utc)
-    challenge = (
-        db.query(Challenge)
-        .filter(
-            Challenge.challenge_type == "collaborative",
-            Challenge.is_active == True,
-            Challenge.starts_at <= now,
-            Challenge.ends_at >= now
-        )
-        .first()
-    )
+    challenge = await current_challenge("collaborative")
     if not challenge:
         raise HTTPException(status_code=404, detail="No active collaborative challenge found.")
     return challenge
 
 
-@router.get("/collaborative/story/{group_id}", response_model=List[StoryStep])
-def get_story_progress(group_id: int, db: Session = Depends(get_db)):
-    """Returns the sequence of winners for a 7-day story challenge."""
+def _load_story_progress(db: Session, group_id: int) -> List[StoryStep]:
     challenges = (
         db.query(Challenge)
         .options(joinedload(Challenge.winner).joinedload(Creation.user))
@@ -102,6 +76,45 @@ def get_story_progress(group_id: int, db: Session = Depends(get_db)):
     return steps
 
 
+@router.get("/collaborative/story/{group_id}", response_model=List[StoryStep])
+async def get_story_progress(group_id: int, reader: DBReader = Depends(get_db_reader)):
+    """Returns the sequence of winners for a 7-day story challenge."""
+    return await reader.run(_load_story_progress, group_id)
+
+
+def _run_challenge_generation(
+    image_bytes: bytes,
+    image_mime: str,
+    user_id: int,
+    prompt: str,
+    target_image_url: str,
+) -> tuple[str, str, float, float]:
+    """
+    Slow external work for one challenge entry (Gemini → S3 → similarity scoring).
+    Runs in the threadpool with no database connection checked out.
+    """
+    try:
+        generated_bytes, proc_time = gemini_service.transform_image(
+            image_bytes=image_bytes,
+            image_mime=image_mime,
+            prompt=prompt,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"AI transformation failed: {e}")
+
+    orig_url = s3_service.upload_creation_original(image_bytes, user_id, image_mime)
+    gen_url = s3_service.upload_creation_generated(generated_bytes, user_id, "image/jpeg")
+
+    # Similarity Scoring (The Magic for Mystery Prompt!), local or Gemini per SIMILARITY_BACKEND.
+    # Collaborative challenges use the same metric for now: the previous
+    # day's winner is the target image.
+    try:
+        score = similarity.calculate_similarity(generated_bytes, target_image_url)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Similarity scoring failed: {e}")
+    return orig_url, gen_url, proc_time, score
+
+
 @router.post("/{challenge_id}/submit")
 async def submit_challenge_entry(
     challenge_id: int,
@@ -111,83 +124,89 @@ async def submit_challenge_entry(
 ):
     """
     Participate in a challenge:
-    1. Generate image using user's photo + challenge's hidden prompt.
-    2. Upload result to S3.
-    3. Calculate similarity score with the challenge's target image.
-    4. Save as a special 'Creation' tied to the challenge.
+    1. Load the target image (local scoring only), then reserve credits and
+       commit (no connection is held past this point).
+    2. Generate image using user's photo + challenge's hidden prompt, upload to S3
+       and score similarity against the challenge's target image.
+    3. Save as a special 'Creation' tied to the challenge (or refund on failure).
     """
-    challenge = db.query(Challenge).filter(Challenge.id == challenge_id, Challenge.is_active == True).first()
-    if not challenge:
-        raise HTTPException(status_code=404, detail="Challenge not found.")
+    cost = 1 # Challenges are cheap!
+
+    def _prepare():
+        challenge = db.query(Challenge).filter(Challenge.id == challenge_id, Challenge.is_active == True).first()
+        if not challenge:
+            raise HTTPException(status_code=404, detail="Challenge not found.")
+
+        now = datetime.now(timezone.utc)
+        if challenge.ends_at < now:
+            raise HTTPException(status_code=400, detail="This challenge has expired.")
+
+        # Copy before commit: expired attributes would reacquire a connection
+        snapshot = (current_user.id, challenge.prompt_template, challenge.target_image_url)
+        name = challenge.name
+        user_id, _, target_image_url = snapshot
 
-    now = datetime.now(timezone.utc)
-    if challenge.ends_at < now:
-        raise HTTPException(status_code=400, detail="This challenge has expired.")
+        # Local scoring needs the target: load it before anything is charged or
+        # generated, with the connection back in the pool meanwhile
+        if settings.SIMILARITY_BACKEND != "gemini":
+            db.commit()
+            try:
+                similarity.prepare_target(target_image_url)
+            except Exception as e:
+                raise HTTPException(status_code=503, detail=f"Challenge target image unavailable: {e}")
+
+        try:
+            reserved = credit_service.reserve_credits(
+                db, user_id, cost, description=f"Challenge entry: {name}",
+                reference_id=f"challenge:{challenge_id}", tx_type="challenge_entry",
+            )
+        except credit_service.InsufficientCredits:
+            raise HTTPException(status_code=402, detail="Insufficient credits to join challenge.")
+        db.close()
+        return snapshot + (reserved,)
 
-    # 1. Image checks
     image_bytes = await image.read()
-    
-    # 2. Credit deduction (fixed cost for challenges, e.g. 1 credit)
-    current_user = _refresh_daily_credits(current_user, db)
-    total_creds = (current_user.credits or 0) + (current_user.daily_credits or 0)
-    
-    cost = 1 # Challenges are cheap!
-    if total_creds < cost:
-        raise HTTPException(status_code=402, detail="Insufficient credits to join challenge.")
+    user_id, prompt, target_image_url, reservation = await run_in_threadpool(_prepare)
 
-    # 3. AI Transformation
     try:
-        generated_bytes, proc_time = gemini_service.transform_image(
-            image_bytes=image_bytes,
-            image_mime=image.content_type,
-            prompt=challenge.prompt_template
+        orig_url, gen_url, proc_time, score = await run_in_threadpool(
+            _run_challenge_generation, image_bytes, image.content_type, user_id, prompt, target_image_url
         )
-    except Exception as e:
-        raise HTTPException(status_code=503, detail=f"AI transformation failed: {e}")
+    except Exception:
+        await run_in_threadpool(credit_service.refund_credits, db, reservation)
+        raise
 
-    # 4. S3 Uploads
-    orig_url = s3_service.upload_creation_original(image_bytes, current_user.id, image.content_type)
-    gen_url = s3_service.upload_creation_generated(generated_bytes, current_user.id, "image/jpeg")
-
-    # 5. Scoring
-    score = 0
-    if challenge.challenge_type == "mystery":
-        # Gemini Similarity Scoring (The Magic for Mystery Prompt!)
-        score = gemini_service.calculate_similarity(generated_bytes, challenge.target_image_url)
-    else:
-        # For collaborative, maybe we just give a base score or use a different metric
-        # but for now let's keep it 0 or use similarity if the prompt is to "match" the style
-        score = gemini_service.calculate_similarity(generated_bytes, challenge.target_image_url)
-
-    # 6. Save Creation
-    creation = Creation(
-        user_id=current_user.id,
-        style_id=1, # Default style or generic 'challenge' style
-        challenge_id=challenge.id,
-        original_image_url=orig_url,
-        generated_image_url=gen_url,
-        thumbnail_url=gen_url,
-        prompt_used=challenge.prompt_template,
-        similarity_score=score,
-        credits_used=cost,
-        processing_time=proc_time
-    )
-    db.add(creation)
-
-    # Deduct credits
-    current_user = db.merge(current_user)
-    if (current_user.daily_credits or 0) >= cost:
-        current_user.daily_credits -= cost
-    else:
-        current_user.credits -= cost
-        
-    db.commit()
-    db.refresh(creation)
+    def _save() -> tuple[int, datetime]:
+        creation = Creation(
+            user_id=user_id,
+            style_id=1, # Default style or generic 'challenge' style
+            challenge_id=challenge_id,
+            original_image_url=orig_url,
+            generated_image_url=gen_url,
+            thumbnail_url=gen_url,
+            prompt_used=prompt,
+            similarity_score=score,
+            credits_used=cost,
+            processing_time=proc_time
+        )
+        db.add(creation)
+        db.flush()
+        user_stats.creation_added(db, creation)
+        # created_at is fetched by the INSERT; read it before commit expires it
+        created_at = creation.created_at
+        db.commit()
+        return creation.id, created_at
+
+    creation_id, created_at = await run_in_threadpool(_save)
+    leaderboards.entry_added(challenge_id, LeaderboardEntry(
+        id=creation_id, user_id=user_id, similarity_score=score,
+        generated_image_url=gen_url, created_at=created_at,
+    ))
 
     return {
         "success": True,
         "data": {
-            "id": creation.id,
+            "id": creation_id,
             "similarity_score": score,
             "generated_image_url": gen_url,
             "message": f"Submitted successfully! Match score: {score}%"
@@ -195,28 +214,79 @@ async def submit_challenge_entry(
     }
 
 
-@router.get("/{challenge_id}/leaderboard", response_model=List[ChallengeLeaderboardEntry])
-def get_challenge_leaderboard(challenge_id: int, db: Session = Depends(get_db)):
-    """Returns top matching results for the challenge."""
-    results = (
-        db.query(Creation)
-        .options(joinedload(Creation.user))
-        .filter(Creation.challenge_id == challenge_id)
-        .order_by(Creation.similarity_score.desc())
-        .limit(20)
-        .all()
+def _entry_out(rank: int, entry: LeaderboardEntry, users: dict) -> ChallengeLeaderboardEntry:
+    user = users.get(entry.user_id)
+    return ChallengeLeaderboardEntry(
+        id=entry.id,
+        rank=rank,
+        user_name=user.name if user else "Anonymous",
+        avatar_url=user.avatar_url if user else None,
+        similarity_score=entry.similarity_score or 0,
+        generated_image_url=entry.generated_image_url,
+        created_at=entry.created_at
     )
-    
-    return [
-        ChallengeLeaderboardEntry(
-            id=c.id,
-            user_name=c.user.name if c.user else "Anonymous",
-            avatar_url=c.user.avatar_url if c.user else None,
-            similarity_score=c.similarity_score or 0,
-            generated_image_url=c.generated_image_url,
-            created_at=c.created_at
-        ) for c in results
-    ]
+
+
+def _parse_leaderboard_cursor(cursor: Optional[str]) -> Optional[tuple]:
+    values = decode_cursor(cursor, 3)
+    if values is None:
+        return None
+    try:
+        return float(values[0]), int(values[1]), int(values[2])
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def _load_leaderboard(
+    db: Session, challenge_id: int, limit: int = 20, after: Optional[tuple] = None
+) -> tuple[List[ChallengeLeaderboardEntry], Optional[str]]:
+    ranked, next_after = leaderboards.page(db, challenge_id, limit, after)
+    users = object_cache.users.get_many(db, [e.user_id for _, e in ranked])
+    entries = [_entry_out(rank, e, users) for rank, e in ranked]
+    return entries, encode_cursor(*next_after) if next_after else None
+
+
+@router.get("/{challenge_id}/leaderboard", response_model=List[ChallengeLeaderboardEntry])
+async def get_challenge_leaderboard(
+    challenge_id: int,
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="`X-Next-Cursor` header of the previous page"),
+    reader: DBReader = Depends(get_db_reader),
+):
+    """
+    Returns the challenge's entries by similarity score (ties: earliest
+    submission first), each with its `rank`. When more entries follow, the
+    `X-Next-Cursor` response header holds the `cursor` for the next page.
+    """
+    after = _parse_leaderboard_cursor(cursor)
+    entries, next_cursor = await reader.run(_load_leaderboard, challenge_id, limit, after)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return entries
+
+
+@router.get("/{challenge_id}/leaderboard/me")
+def get_my_leaderboard_rank(
+    challenge_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Returns the current user's best entry in the challenge, its rank and the number of ranked entries."""
+    entry = leaderboards.best_entry(db, challenge_id, current_user.id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="You have no entry in this challenge.")
+    rank = leaderboards.rank_of(db, challenge_id, entry)
+    users = {current_user.id: current_user}
+    return {
+        "success": True,
+        "data": {
+            "rank": rank,
+            # The board's count can trail this worker's view by a refresh
+            "total": max(leaderboards.board(db, challenge_id).total, rank),
+            "entry": _entry_out(rank, entry, users),
+        },
+    }
 
 
 @router.post("/{challenge_id}/set_winner")
@@ -239,5 +309,7 @@ def admin_set_challenge_winner(
     
     challenge.previous_winner_id = creation_id
     db.commit()
+    # Other workers reload on the trigger's NOTIFY
+    challenge_schedule.invalidate()
     
     return {"success": True, "message": "Winner set successfully."}
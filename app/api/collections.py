@@ -3,7 +3,10 @@ from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 
 from app.core.database import get_db
-from app.api.creations import get_current_user, _creation_to_out, get_optional_user
+from app.api.creations import get_current_user, get_optional_user
+from app.api import serializers
+from app.core import object_cache
+from app.core.responses import ORJSONResponse
 from app.models.user import User
 from app.models.style import Creation, Collection, CollectionCreation, CreationLike
 from app.schemas.collection import (
@@ -71,22 +74,27 @@ def get_collection_detail(
     if not col:
         raise HTTPException(status_code=404, detail="Collection not found")
 
+    ids = [
+        row.creation_id for row in db.query(CollectionCreation.creation_id)
+        .filter(CollectionCreation.collection_id == col.id)
+        .order_by(CollectionCreation.id)
+        .all()
+    ]
+    creations = object_cache.hydrate_creations(db, ids, keep=lambda c: not c.is_deleted)
+
     # Get creations with liked state for current user
     liked_ids = {
         like.creation_id for like in db.query(CreationLike.creation_id)
-        .filter(CreationLike.user_id == current_user.id)
+        .filter(CreationLike.user_id == current_user.id, CreationLike.creation_id.in_(ids))
         .all()
-    }
+    } if ids else set()
 
     creations_out = [
-        _creation_to_out(c, is_liked=(c.id in liked_ids)) 
-        for c in col.creations if not c.is_deleted
+        serializers.creation_dict(c, is_liked=(c.id in liked_ids)) 
+        for c in creations
     ]
 
-    col_out = CollectionDetailOut.model_validate(col)
-    col_out.creations = creations_out
-    col_out.creations_count = len(creations_out)
-    return col_out
+    return ORJSONResponse(serializers.collection_detail_dict(col, creations_out))
 
 @router.put("/{collection_id}", response_model=CollectionOut)
 def update_collection(
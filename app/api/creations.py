@@ -3,23 +3,31 @@ Creations API
 -------------
 POST /api/creations/generate      → upload image + style_id → Gemini → save to S3 → return result
 GET  /api/creations/mine          → current user's creation history
-GET  /api/creations/feed          → community feed (sorted by likes)
+GET  /api/creations/feed          → community feed (?sort=new|hot|top, keyset ?cursor; ?shape=compact)
 POST /api/creations/{id}/like     → like a creation
 """
 
+import logging
 import time
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
+from sqlalchemy import func, tuple_
 from sqlalchemy.orm import Session, joinedload
-from typing import Optional
+from typing import Optional, Union
 
-from app.core.database import get_db
-from app.core import security, s3 as s3_service, gemini as gemini_service
+from app.core.database import get_db, get_db_reader, DBReader
+from app.core import security, s3 as s3_service, gemini as gemini_service, credits as credit_service, user_stats
+from app.core import feed_cache, feed_ranking, object_cache
+from app.core.pagination import encode_cursor, decode_cursor
 from app.models.user import User
 from app.models.style import Style, Category, Creation, CreationLike
-from app.schemas.style import GenerateResponse, CreationOut, StyleOut, CategoryOut
-from app.core.config import settings
-from datetime import datetime, timezone
+from app.schemas.style import GenerateResponse, CreationOut, StyleOut, CategoryOut, FeedPage, CompactFeedPage
+from app.api import serializers
+from app.core.responses import ORJSONResponse
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/creations", tags=["Creations"])
 
@@ -66,6 +74,22 @@ def get_optional_user(
 
 from app.core.s3 import get_proxy_url
 
+
+def _not_deleted(creation) -> bool:
+    return not creation.is_deleted
+
+def _category_to_out(cat: Category) -> CategoryOut:
+    return CategoryOut(
+        id=cat.id,
+        name=cat.name,
+        slug=cat.slug or f"category-{cat.id}",
+        icon=cat.icon,
+        description=cat.description,
+        preview_url=get_proxy_url(cat.preview_url),
+        display_order=cat.display_order,
+    )
+
+
 def _creation_to_out(
     creation: Creation,
     credits_remaining: Optional[int] = None,
@@ -84,15 +108,7 @@ def _creation_to_out(
             slug=style.slug or f"style-{style.id}",
             description=style.description,
             preview_url=get_proxy_url(style.preview_url),
-            category=CategoryOut(
-                id=cat.id,
-                name=cat.name,
-                slug=cat.slug or f"category-{cat.id}",
-                icon=cat.icon,
-                description=cat.description,
-                preview_url=get_proxy_url(cat.preview_url),
-                display_order=cat.display_order,
-            ),
+            category=_category_to_out(cat),
             uses_count=style.uses_count,
             is_trending=style.is_trending,
             is_new=style.is_new,
@@ -113,25 +129,57 @@ def _creation_to_out(
     )
 
 
-def _refresh_daily_credits(user: User, db: Session) -> User:
+# ─── Generate Endpoint ────────────────────────────────────────────────────────
+
+class GenerationError(Exception):
+    def __init__(self, status_code: int, code: str, message: str):
+        self.status_code = status_code
+        self.code = code
+        self.message = message
+        super().__init__(message)
+
+
+def _run_generation(
+    image_bytes: bytes,
+    image_mime: str,
+    user_id: int,
+    prompt: str,
+) -> tuple[str, str, float]:
     """
-    Ensure the user's daily credits are granted for the current day.
-    Daily credits are reset every calendar day (UTC) and do not accumulate.
+    All the slow external work for one generation (S3 → Gemini → S3).
+    Runs in the threadpool with no database connection checked out.
+    Raises GenerationError carrying the API error code on failure.
     """
-    now = datetime.now(timezone.utc)
-    today = now.date()
+    try:
+        original_url = s3_service.upload_creation_original(
+            file_bytes=image_bytes,
+            user_id=user_id,
+            content_type=image_mime,
+        )
+    except Exception as e:
+        raise GenerationError(500, "S3_UPLOAD_ERROR", f"Failed to upload original image: {str(e)}")
 
-    if user.daily_credits_date is None or user.daily_credits_date.date() != today:
-        user.daily_credits = settings.DAILY_FREE_CREDITS
-        user.daily_credits_date = now
-        user = db.merge(user)
-        db.commit()
-        db.refresh(user)
+    try:
+        generated_bytes, processing_time = gemini_service.transform_image(
+            image_bytes=image_bytes,
+            image_mime=image_mime,
+            prompt=prompt,
+            model="models/gemini-3-pro-image-preview",
+        )
+    except Exception as e:
+        raise GenerationError(503, "AI_SERVICE_ERROR", f"AI generation failed: {str(e)}")
 
-    return user
+    try:
+        generated_url = s3_service.upload_creation_generated(
+            file_bytes=generated_bytes,
+            user_id=user_id,
+            content_type="image/jpeg",
+        )
+    except Exception as e:
+        raise GenerationError(500, "S3_UPLOAD_ERROR", f"Failed to upload generated image: {str(e)}")
 
+    return original_url, generated_url, processing_time
 
-# ─── Generate Endpoint ────────────────────────────────────────────────────────
 
 @router.post("/generate", response_model=GenerateResponse)
 async def generate_image(
@@ -145,6 +193,15 @@ async def generate_image(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
+    """
+    The flow is split into short DB phases so a connection is never held while
+    waiting 10–30 s on Gemini / S3:
+      1. DB: load style, reserve credits, COMMIT (connection returns to the pool)
+      2. No DB: upload original, call Gemini, upload result (in the threadpool)
+      3. DB: save the Creation — or refund the reservation if step 2 failed
+    """
+    reservation = None
+    saved = False
     try:
         # ── 1. Validate image ──────────────────────────────────────────────────
         if image.content_type not in ALLOWED_MIME_TYPES:
@@ -160,133 +217,116 @@ async def generate_image(
                 content={"success": False, "error": {"code": "IMAGE_TOO_LARGE", "message": "Image must be under 10 MB."}},
             )
 
-        # ── 2. Check credits ───────────────────────────────────────────────────
-        style = (
-            db.query(Style)
-            .options(joinedload(Style.category))
-            .filter(Style.id == style_id, Style.is_active == True)
-            .first()
-        )
-        if not style:
-            return JSONResponse(
-                status_code=404,
-                content={"success": False, "error": {"code": "STYLE_NOT_FOUND", "message": "Style not found."}},
+        # ── 2. DB phase: look up style, reserve credits, release connection ────
+        def _prepare():
+            style = (
+                db.query(Style)
+                .filter(Style.id == style_id, Style.is_active == True)
+                .first()
             )
-
-        # Refresh / grant today's daily credits (non-accumulating, expire each day)
-        current_user = _refresh_daily_credits(current_user, db)
-
-        total_available_credits = (current_user.credits or 0) + (current_user.daily_credits or 0)
-        if total_available_credits < style.credits_required:
-            return JSONResponse(
-                status_code=402,
-                content={
-                    "success": False,
-                    "error": {
-                        "code": "INSUFFICIENT_CREDITS",
-                        "message": f"You need {style.credits_required} credits. You have {total_available_credits}.",
-                    },
-                },
+            if not style:
+                return None
+            # Copy what later phases need: ORM attributes expire on commit and
+            # touching them afterwards would silently check out a connection.
+            prompt = gemini_service.build_final_prompt(
+                prompt_template=style.prompt_template,
+                mood=mood,
+                weather=weather,
+                dress_style=dress_style,
+                custom_prompt=custom_prompt,
+                negative_prompt=style.negative_prompt,
             )
+            user_id = current_user.id
+            cost = style.credits_required
+            reserved = credit_service.reserve_credits(
+                db, user_id, cost, description=f"Generated image with style: {style.name}",
+                reference_id=f"style:{style.id}",
+            )
+            db.close()
+            return user_id, cost, prompt, reserved
 
-        # ── 3. Upload original image to S3 ─────────────────────────────────────
         try:
-            original_url = s3_service.upload_creation_original(
-                file_bytes=image_bytes,
-                user_id=current_user.id,
-                content_type=image.content_type,
+            prepared = await run_in_threadpool(_prepare)
+        except credit_service.InsufficientCredits as e:
+            return JSONResponse(
+                status_code=402,
+                content={"success": False, "error": {"code": "INSUFFICIENT_CREDITS", "message": str(e)}},
             )
-        except Exception as e:
+        if prepared is None:
             return JSONResponse(
-                status_code=500,
-                content={"success": False, "error": {"code": "S3_UPLOAD_ERROR", "message": f"Failed to upload original image: {str(e)}"}},
+                status_code=404,
+                content={"success": False, "error": {"code": "STYLE_NOT_FOUND", "message": "Style not found."}},
             )
+        user_id, credits_required, final_prompt, reservation = prepared
 
-        # ── 4. Build final prompt ──────────────────────────────────────────────
-        final_prompt = gemini_service.build_final_prompt(
-            prompt_template=style.prompt_template,
-            mood=mood,
-            weather=weather,
-            dress_style=dress_style,
-            custom_prompt=custom_prompt,
-            negative_prompt=style.negative_prompt,
-        )
-
-        # ── 5. Call Gemini ─────────────────────────────────────────────────────
+        # ── 3. External phase: S3 + Gemini, no DB connection held ──────────────
         try:
-            generated_bytes, processing_time = gemini_service.transform_image(
-                image_bytes=image_bytes,
-                image_mime=image.content_type,
-                prompt=final_prompt,
-                model="models/gemini-3-pro-image-preview",
+            original_url, generated_url, processing_time = await run_in_threadpool(
+                _run_generation, image_bytes, image.content_type, user_id, final_prompt
             )
-        except Exception as e:
+        except GenerationError as e:
+            await run_in_threadpool(credit_service.refund_credits, db, reservation)
             return JSONResponse(
-                status_code=503,
-                content={"success": False, "error": {"code": "AI_SERVICE_ERROR", "message": f"AI generation failed: {str(e)}"}},
+                status_code=e.status_code,
+                content={"success": False, "error": {"code": e.code, "message": e.message}},
             )
 
-        # ── 6. Upload generated image to S3 ───────────────────────────────────
-        try:
-            generated_url = s3_service.upload_creation_generated(
-                file_bytes=generated_bytes,
-                user_id=current_user.id,
-                content_type="image/jpeg",
+        # ── 4. DB phase: save Creation & increment style usage ─────────────────
+        def _save() -> CreationOut:
+            nonlocal saved
+            creation = Creation(
+                user_id=user_id,
+                style_id=style_id,
+                original_image_url=original_url,
+                generated_image_url=generated_url,
+                thumbnail_url=generated_url,   # same URL; resize separately if needed
+                mood=mood,
+                weather=weather,
+                dress_style=dress_style,
+                custom_prompt=custom_prompt,
+                prompt_used=final_prompt,
+                credits_used=credits_required,
+                processing_time=processing_time,
+                is_public=is_public,
             )
-        except Exception as e:
-            return JSONResponse(
-                status_code=500,
-                content={"success": False, "error": {"code": "S3_UPLOAD_ERROR", "message": f"Failed to upload generated image: {str(e)}"}},
+            db.add(creation)
+            db.flush()
+            user_stats.creation_added(db, creation)
+            feed_ranking.creation_added(db, creation)
+            db.query(Style).filter(Style.id == style_id).update(
+                {Style.uses_count: Style.uses_count + 1}, synchronize_session=False
             )
+            db.commit()
+            saved = True
+            if is_public:
+                feed_cache.invalidate()
+            creation = (
+                db.query(Creation)
+                .options(joinedload(Creation.style).joinedload(Style.category), joinedload(Creation.user))
+                .filter(Creation.id == creation.id)
+                .one()
+            )
+            return _creation_to_out(creation, credits_remaining=reservation.credits_remaining)
 
-        # ── 7. Save Creation record ────────────────────────────────────────────
-        creation = Creation(
-            user_id=current_user.id,
-            style_id=style.id,
-            original_image_url=original_url,
-            generated_image_url=generated_url,
-            thumbnail_url=generated_url,   # same URL; resize separately if needed
-            mood=mood,
-            weather=weather,
-            dress_style=dress_style,
-            custom_prompt=custom_prompt,
-            prompt_used=final_prompt,
-            credits_used=style.credits_required,
-            processing_time=processing_time,
-            is_public=is_public,
-        )
-        db.add(creation)
-
-        # ── 8. Deduct credits (daily, then main) & increment style usage ───────
-        # Ensure user is attached to this session
-        current_user = db.merge(current_user)
-
-        credits_to_deduct = style.credits_required
-
-        # Use daily credits first
-        if (current_user.daily_credits or 0) > 0:
-            use_from_daily = min(current_user.daily_credits, credits_to_deduct)
-            current_user.daily_credits -= use_from_daily
-            credits_to_deduct -= use_from_daily
-
-        # Deduct any remaining from main credits balance
-        if credits_to_deduct > 0:
-            current_user.credits -= credits_to_deduct
-
-        style.uses_count += 1
-
-        db.commit()
-        db.refresh(creation)
-        db.refresh(current_user)
+        data = await run_in_threadpool(_save)
 
         return GenerateResponse(
             success=True,
-            data=_creation_to_out(creation, credits_remaining=current_user.credits),
+            data=data,
             message="Image generated successfully!",
         )
     except Exception as e:
         import traceback
         print(traceback.format_exc())
+        if reservation is not None and not saved:
+            try:
+                db.rollback()
+                await run_in_threadpool(credit_service.refund_credits, db, reservation)
+            except Exception:
+                logger.exception(
+                    "Refund failed after a failed generation: user %s lost %s credit(s) (reference %s)",
+                    reservation.user_id, reservation.cost, reservation.reference_id,
+                )
         return JSONResponse(
             status_code=500,
             content={"success": False, "error": {"code": "INTERNAL_SERVER_ERROR", "message": str(e)}},
@@ -301,38 +341,34 @@ def my_creations(
     current_user: User = Depends(get_current_user),
 ):
     """Returns the current user's creation history (newest first)."""
-    # Get true total count before pagination
-    total_count = db.query(Creation).filter(
-        Creation.user_id == current_user.id,
-        Creation.is_deleted == False
-    ).count()
-
-    creations = (
-        db.query(Creation)
-        .options(joinedload(Creation.style).joinedload(Style.category))
+    ids = [
+        row.id for row in db.query(Creation.id)
         .filter(
             Creation.user_id == current_user.id,
             Creation.is_deleted == False,
         )
-        .order_by(Creation.created_at.desc())
+        .order_by(Creation.created_at.desc(), Creation.id.desc())
         .all()
-    )
+    ]
+    # Not paginated, so the total is the number of ids
+    total_count = len(ids)
+    creations = object_cache.hydrate_creations(db, ids, keep=_not_deleted)
 
     # Get liked creations to set is_liked correctly
     liked_ids = {
         like.creation_id for like in db.query(CreationLike.creation_id)
-        .filter(CreationLike.user_id == current_user.id)
+        .filter(CreationLike.user_id == current_user.id, CreationLike.creation_id.in_(ids))
         .all()
-    }
+    } if ids else set()
 
     data = [
-        _creation_to_out(
+        serializers.creation_dict(
             c, 
             credits_remaining=current_user.credits, 
             is_liked=(c.id in liked_ids)
         ) for c in creations
     ]
-    return {"success": True, "data": data, "total": total_count}
+    return ORJSONResponse({"success": True, "data": data, "total": total_count})
 
 
 # ─── Community Feed ───────────────────────────────────────────────────────────
@@ -347,77 +383,142 @@ def liked_creations(
     """Returns a paginated list of all creations liked by the current user."""
     # Subquery to find IDs of liked creations
     query = (
-        db.query(Creation)
+        db.query(Creation.id)
         .join(CreationLike)
         .filter(CreationLike.user_id == current_user.id, Creation.is_deleted == False)
     )
     
     total_count = query.count()
     
-    creations = (
-        query
-        .options(
-            joinedload(Creation.style).joinedload(Style.category),
-            joinedload(Creation.user)
-        )
+    ids = [
+        row.id for row in query
         .order_by(CreationLike.created_at.desc()) # Newest likes first
         .offset(skip)
         .limit(limit)
         .all()
-    )
+    ]
+    creations = object_cache.hydrate_creations(db, ids, keep=_not_deleted)
     
     # Since we are fetching from 'liked' table, is_liked is implicitly true for all these
-    data = [_creation_to_out(c, is_liked=True) for c in creations]
-    return {"success": True, "data": data, "total": total_count}
+    data = [serializers.creation_dict(c, is_liked=True) for c in creations]
+    return ORJSONResponse({"success": True, "data": data, "total": total_count})
 
 
-@router.get("/feed")
-def get_community_feed(
-    skip: int = 0,
-    limit: int = 20,
-    user_id: Optional[int] = None,
-    db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(get_optional_user)
-):
-    """
-    Returns public creations sorted by most recent first.
-    If user_id is provided, returns only public creations from that user.
-    """
-    # Get true total count before pagination
-    query = db.query(Creation).filter(
-        Creation.is_public == True, 
-        Creation.is_deleted == False,
-        Creation.challenge_id == None  # Only show prompt-generated (non-challenge) creations
-    )
+def _token_email(token: Optional[str]) -> Optional[str]:
+    """Email (JWT `sub`) of an optional bearer access token, without touching the DB."""
+    if not token:
+        return None
+    payload = security.verify_token(token)
+    if not payload or payload.get("type") != "access":
+        return None
+    return payload.get("sub")
+
+
+def _parse_feed_cursor(sort: str, cursor: Optional[str]) -> Optional[tuple]:
+    values = decode_cursor(cursor, 2)
+    if values is None:
+        return None
+    try:
+        key = {"new": datetime.fromisoformat, "hot": float, "top": int}[sort](values[0])
+        # created_at is timestamptz: a naive key can't be compared with it
+        if sort == "new" and key.tzinfo is None:
+            raise ValueError("naive timestamp")
+        return key, int(values[1])
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def _query_feed(
+    db: Session,
+    skip: int,
+    limit: int,
+    user_id: Optional[int],
+    sort: str,
+    after: Optional[tuple],
+) -> tuple[list[int], int, Optional[str]]:
+    """(creation ids, total, next_cursor) straight from the DB."""
+    # Only show public, prompt-generated (non-challenge) creations
+    query = db.query(Creation.id).filter(*feed_ranking.FEED_FILTER)
     
     if user_id:
         query = query.filter(Creation.user_id == user_id)
         
+    # Get true total count before pagination
     total_count = query.count()
 
-    creations = (
-        query
-        .options(
-            joinedload(Creation.style).joinedload(Style.category),
-            joinedload(Creation.user)
-        )
-        .order_by(Creation.created_at.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+    sort_key, tie_breaker = feed_ranking.SORT_KEYS[sort]
+    query = feed_ranking.sorted_feed(query, sort)
+    if after is not None:
+        # Keyset: rows strictly after the cursor in (key DESC, id DESC) order
+        query = query.filter(tuple_(sort_key, tie_breaker) < tuple_(*after))
+    else:
+        query = query.offset(skip)
+
+    rows = query.limit(limit).all()
+    next_cursor = encode_cursor(rows[-1][1], rows[-1][0]) if rows and len(rows) == limit else None
+    return [row[0] for row in rows], total_count, next_cursor
+
+
+def _load_feed(
+    db: Session,
+    skip: int,
+    limit: int,
+    user_id: Optional[int],
+    viewer_email: Optional[str],
+    shape: str = "full",
+    sort: str = "new",
+    after: Optional[tuple] = None,
+) -> dict:
+    # The head of the global feed is served from the per-worker ID lists
+    window = None if user_id else feed_cache.window(sort, skip, limit, after)
+    if window is not None:
+        ids, total_count = window.ids, window.total
+        next_cursor = encode_cursor(*window.next_key) if window.next_key else None
+    else:
+        ids, total_count, next_cursor = _query_feed(db, skip, limit, user_id, sort, after)
+    creations = object_cache.hydrate_creations(db, ids, keep=feed_ranking.in_feed)
 
     # Get liked creations if user is logged in
     liked_ids = set()
-    if current_user:
+    if viewer_email and creations:
         liked_ids = {
             like.creation_id for like in db.query(CreationLike.creation_id)
-            .filter(CreationLike.user_id == current_user.id)
+            .join(User, User.id == CreationLike.user_id)
+            .filter(User.email == viewer_email, CreationLike.creation_id.in_([c.id for c in creations]))
             .all()
         }
 
-    data = [_creation_to_out(c, is_liked=(c.id in liked_ids)) for c in creations]
-    return {"success": True, "data": data, "total": total_count}
+    if shape == "compact":
+        page = serializers.compact_page(creations, liked_ids)
+    else:
+        page = {"data": [serializers.creation_dict(c, is_liked=(c.id in liked_ids)) for c in creations]}
+    return {"success": True, **page, "total": total_count, "next_cursor": next_cursor}
+
+
+# Documents both shapes; the handler returns the serialised page directly
+@router.get("/feed", response_model=Union[FeedPage, CompactFeedPage])
+async def get_community_feed(
+    skip: int = 0,
+    limit: int = 20,
+    user_id: Optional[int] = None,
+    sort: str = Query("new", pattern="^(new|hot|top)$", description="`new` (latest), `hot` (likes, time-decayed) or `top` (all-time likes)"),
+    cursor: Optional[str] = Query(None, description="`next_cursor` of the previous page; replaces skip"),
+    shape: str = Query("full", pattern="^(full|compact)$", description="`compact`: items carry style_id; styles / categories are sent once"),
+    reader: DBReader = Depends(get_db_reader),
+    token: Optional[str] = Depends(security.oauth2_scheme_optional),
+):
+    """
+    Returns public creations, newest first (sort=new, the default), by
+    time-decayed popularity (sort=hot) or by all-time likes (sort=top).
+    If user_id is provided, returns only public creations from that user.
+    Pass the page's `next_cursor` back as `cursor` to get the next page
+    (keyset pagination); `skip` still works but costs more the deeper it goes.
+    With shape=compact each item carries `style_id` instead of the embedded
+    style, and the page adds top-level `styles` / `categories` maps keyed by id.
+    """
+    after = _parse_feed_cursor(sort, cursor)
+    page = await reader.run(_load_feed, skip, limit, user_id, _token_email(token), shape, sort, after)
+    return ORJSONResponse(page)
 
 
 # ─── Interactions ─────────────────────────────────────────────────────────────
@@ -452,9 +553,12 @@ def like_creation(
     new_like = CreationLike(user_id=current_user.id, creation_id=creation_id)
     db.add(new_like)
 
-    # Increment count
-    creation.likes_count = (creation.likes_count or 0) + 1
+    # Increment count in SQL so concurrent likes are not lost
+    creation.likes_count = func.coalesce(Creation.likes_count, 0) + 1
+    user_stats.likes_changed(db, creation, 1)
+    feed_ranking.likes_changed(db, creation, 1)
     db.commit()
+    object_cache.creations.invalidate(creation_id)
     db.refresh(creation)
 
     return {
@@ -494,8 +598,11 @@ def unlike_creation(
 
     # Remove the like record and decrement count (floor at 0)
     db.delete(existing_like)
-    creation.likes_count = max(0, (creation.likes_count or 1) - 1)
+    creation.likes_count = func.greatest(func.coalesce(Creation.likes_count, 1) - 1, 0)
+    user_stats.likes_changed(db, creation, -1)
+    feed_ranking.likes_changed(db, creation, -1)
     db.commit()
+    object_cache.creations.invalidate(creation_id)
     db.refresh(creation)
 
     return {
@@ -564,8 +671,14 @@ def update_creation_visibility(
     if not creation:
         raise HTTPException(status_code=404, detail="Creation not found or you don't have permission")
 
+    was_public = creation.is_public
     creation.is_public = is_public
+    user_stats.visibility_changed(db, creation, was_public)
+    feed_ranking.visibility_changed(db, creation, was_public)
     db.commit()
+    object_cache.creations.invalidate(creation_id)
+    if is_public and not was_public:
+        feed_cache.invalidate()
 
     return {
         "success": True,
@@ -0,0 +1,69 @@
+"""
+Health API
+----------
+GET /api/health/db       → connection pool occupancy and checkout / wait / hold counters
+GET /api/health/caches   → hit rates and staleness of the in-process read caches
+
+Internal: both require the X-Health-Token header to match HEALTH_TOKEN, and
+answer 404 when HEALTH_TOKEN is not configured.
+"""
+
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+
+from app.core.config import settings
+from app.core.database import get_pool_stats
+from app.core import object_cache, similarity
+from app.core.challenge_schedule import challenge_schedule
+from app.core.feed_cache import feed_cache
+from app.core.leaderboard import leaderboards
+
+
+def require_health_token(x_health_token: Optional[str] = Header(None)) -> None:
+    if not settings.HEALTH_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_health_token or not secrets.compare_digest(x_health_token, settings.HEALTH_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid health token")
+
+
+router = APIRouter(prefix="/health", tags=["Health"], dependencies=[Depends(require_health_token)])
+
+
+@router.get("/db")
+def db_pool_health():
+    """
+    Per-process connection pool metrics (each gunicorn worker has its own pool).
+    `checkout_timeouts` > 0 or a high `wait_seconds_max` means the pool is too small
+    for the current load; `slow_holds` counts requests that kept a connection longer
+    than DB_SLOW_CHECKOUT_WARN_SECONDS.
+    """
+    return {"success": True, "data": get_pool_stats()}
+
+
+@router.get("/caches")
+def cache_health():
+    """
+    Per-process read cache metrics. `feed`: community feed ID lists — hit rate,
+    misses by reason (cold, beyond_depth, invalid_cursor), and how old the
+    served ordering was (served_age_seconds_*); ages well above
+    FEED_CACHE_REFRESH_SECONDS mean the refresh task is failing. `objects`: row caches behind the list endpoints —
+    per-type hit rate and `loads` (batched IN (...) queries issued for misses).
+    `leaderboards`: challenge top-K boards — hit rate, `db_pages` (pages past
+    the top K) and `db_ranks` (/leaderboard/me ranks counted in the DB).
+    `challenge_schedule`: whether the NOTIFY listener is connected, reloads,
+    and when the snapshot behind /challenges/current is next reloaded.
+    `similarity`: the scoring backend, the cached challenge targets and how
+    submissions were batched (batches, entries, largest batch, fallbacks).
+    """
+    return {
+        "success": True,
+        "data": {
+            "feed": feed_cache.stats(),
+            "objects": object_cache.stats(),
+            "leaderboards": leaderboards.stats(),
+            "challenge_schedule": challenge_schedule.stats(),
+            "similarity": similarity.stats(),
+        },
+    }
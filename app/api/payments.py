@@ -1,10 +1,13 @@
-import razorpay
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-import hmac
 import hashlib
+import json
+import uuid
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
 
+from app.core import payment_reconciliation, purchases
 from app.core.database import get_db
+from app.core.payment_gateway import PaymentGatewayError, get_payment_gateway
 from app.api.auth import get_current_user
 from app.core.config import settings
 from app.models.user import User
@@ -20,14 +23,6 @@ from app.schemas.payment import (
 
 router = APIRouter(prefix="/payments", tags=["Payments"])
 
-# Initialize Razorpay client
-if settings.RAZORPAY_KEY_ID and settings.RAZORPAY_KEY_SECRET:
-    razorpay_client = razorpay.Client(
-        auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
-    )
-else:
-    razorpay_client = None
-
 @router.get("/pricing", response_model=PricingInfoResponse)
 def get_pricing():
     """
@@ -41,7 +36,7 @@ def get_pricing():
     )
 
 @router.post("/create-order", response_model=OrderCreateResponse)
-def create_order(
+async def create_order(
     request: OrderCreateRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -50,7 +45,8 @@ def create_order(
     Create a Razorpay order before initiating payment on the frontend.
     Uses the fixed credits package size from config.
     """
-    if not razorpay_client:
+    gateway = get_payment_gateway()
+    if not gateway:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Payment gateway is not configured."
@@ -62,22 +58,28 @@ def create_order(
     amount_inr = credits_to_buy * settings.CREDIT_PRICE_INR
     # Razorpay amount is in paise (1 INR = 100 paise)
     amount_paise = int(amount_inr * 100)
+    user_id = current_user.id
+
+    # Unique per purchase attempt: the gateway's idempotency key for retries
+    receipt = f"rcpt_{user_id}_{uuid.uuid4().hex[:20]}"
 
     try:
-        data = {
-            "amount": amount_paise,
-            "currency": "INR",
-            "receipt": f"receipt_{current_user.id}_{int(credits_to_buy)}",
-            "notes": {
-                "user_id": current_user.id,
-                "credits": credits_to_buy
-            }
-        }
-        order = razorpay_client.order.create(data=data)
+        order = await gateway.create_order(
+            amount_paise=amount_paise,
+            currency="INR",
+            receipt=receipt,
+            notes={"user_id": user_id, "credits": credits_to_buy},
+        )
+    except PaymentGatewayError as e:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Failed to create order: {str(e)}"
+        )
 
+    def _save():
         # Store the order in DB
         transaction = Transaction(
-            user_id=current_user.id,
+            user_id=user_id,
             order_id=order["id"],
             amount_inr=amount_inr,
             credits_purchased=credits_to_buy,
@@ -86,19 +88,15 @@ def create_order(
         db.add(transaction)
         db.commit()
 
-        return OrderCreateResponse(
-            success=True,
-            order_id=order["id"],
-            amount=amount_inr,
-            currency="INR",
-            key_id=settings.RAZORPAY_KEY_ID
-        )
+    await run_in_threadpool(_save)
 
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to create order: {str(e)}"
-        )
+    return OrderCreateResponse(
+        success=True,
+        order_id=order["id"],
+        amount=amount_inr,
+        currency="INR",
+        key_id=gateway.key_id
+    )
 
 @router.post("/verify-payment", response_model=PaymentVerifyResponse)
 def verify_payment(
@@ -108,8 +106,10 @@ def verify_payment(
 ):
     """
     Verifies the payment via Razorpay signature and grants credits.
+    Safe to call concurrently or repeatedly: credits are granted exactly once.
     """
-    if not razorpay_client:
+    gateway = get_payment_gateway()
+    if not gateway:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Payment gateway is not configured."
@@ -127,53 +127,95 @@ def verify_payment(
         )
 
     if transaction.status == "success":
-        return PaymentVerifyResponse(
-            success=True,
-            message="Payment already verified and credits granted.",
-            credits_added=0,
-            total_credits=current_user.credits
+        return _already_verified(current_user)
+
+    # Verify Payment Signature (local HMAC, no gateway round-trip)
+    if not gateway.verify_payment_signature(
+        request.razorpay_order_id, request.razorpay_payment_id, request.razorpay_signature
+    ):
+        purchases.fail_purchase(db, request.razorpay_order_id)
+        db.commit()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid payment signature."
         )
 
     try:
-        # Verify Payment Signature
-        params_dict = {
-            'razorpay_order_id': request.razorpay_order_id,
-            'razorpay_payment_id': request.razorpay_payment_id,
-            'razorpay_signature': request.razorpay_signature
-        }
-        # This will raise a SignatureVerificationError if verification fails
-        razorpay_client.utility.verify_payment_signature(params_dict)
-
-        # Payment is valid
-        transaction.status = "success"
-        transaction.payment_id = request.razorpay_payment_id
-        transaction.signature = request.razorpay_signature
-        
-        # Grant credits to the user
-        current_user.credits += transaction.credits_purchased
-        
+        # Conditional UPDATE: only one concurrent caller (or the webhook
+        # processor) flips the order to success and grants the credits
+        result = purchases.complete_purchase(
+            db,
+            request.razorpay_order_id,
+            request.razorpay_payment_id,
+            signature=request.razorpay_signature,
+            user_id=current_user.id,
+        )
         db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to verify payment: {str(e)}"
+        )
+
+    if result is None:
+        return _already_verified(current_user)
+
+    return PaymentVerifyResponse(
+        success=True,
+        message=f"Successfully added {result.credits_added} credits.",
+        credits_added=result.credits_added,
+        total_credits=result.credits_balance
+    )
 
-        return PaymentVerifyResponse(
-            success=True,
-            message=f"Successfully added {transaction.credits_purchased} credits.",
-            credits_added=transaction.credits_purchased,
-            total_credits=current_user.credits
+def _already_verified(user: User) -> PaymentVerifyResponse:
+    return PaymentVerifyResponse(
+        success=True,
+        message="Payment already verified and credits granted.",
+        credits_added=0,
+        total_credits=user.credits
+    )
+
+@router.post("/webhook")
+async def razorpay_webhook(request: Request, db: Session = Depends(get_db)):
+    """
+    Razorpay webhook receiver (payment.captured, order.paid, payment.failed).
+    Verifies the signature, stores the event in the inbox and returns at once;
+    credits are granted by the background processor, idempotently, so a
+    purchase completes even if the app never calls /verify-payment.
+    """
+    gateway = get_payment_gateway()
+    if not gateway:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Payment gateway is not configured."
         )
 
-    except razorpay.errors.SignatureVerificationError:
-        transaction.status = "failed"
-        db.commit()
+    body = await request.body()
+    if not gateway.verify_webhook_signature(body, request.headers.get("X-Razorpay-Signature", "")):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid payment signature."
+            detail="Invalid webhook signature."
         )
-    except Exception as e:
+
+    try:
+        payload = json.loads(body)
+    except ValueError:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to verify payment: {str(e)}"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid webhook payload."
         )
 
+    # Razorpay redelivers with the same event id; fall back to the body hash
+    event_id = request.headers.get("X-Razorpay-Event-Id") or hashlib.sha256(body).hexdigest()
+    stored = await run_in_threadpool(
+        payment_reconciliation.enqueue_webhook_event, db, event_id, payload.get("event", ""), payload
+    )
+    if stored:
+        payment_reconciliation.webhook_task.run_soon()
+
+    return {"success": True}
+
 @router.get("/history", response_model=PaymentHistoryResponse)
 def get_payment_history(
     db: Session = Depends(get_db),
@@ -1,12 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from ..core import database
+from datetime import datetime, timezone
+from ..core import ad_rewards, admob_ssv
 from ..core.config import settings
 from ..api.auth import get_current_user, get_db
 from ..models import user as user_models
-from ..models import rewards as reward_models
 from ..schemas import rewards as reward_schemas
-from datetime import date
 
 router = APIRouter(
     prefix="/rewards",
@@ -21,54 +22,97 @@ def reward_admob_watch(
 ):
     """
     Award credits to a user after they watch a rewarded ad.
-    The frontend should call this after the AdMob callback 'onUserEarnedReward'.
+    The frontend should call this after the AdMob callback 'onUserEarnedReward',
+    passing a unique `reward_id` so retries / double-taps are only granted once.
+
+    With ADMOB_SSV_ONLY enabled this only reports the balance; the credit is
+    granted by the server-side verification callback below.
+    """
+    if settings.ADMOB_SSV_ONLY:
+        return {
+            "success": True,
+            "data": {
+                "credits_earned": 0,
+                "new_balance": current_user.credits,
+                "daily_ad_count": ad_rewards.get_daily_ad_count(db, current_user.id, datetime.now(timezone.utc).date())
+            },
+            "message": "Reward will be credited once AdMob confirms it."
+        }
+
+    try:
+        result = ad_rewards.record_ad_reward(
+            db, current_user.id, ad_unit_id=ad_data.ad_unit_id, reward_id=ad_data.reward_id,
+        )
+    except ad_rewards.AdLimitReached as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+    if result.duplicate:
+        message = "Reward already granted."
+    else:
+        message = f"Successfully earned {result.credits_earned} credit!"
+
+    return {
+        "success": True,
+        "data": {
+            "credits_earned": result.credits_earned,
+            "new_balance": result.new_balance,
+            "daily_ad_count": result.daily_ad_count
+        },
+        "message": message
+    }
+
+
+@router.get("/admob-ssv")
+async def admob_ssv_callback(request: Request, db: Session = Depends(get_db)):
     """
-    # 1. Check daily limit
-    today = date.today()
-    ad_count = db.query(reward_models.AdWatch).filter(
-        reward_models.AdWatch.user_id == current_user.id,
-        reward_models.AdWatch.watched_date == today
-    ).count()
+    AdMob server-side verification callback (configure this URL on the ad unit).
 
-    if ad_count >= settings.DAILY_AD_WATCH_LIMIT:
-        raise HTTPException(
-            status_code=429,
-            detail=f"Daily ad watch limit ({settings.DAILY_AD_WATCH_LIMIT}) reached. Come back tomorrow!"
+    The app sets the MagicPic user id as the SSV `user_id`. The signature is
+    checked against the cached Google verifier keys, then the reward is granted
+    once per `transaction_id`. AdMob retries any non-200 response, so duplicate
+    and over-limit callbacks still answer 200.
+    """
+    try:
+        reward = await run_in_threadpool(admob_ssv.verify_callback, request.url.query)
+    except admob_ssv.SSVVerificationError as e:
+        return JSONResponse(
+            status_code=status.HTTP_403_FORBIDDEN,
+            content={"success": False, "error": {"code": "INVALID_SIGNATURE", "message": str(e)}},
         )
 
-    # 2. Update user credits
-    reward_amount = settings.REWARDED_AD_CREDITS
-    current_user.credits += reward_amount
-    
-    # 3. Create AdWatch record
-    new_watch = reward_models.AdWatch(
-        user_id=current_user.id,
-        ad_unit_id=ad_data.ad_unit_id,
-        credits_earned=reward_amount,
-        watched_date=today
-    )
-    db.add(new_watch)
+    if len(reward.transaction_id) > reward_schemas.AD_ID_MAX_LENGTH or len(reward.ad_unit or "") > reward_schemas.AD_ID_MAX_LENGTH:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"success": False, "error": {"code": "INVALID_TRANSACTION_ID", "message": "transaction_id or ad_unit is too long."}},
+        )
 
-    # 4. Create CreditTransaction record
-    new_tx = reward_models.CreditTransaction(
-        user_id=current_user.id,
-        amount=reward_amount,
-        type="ad_watch",
-        description=f"Watched ad: {ad_data.ad_unit_id}",
-        reference_id=ad_data.ad_unit_id,
-        balance_after=current_user.credits
-    )
-    db.add(new_tx)
+    if not reward.user_id.isdigit():
+        # e.g. the "Verify URL" test callback from the AdMob console
+        return {"success": True, "data": None, "message": "Verified; no user to reward."}
 
-    db.commit()
-    db.refresh(current_user)
+    def _grant():
+        user_id = int(reward.user_id)
+        if db.query(user_models.User.id).filter(user_models.User.id == user_id).first() is None:
+            return None
+        return ad_rewards.record_ad_reward(
+            db, user_id,
+            ad_unit_id=reward.ad_unit,
+            reward_id=reward.transaction_id,
+            ad_provider="admob_ssv",
+        )
 
+    try:
+        result = await run_in_threadpool(_grant)
+    except ad_rewards.AdLimitReached as e:
+        return {"success": True, "data": None, "message": str(e)}
+    if result is None:
+        return {"success": True, "data": None, "message": "Unknown user; reward ignored."}
     return {
         "success": True,
         "data": {
-            "credits_earned": reward_amount,
-            "new_balance": current_user.credits,
-            "daily_ad_count": ad_count + 1
+            "credits_earned": result.credits_earned,
+            "new_balance": result.new_balance,
+            "daily_ad_count": result.daily_ad_count
         },
-        "message": f"Successfully earned {reward_amount} credit!"
+        "message": "Reward already granted." if result.duplicate else "Reward granted.",
     }
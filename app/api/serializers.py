@@ -0,0 +1,146 @@
+"""
+Fast-path serialisers for list endpoints
+----------------------------------------
+Feed, mine, liked, collection detail and the styles lists return many items,
+and building nested Pydantic models per item (CreationOut → StyleOut →
+CategoryOut), then letting FastAPI re-encode them, dominates their CPU.
+
+These builders produce plain dicts with exactly the JSON shape of the
+schemas in app.schemas.style; endpoints return them in an ORJSONResponse,
+which skips model construction, response_model validation and
+jsonable_encoder. orjson serialises the datetimes itself.
+
+Nothing validates these dicts per request. scripts/bench_serializers.py
+checks them byte-for-byte against the Pydantic path: run it after changing
+a builder or a schema.
+"""
+
+from typing import Optional
+
+from app.core.s3 import get_proxy_url
+from app.models.style import Category, Collection, Creation, Style
+
+
+def category_dict(cat: Category) -> dict:
+    """CategoryOut."""
+    return {
+        "id": cat.id,
+        "name": cat.name,
+        "slug": cat.slug or f"category-{cat.id}",
+        "icon": cat.icon,
+        "description": cat.description,
+        "preview_url": get_proxy_url(cat.preview_url),
+        "display_order": cat.display_order,
+        "styles_count": 0,
+    }
+
+
+def _style_fields(style: Style) -> dict:
+    return {
+        "id": style.id,
+        "name": style.name,
+        "slug": style.slug or f"style-{style.id}",
+        "description": style.description,
+        "preview_url": get_proxy_url(style.preview_url),
+    }
+
+
+def _style_tail(style: Style) -> dict:
+    return {
+        "uses_count": style.uses_count,
+        "is_trending": style.is_trending,
+        "is_new": style.is_new,
+        "tags": style.tags or [],
+        "credits_required": style.credits_required,
+    }
+
+
+def style_dict(style: Style) -> dict:
+    """StyleOut, with the category embedded."""
+    return {**_style_fields(style), "category": category_dict(style.category), **_style_tail(style)}
+
+
+def compact_style_dict(style: Style) -> dict:
+    """CompactStyleOut: the category is referenced by id."""
+    return {**_style_fields(style), "category_id": style.category_id, **_style_tail(style)}
+
+
+def _creation_head(creation: Creation) -> dict:
+    return {
+        "id": creation.id,
+        "original_image_url": get_proxy_url(creation.original_image_url),
+        "generated_image_url": get_proxy_url(creation.generated_image_url),
+        "thumbnail_url": get_proxy_url(creation.thumbnail_url),
+    }
+
+
+def _creation_tail(creation: Creation, credits_remaining: Optional[int], is_liked: bool) -> dict:
+    # similarity_score / challenge_id are left at their schema defaults, as in _creation_to_out
+    return {
+        "user_name": creation.user.name if creation.user else "Anonymous",
+        "likes_count": creation.likes_count or 0,
+        "is_liked": is_liked,
+        "mood": creation.mood,
+        "weather": creation.weather,
+        "dress_style": creation.dress_style,
+        "is_public": creation.is_public,
+        "credits_used": creation.credits_used,
+        "credits_remaining": credits_remaining,
+        "similarity_score": 0.0,
+        "challenge_id": None,
+        "processing_time": creation.processing_time,
+        "created_at": creation.created_at,
+    }
+
+
+def creation_dict(creation: Creation, credits_remaining: Optional[int] = None, is_liked: bool = False) -> dict:
+    """CreationOut, with the style embedded."""
+    return {
+        **_creation_head(creation),
+        "style": style_dict(creation.style),
+        **_creation_tail(creation, credits_remaining, is_liked),
+    }
+
+
+def compact_creation_dict(creation: Creation, credits_remaining: Optional[int] = None, is_liked: bool = False) -> dict:
+    """CompactCreationOut: the style is referenced by id."""
+    return {
+        **_creation_head(creation),
+        "style_id": creation.style_id,
+        **_creation_tail(creation, credits_remaining, is_liked),
+    }
+
+
+def compact_page(creations: list[Creation], liked_ids: set[int]) -> dict:
+    """
+    `data` items carry style_id only; every style (and its category) referenced
+    on the page is serialised once, keyed by id. JSON object keys are strings.
+    """
+    styles: dict[str, dict] = {}
+    categories: dict[str, dict] = {}
+    for c in creations:
+        style = c.style
+        if str(style.id) not in styles:
+            styles[str(style.id)] = compact_style_dict(style)
+        if str(style.category_id) not in categories:
+            categories[str(style.category_id)] = category_dict(style.category)
+    return {
+        "data": [compact_creation_dict(c, is_liked=(c.id in liked_ids)) for c in creations],
+        "styles": styles,
+        "categories": categories,
+    }
+
+
+def collection_detail_dict(col: Collection, creations: list[dict]) -> dict:
+    """CollectionDetailOut."""
+    return {
+        "name": col.name,
+        "description": col.description,
+        "cover_url": col.cover_url,
+        "id": col.id,
+        "user_id": col.user_id,
+        "creations_count": len(creations),
+        "created_at": col.created_at,
+        "updated_at": col.updated_at,
+        "creations": creations,
+    }
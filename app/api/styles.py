@@ -10,59 +10,26 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session, joinedload
 from typing import Optional
 
-from app.core.database import get_db
+from app.core.database import get_db, get_db_reader, DBReader
 from app.models.style import Style, Category
-from app.schemas.style import StyleOut, StyleListResponse, CategoryOut
+from app.schemas.style import StyleListResponse, CategoryOut
+from app.api import serializers
+from app.core.responses import ORJSONResponse
+from app.core.s3 import get_proxy_url
 
 router = APIRouter(prefix="/styles", tags=["Styles"])
 categories_router = APIRouter(prefix="/categories", tags=["Categories"])
 
 
-# ─── Helper ───────────────────────────────────────────────────────────────────
-
-
-from app.core.s3 import get_proxy_url
-
-def _style_to_out(style: Style) -> StyleOut:
-    return StyleOut(
-        id=style.id,
-        name=style.name,
-        slug=style.slug or f"style-{style.id}",  # fallback if DB has NULL slug
-        description=style.description,
-        preview_url=get_proxy_url(style.preview_url),
-        category=CategoryOut(
-            id=style.category.id,
-            name=style.category.name,
-            slug=style.category.slug or f"category-{style.category.id}",
-            icon=style.category.icon,
-            description=style.category.description,
-            preview_url=get_proxy_url(style.category.preview_url),
-            display_order=style.category.display_order,
-        ),
-        uses_count=style.uses_count,
-        is_trending=style.is_trending,
-        is_new=style.is_new,
-        tags=style.tags or [],
-        credits_required=style.credits_required,
-    )
-
-
 # ─── Styles Endpoints (public, no auth required) ─────────────────────────────
 
-@router.get("", response_model=StyleListResponse)
-def list_styles(
-    category: Optional[str] = Query(None, description="Filter by category slug"),
-    category_id: Optional[int] = Query(None, description="Filter by category id"),
-    trending: Optional[bool] = Query(None, description="Only trending styles"),
-    search: Optional[str] = Query(None, description="Search by name"),
-    db: Session = Depends(get_db),
-):
-    """
-    Returns all active styles.
-    Used by the frontend to render the home screen style grid.
-    Each style includes its S3 thumbnail URL and the category it belongs to.
-    Filter by category using either category (slug) or category_id; category_id takes precedence if both are set.
-    """
+def _list_styles(
+    db: Session,
+    category: Optional[str],
+    category_id: Optional[int],
+    trending: Optional[bool],
+    search: Optional[str],
+) -> dict:
     query = (
         db.query(Style)
         .options(joinedload(Style.category))
@@ -83,11 +50,24 @@ def list_styles(
     query = query.order_by(Style.display_order.asc(), Style.id.desc())
 
     styles = query.all()
-    return StyleListResponse(
-        success=True,
-        data=[_style_to_out(s) for s in styles],
-        total=len(styles),
-    )
+    return {"success": True, "data": [serializers.style_dict(s) for s in styles], "total": len(styles)}
+
+
+@router.get("", response_model=StyleListResponse)
+async def list_styles(
+    category: Optional[str] = Query(None, description="Filter by category slug"),
+    category_id: Optional[int] = Query(None, description="Filter by category id"),
+    trending: Optional[bool] = Query(None, description="Only trending styles"),
+    search: Optional[str] = Query(None, description="Search by name"),
+    reader: DBReader = Depends(get_db_reader),
+):
+    """
+    Returns all active styles.
+    Used by the frontend to render the home screen style grid.
+    Each style includes its S3 thumbnail URL and the category it belongs to.
+    Filter by category using either category (slug) or category_id; category_id takes precedence if both are set.
+    """
+    return ORJSONResponse(await reader.run(_list_styles, category, category_id, trending, search))
 
 
 @router.get("/trending", response_model=StyleListResponse)
@@ -104,11 +84,7 @@ def trending_styles(db: Session = Depends(get_db)):
         .limit(10)
         .all()
     )
-    return StyleListResponse(
-        success=True,
-        data=[_style_to_out(s) for s in styles],
-        total=len(styles),
-    )
+    return ORJSONResponse({"success": True, "data": [serializers.style_dict(s) for s in styles], "total": len(styles)})
 
 
 # ─── Categories Endpoint (public, no auth required) ──────────────────────────
@@ -0,0 +1,108 @@
+"""
+Ad Reward Service — grants credits for rewarded ads.
+
+Each grant is one transaction of O(1) statements:
+  1. Insert the AdWatch row; a reward_id seen before means a replayed
+     callback / double-tap, and the original grant is reported instead.
+  2. Conditionally increment the user's counter for today
+     (UPDATE ... WHERE count < limit), which enforces the daily limit
+     without counting ad_watches rows.
+  3. Add the credits and write the ledger row (credits.grant_credits).
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core import credits as credit_service
+from app.core.config import settings
+from app.models.rewards import AdWatch, AdWatchCounter
+from app.models.user import User
+
+
+@dataclass
+class AdRewardResult:
+    credits_earned: int
+    new_balance: int
+    daily_ad_count: int
+    duplicate: bool = False  # reward_id was already granted; nothing changed
+
+
+class AdLimitReached(Exception):
+    def __init__(self, limit: int):
+        self.limit = limit
+        super().__init__(f"Daily ad watch limit ({limit}) reached. Come back tomorrow!")
+
+
+def get_daily_ad_count(db: Session, user_id: int, day) -> int:
+    count = db.execute(
+        select(AdWatchCounter.count).where(AdWatchCounter.user_id == user_id, AdWatchCounter.watch_date == day)
+    ).scalar()
+    return count or 0
+
+
+def record_ad_reward(
+    db: Session,
+    user_id: int,
+    ad_unit_id: Optional[str],
+    reward_id: Optional[str] = None,
+    ad_provider: str = "admob",
+) -> AdRewardResult:
+    """
+    Grant REWARDED_AD_CREDITS for one watched ad and COMMIT.
+
+    Raises AdLimitReached (nothing is written) once DAILY_AD_WATCH_LIMIT is hit.
+    Replaying a reward_id returns the current state with duplicate=True.
+    """
+    # The counter's conditional UPDATE only guards repeat watches: the day's
+    # first watch is an INSERT, which a limit of 0 must not reach either
+    if settings.DAILY_AD_WATCH_LIMIT <= 0:
+        raise AdLimitReached(settings.DAILY_AD_WATCH_LIMIT)
+
+    today = datetime.now(timezone.utc).date()
+    reward_amount = settings.REWARDED_AD_CREDITS
+
+    watch_id = db.execute(
+        insert(AdWatch)
+        .values(
+            user_id=user_id,
+            ad_provider=ad_provider,
+            ad_unit_id=ad_unit_id,
+            credits_earned=reward_amount,
+            reward_id=reward_id,
+            watched_date=today,
+        )
+        .on_conflict_do_nothing(index_elements=["reward_id"])
+        .returning(AdWatch.id)
+    ).scalar()
+    if watch_id is None:
+        db.rollback()
+        balance = db.execute(select(User.credits).where(User.id == user_id)).scalar() or 0
+        return AdRewardResult(
+            credits_earned=0, new_balance=balance, daily_ad_count=get_daily_ad_count(db, user_id, today), duplicate=True,
+        )
+
+    counter = insert(AdWatchCounter).values(user_id=user_id, watch_date=today, count=1)
+    daily_count = db.execute(
+        counter.on_conflict_do_update(
+            index_elements=["user_id", "watch_date"],
+            set_={"count": AdWatchCounter.count + 1},
+            where=AdWatchCounter.count < settings.DAILY_AD_WATCH_LIMIT,
+        ).returning(AdWatchCounter.count)
+    ).scalar()
+    if daily_count is None:
+        db.rollback()
+        raise AdLimitReached(settings.DAILY_AD_WATCH_LIMIT)
+
+    new_balance = credit_service.grant_credits(
+        db, user_id, reward_amount,
+        tx_type="ad_watch",
+        description=f"Watched ad: {ad_unit_id}",
+        reference_id=reward_id or ad_unit_id,
+    )
+    db.commit()
+    return AdRewardResult(credits_earned=reward_amount, new_balance=new_balance, daily_ad_count=daily_count)
@@ -0,0 +1,136 @@
+"""
+AdMob Server-Side Verification (SSV).
+
+AdMob calls our callback URL with the reward details in the query string,
+signed with one of Google's rotating ECDSA (P-256 / SHA-256) verifier keys:
+
+    ...&timestamp=...&transaction_id=...&user_id=...&signature=<b64url>&key_id=<id>
+
+The signed message is the query string up to (not including) "&signature=".
+
+The public keys are fetched from ADMOB_VERIFIER_KEYS_URL by a background task
+and kept in memory; a callback never downloads keys itself. A callback signed
+with an unknown key id is rejected and schedules an early refresh, so a key
+rotation is picked up within seconds without per-request fetches.
+"""
+
+import base64
+import json
+import logging
+import threading
+import time
+import urllib.request
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import parse_qsl
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from app.core import background
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Unknown key ids may trigger an early refresh at most this often
+MIN_FORCED_REFRESH_SECONDS = 60
+
+
+class SSVVerificationError(Exception):
+    pass
+
+
+@dataclass
+class SSVReward:
+    transaction_id: str
+    user_id: str
+    ad_unit: Optional[str]
+    reward_amount: int
+    reward_item: Optional[str]
+    custom_data: Optional[str]
+    timestamp_ms: int
+
+
+class VerifierKeyCache:
+    """In-memory map of AdMob key id → public key, refreshed in the background."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self._keys: dict[str, ec.EllipticCurvePublicKey] = {}
+        self._lock = threading.Lock()
+        self.fetched_at: Optional[float] = None
+        self._last_forced_refresh = 0.0
+
+    def refresh(self):
+        with urllib.request.urlopen(self.url, timeout=10) as resp:
+            payload = json.loads(resp.read())
+        keys = {}
+        for entry in payload.get("keys", []):
+            key = serialization.load_pem_public_key(entry["pem"].encode())
+            keys[str(entry["keyId"])] = key
+        if not keys:
+            raise RuntimeError(f"No verifier keys in {self.url}")
+        with self._lock:
+            self._keys = keys
+            self.fetched_at = time.monotonic()
+        logger.info("Loaded %d AdMob verifier keys", len(keys))
+
+    def get(self, key_id: str) -> Optional[ec.EllipticCurvePublicKey]:
+        with self._lock:
+            return self._keys.get(key_id)
+
+    def request_refresh(self):
+        """Ask the background task for an early refresh (rate-limited, non-blocking)."""
+        now = time.monotonic()
+        if now - self._last_forced_refresh >= MIN_FORCED_REFRESH_SECONDS:
+            self._last_forced_refresh = now
+            refresh_task.run_soon()
+
+
+key_cache = VerifierKeyCache(settings.ADMOB_VERIFIER_KEYS_URL)
+refresh_task = background.register(background.PeriodicTask(
+    "admob-verifier-keys", settings.ADMOB_VERIFIER_KEYS_REFRESH_SECONDS, key_cache.refresh,
+))
+
+
+def _b64url_decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+def verify_callback(query_string: str, cache: VerifierKeyCache = key_cache) -> SSVReward:
+    """
+    Verify a raw SSV callback query string and return the reward it describes.
+    CPU-bound (ECDSA verify): call it from a worker thread, not the event loop.
+
+    Raises SSVVerificationError if the callback is malformed or the signature is invalid.
+    """
+    marker = query_string.find("&signature=")
+    if marker == -1:
+        raise SSVVerificationError("Missing signature")
+    message = query_string[:marker].encode()
+    params = dict(parse_qsl(query_string, keep_blank_values=True))
+
+    key_id = params.get("key_id", "")
+    key = cache.get(key_id)
+    if key is None:
+        cache.request_refresh()
+        raise SSVVerificationError(f"Unknown key_id {key_id!r}")
+
+    try:
+        key.verify(_b64url_decode(params["signature"]), message, ec.ECDSA(hashes.SHA256()))
+    except (InvalidSignature, ValueError) as e:
+        raise SSVVerificationError("Invalid signature") from e
+
+    try:
+        return SSVReward(
+            transaction_id=params["transaction_id"],
+            user_id=params.get("user_id", ""),
+            ad_unit=params.get("ad_unit"),
+            reward_amount=int(params.get("reward_amount") or 0),
+            reward_item=params.get("reward_item"),
+            custom_data=params.get("custom_data"),
+            timestamp_ms=int(params.get("timestamp") or 0),
+        )
+    except (KeyError, ValueError) as e:
+        raise SSVVerificationError("Malformed callback parameters") from e
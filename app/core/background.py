@@ -0,0 +1,80 @@
+"""
+Background tasks — small periodic jobs that run inside each API worker.
+
+Each task is a daemon thread that calls `fn()` every `interval_seconds`.
+Tasks are registered at import time by the module that owns them and are
+started / stopped by the app lifespan in app/main.py, so scripts that only
+import app modules never spawn threads.
+
+Exceptions are logged and the task keeps running on its next tick.
+"""
+
+import logging
+import threading
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    def __init__(self, name: str, interval_seconds: float, fn: Callable[[], None], run_immediately: bool = True):
+        self.name = name
+        self.interval_seconds = interval_seconds
+        self.fn = fn
+        self.run_immediately = run_immediately
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopped = False
+        self._wake.clear()
+        self._thread = threading.Thread(target=self._loop, name=f"bg-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        self._stopped = True
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def run_soon(self):
+        """Run on the task thread now instead of waiting for the next tick."""
+        self._wake.set()
+
+    def run_once(self):
+        try:
+            self.fn()
+        except Exception:
+            logger.exception("Background task %s failed", self.name)
+
+    def _loop(self):
+        if self.run_immediately:
+            self.run_once()
+        while True:
+            self._wake.wait(self.interval_seconds)
+            self._wake.clear()
+            if self._stopped:
+                return
+            self.run_once()
+
+
+_tasks: list[PeriodicTask] = []
+
+
+def register(task: PeriodicTask) -> PeriodicTask:
+    _tasks.append(task)
+    return task
+
+
+def start_all():
+    for task in _tasks:
+        logger.info("Starting background task %s (every %ss)", task.name, task.interval_seconds)
+        task.start()
+
+
+def stop_all():
+    for task in _tasks:
+        task.stop()
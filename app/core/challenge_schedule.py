@@ -0,0 +1,223 @@
+"""
+Challenge Schedule — the current challenge, resolved from an in-memory schedule.
+
+GET /challenges/current and /challenges/collaborative/current are hit on
+every app open, but the active challenge changes at most daily. Each worker
+keeps a snapshot of the active challenges that have not ended yet (the
+current ones and the upcoming ones) and picks the current one from the
+clock, so those endpoints never touch the database.
+
+The snapshot is reloaded:
+
+- when `challenges` changes: a statement trigger (migration 0007) sends
+  NOTIFY on CHANNEL for every INSERT / UPDATE / DELETE, whoever the writer
+  is (push_mystery_challenge.py, push_collaborative_challenge.py, admin
+  endpoints, manual SQL), and the "challenge-schedule" task LISTENs for it;
+- at the next starts_at / ends_at boundary it contains;
+- at the latest CHALLENGE_SCHEDULE_MAX_AGE_SECONDS after it was loaded, in
+  case a notification was lost while the listener was reconnecting.
+
+Only those reloads run a query: on the task thread when it is running, on
+the request otherwise (e.g. before the first load).
+"""
+
+import logging
+import select
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+from app.core import background
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.models.style import Challenge
+from app.schemas.style import ChallengeOut
+
+logger = logging.getLogger(__name__)
+
+# NOTIFY channel of the trigger on `challenges` (migration 0007)
+CHANNEL = "challenge_schedule"
+# Longest a listener tick blocks waiting for notifications
+LISTEN_WAIT_SECONDS = 2.0
+# Pause before reconnecting a failed listener
+LISTEN_RETRY_SECONDS = 10.0
+
+
+@dataclass(frozen=True)
+class Schedule:
+    challenges: tuple    # ChallengeOut, in the order the current one is picked
+    valid_until: float   # time.time() of the next boundary (or max age)
+    loaded_at: float
+
+    def current(self, challenge_type: Optional[str] = None) -> Optional[ChallengeOut]:
+        now = datetime.now(timezone.utc)
+        for challenge in self.challenges:
+            if challenge_type and challenge.challenge_type != challenge_type:
+                continue
+            if challenge.starts_at <= now <= challenge.ends_at:
+                return challenge
+        return None
+
+
+def _challenge_out(challenge: Challenge) -> Optional[ChallengeOut]:
+    if challenge.starts_at is None:
+        return None
+    try:
+        return ChallengeOut.model_validate(challenge)
+    except ValidationError:
+        # One hand-edited row must not take the other challenges down with it
+        logger.exception("Skipping challenge %s: invalid row", challenge.id)
+        return None
+
+
+class ChallengeSchedule:
+    def __init__(self):
+        self._schedule: Optional[Schedule] = None
+        self._lock = threading.Lock()
+        self._listen_engine = None
+        self._listen_conn = None
+        self._retry_at = 0.0
+        self.loads = 0
+        self.notifications = 0
+
+    # ─── Snapshot ────────────────────────────────────────────────────────────
+
+    def snapshot(self) -> Optional[Schedule]:
+        """The loaded schedule, or None if it must be reloaded first."""
+        schedule = self._schedule
+        if schedule is None or time.time() >= schedule.valid_until:
+            return None
+        return schedule
+
+    def refresh(self, if_stale: bool = False) -> Schedule:
+        with self._lock:
+            if if_stale and self.snapshot() is not None:
+                return self._schedule  # reloaded by another thread meanwhile
+            now = datetime.now(timezone.utc)
+            db = SessionLocal()
+            try:
+                rows = (
+                    db.query(Challenge)
+                    .filter(Challenge.is_active == True, Challenge.ends_at >= now)  # noqa: E712
+                    # Prefer mystery, then latest (as the endpoints always have)
+                    .order_by(Challenge.challenge_type.desc(), Challenge.id.desc())
+                    .all()
+                )
+                challenges = tuple(filter(None, (_challenge_out(c) for c in rows)))
+            finally:
+                db.close()
+
+            loaded_at = time.time()
+            boundaries = [
+                moment.timestamp()
+                for c in challenges
+                for moment in (c.starts_at, c.ends_at)
+                if moment.timestamp() > loaded_at
+            ]
+            valid_until = min(boundaries + [loaded_at + settings.CHALLENGE_SCHEDULE_MAX_AGE_SECONDS])
+            schedule = Schedule(challenges=challenges, valid_until=valid_until, loaded_at=loaded_at)
+            self._schedule = schedule
+            self.loads += 1
+            return schedule
+
+    def current(self, challenge_type: Optional[str] = None) -> Optional[ChallengeOut]:
+        """The current challenge (of `challenge_type`, if given); reloads first if the snapshot is stale."""
+        schedule = self.snapshot() or self.refresh(if_stale=True)
+        return schedule.current(challenge_type)
+
+    def invalidate(self) -> None:
+        """Reload before the next read; for writes in this process that must show up at once."""
+        self._schedule = None
+        refresh_task.run_soon()
+
+    # ─── Listener ────────────────────────────────────────────────────────────
+
+    def _connect(self):
+        if self._listen_engine is None:
+            self._listen_engine = create_engine(engine.url, poolclass=NullPool)
+        raw = self._listen_engine.raw_connection()
+        conn = raw.driver_connection
+        conn.autocommit = True
+        cursor = conn.cursor()
+        cursor.execute(f"LISTEN {CHANNEL}")
+        cursor.close()
+        self._listen_conn = raw
+        logger.info("Listening for challenge schedule changes on %s", CHANNEL)
+        # Changes made while no one was listening were never delivered
+        self.refresh()
+
+    def _close(self) -> None:
+        if self._listen_conn is not None:
+            try:
+                self._listen_conn.close()
+            except Exception:
+                pass
+            self._listen_conn = None
+
+    def _wait_for_notifications(self, timeout: float) -> int:
+        conn = self._listen_conn.driver_connection
+        if callable(getattr(conn, "notifies", None)):  # psycopg 3
+            return sum(1 for _ in conn.notifies(timeout=timeout, stop_after=1))
+        # psycopg2
+        if select.select([conn], [], [], timeout)[0]:
+            conn.poll()
+        received = len(conn.notifies)
+        conn.notifies.clear()
+        return received
+
+    def tick(self) -> None:
+        """One task step: wait briefly for NOTIFY, reload on a change or a passed boundary."""
+        if time.time() < self._retry_at:
+            return
+        try:
+            if settings.CHALLENGE_SCHEDULE_LISTEN:
+                if self._listen_conn is None:
+                    self._connect()
+                received = self._wait_for_notifications(LISTEN_WAIT_SECONDS)
+                if received:
+                    self.notifications += received
+                    self.refresh()
+            if self.snapshot() is None:
+                self.refresh(if_stale=True)
+        except Exception as exc:
+            logger.warning("Challenge schedule refresh failed, retrying in %ss: %s", LISTEN_RETRY_SECONDS, exc)
+            self._close()
+            self._retry_at = time.time() + LISTEN_RETRY_SECONDS
+
+    def close(self) -> None:
+        self._close()
+
+    def stats(self) -> dict:
+        schedule = self._schedule
+        now = time.time()
+        return {
+            "listening": self._listen_conn is not None,
+            "loads": self.loads,
+            "notifications": self.notifications,
+            "challenges": len(schedule.challenges) if schedule else None,
+            "age_seconds": round(now - schedule.loaded_at, 3) if schedule else None,
+            "reload_in_seconds": round(schedule.valid_until - now, 3) if schedule else None,
+        }
+
+
+challenge_schedule = ChallengeSchedule()
+
+# Interval 1 s between ticks; each tick itself blocks up to LISTEN_WAIT_SECONDS
+refresh_task = background.register(background.PeriodicTask(
+    "challenge-schedule", 1, challenge_schedule.tick,
+))
+
+
+async def current_challenge(challenge_type: Optional[str] = None) -> Optional[ChallengeOut]:
+    """`ChallengeSchedule.current` for async endpoints: a reload, if due, runs in the threadpool."""
+    schedule = challenge_schedule.snapshot()
+    if schedule is None:
+        schedule = await run_in_threadpool(challenge_schedule.refresh, True)
+    return schedule.current(challenge_type)
@@ -0,0 +1,97 @@
+"""
+Response compression — Brotli when available, gzip otherwise.
+
+The feed and styles payloads are large, repetitive JSON (every creation
+embeds its full style and category), which compresses 5-10x. Responses
+smaller than COMPRESSION_MINIMUM_SIZE are sent as-is.
+
+Brotli needs the optional `brotli` package; without it (or for clients that
+don't send `Accept-Encoding: br`) Starlette's gzip responder is used.
+
+A strong ETag on a compressed body is downgraded to a weak one, since the
+bytes on the wire no longer match the identity representation the validator
+was computed from. If-None-Match comparison is weak, so 304s keep working.
+(HTTPCacheMiddleware's ETags are already weak, on 200s and 304s alike.)
+
+Starlette's responders append "Vary: Accept-Encoding" even when an inner
+middleware already set it; repeated Vary tokens are collapsed.
+"""
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware, IdentityResponder
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+
+def _dedupe_vary(value: str) -> str:
+    tokens: dict[str, str] = {}
+    for token in value.split(","):
+        token = token.strip()
+        if token:
+            tokens.setdefault(token.lower(), token)
+    return ", ".join(tokens.values())
+
+
+def _accepts(accept_encoding: str, coding: str) -> bool:
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() == coding:
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app, minimum_size: int, quality: int):
+        super().__init__(app, minimum_size)
+        self.quality = quality
+        self._compressor = None
+
+    async def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if self._compressor is None:
+            self._compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=self.quality)
+        if more_body:
+            return self._compressor.process(body) + self._compressor.flush()
+        return self._compressor.process(body) + self._compressor.finish()
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app,
+        minimum_size: int = settings.COMPRESSION_MINIMUM_SIZE,
+        gzip_level: int = settings.GZIP_COMPRESS_LEVEL,
+        brotli_quality: int = settings.BROTLI_QUALITY,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.brotli_quality = brotli_quality
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                etag = headers.get("etag")
+                if "content-encoding" in headers and etag and not etag.startswith("W/"):
+                    headers["etag"] = "W/" + etag
+                vary = headers.getlist("vary")
+                if vary:
+                    headers["vary"] = _dedupe_vary(", ".join(vary))
+            await send(message)
+
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        if brotli is not None and _accepts(accept_encoding, "br"):
+            await BrotliResponder(self.app, self.minimum_size, self.brotli_quality)(scope, receive, send_wrapper)
+        else:
+            await self.gzip(scope, receive, send_wrapper)
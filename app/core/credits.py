@@ -0,0 +1,214 @@
+"""
+Credit Service — reserves and refunds the credits spent on AI generation.
+
+Generation endpoints reserve credits *before* calling Gemini / S3 and commit
+straight away, so no database connection is held during the slow external
+calls. If the generation fails the reservation is refunded.
+
+Daily free credits are spent first, then the purchased balance. Every balance
+change is a single conditional UPDATE (safe under parallel requests) plus a
+CreditTransaction ledger row, committed together.
+
+Daily credits are never reset by a separate write: a `daily_credits_date`
+before today simply *means* a full DAILY_FREE_CREDITS grant. Reads compute
+that lazily (effective_daily_credits) and the reset is persisted only by the
+next deduction.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, time, timezone
+from typing import Optional
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.rewards import CreditTransaction
+from app.models.user import User
+
+users = User.__table__
+
+
+@dataclass
+class CreditReservation:
+    user_id: int
+    cost: int
+    from_daily: int
+    from_paid: int
+    credits_remaining: int        # purchased balance after the reservation
+    daily_credits_remaining: int  # today's free credits after the reservation
+    reference_id: Optional[str] = None
+
+
+class InsufficientCredits(Exception):
+    def __init__(self, required: int, available: int):
+        self.required = required
+        self.available = available
+        super().__init__(f"You need {required} credits. You have {available}.")
+
+
+def _start_of_today() -> datetime:
+    return datetime.combine(datetime.now(timezone.utc).date(), time.min, tzinfo=timezone.utc)
+
+
+def effective_daily_credits(user: User) -> int:
+    """Today's free credits for a loaded user, without writing anything."""
+    if user.daily_credits_date is not None and user.daily_credits_date >= _start_of_today():
+        return user.daily_credits or 0
+    return settings.DAILY_FREE_CREDITS
+
+
+def _effective_daily(table, today_start: datetime):
+    """SQL expression: today's free credits, treating a stale date as a fresh grant."""
+    return case(
+        (table.c.daily_credits_date >= today_start, func.coalesce(table.c.daily_credits, 0)),
+        else_=settings.DAILY_FREE_CREDITS,
+    )
+
+
+def reserve_credits(
+    db: Session,
+    user_id: int,
+    cost: int,
+    description: str,
+    reference_id: Optional[str] = None,
+    tx_type: str = "creation",
+) -> CreditReservation:
+    """
+    Deduct `cost` (daily first, then purchased) in one UPDATE that also applies
+    today's daily reset, write the ledger row, and COMMIT — releasing the
+    connection back to the pool.
+
+    Raises InsufficientCredits (nothing is written) when the balance is too low.
+    """
+    today_start = _start_of_today()
+
+    # Lock the row and read the balances the UPDATE is based on, so the
+    # daily/paid split can be returned (RETURNING only sees the new values).
+    before = (
+        select(
+            users.c.id,
+            _effective_daily(users, today_start).label("daily"),
+            func.coalesce(users.c.credits, 0).label("paid"),
+        )
+        .where(users.c.id == user_id)
+        .with_for_update()
+        .cte("before")
+    )
+    from_daily = func.least(before.c.daily, cost)
+    stmt = (
+        update(users)
+        .where(users.c.id == before.c.id, before.c.daily + before.c.paid >= cost)
+        .values(
+            daily_credits=before.c.daily - from_daily,
+            credits=before.c.paid - (cost - from_daily),
+            daily_credits_date=case(
+                (users.c.daily_credits_date >= today_start, users.c.daily_credits_date),
+                else_=func.now(),
+            ),
+        )
+        .returning(before.c.daily, users.c.credits, users.c.daily_credits)
+    )
+    row = db.execute(stmt).first()
+
+    if row is None:
+        db.rollback()
+        raise InsufficientCredits(required=cost, available=get_available_credits(db, user_id))
+
+    daily_before, credits_after, daily_after = row
+    reservation = CreditReservation(
+        user_id=user_id,
+        cost=cost,
+        from_daily=min(daily_before, cost),
+        from_paid=cost - min(daily_before, cost),
+        credits_remaining=credits_after,
+        daily_credits_remaining=daily_after,
+        reference_id=reference_id,
+    )
+    db.add(CreditTransaction(
+        user_id=user_id,
+        amount=-cost,
+        type=tx_type,
+        description=description[:200],
+        reference_id=reference_id,
+        balance_after=credits_after,
+    ))
+    db.commit()
+    return reservation
+
+
+def refund_credits(db: Session, reservation: Optional[CreditReservation]) -> None:
+    """Give back a reservation after a failed generation, and commit."""
+    if reservation is None or reservation.cost == 0:
+        return
+
+    # Daily credits only come back if they have not been reset since
+    today_start = _start_of_today()
+    stmt = (
+        update(users)
+        .where(users.c.id == reservation.user_id)
+        .values(
+            credits=func.coalesce(users.c.credits, 0) + reservation.from_paid,
+            daily_credits=case(
+                (users.c.daily_credits_date >= today_start,
+                 func.coalesce(users.c.daily_credits, 0) + reservation.from_daily),
+                else_=users.c.daily_credits,
+            ),
+        )
+        .returning(users.c.credits, users.c.daily_credits_date >= today_start)
+    )
+    row = db.execute(stmt).first()
+    if row is None:
+        db.rollback()
+        return
+
+    credits_after, daily_restored = row
+    db.add(CreditTransaction(
+        user_id=reservation.user_id,
+        amount=reservation.from_paid + (reservation.from_daily if daily_restored else 0),
+        type="refund",
+        description="Refund for failed generation",
+        reference_id=reservation.reference_id,
+        balance_after=credits_after,
+    ))
+    db.commit()
+
+
+def get_available_credits(db: Session, user_id: int) -> int:
+    """Purchased + effective daily credits, read without writing anything."""
+    row = db.execute(
+        select(_effective_daily(users, _start_of_today()) + func.coalesce(users.c.credits, 0))
+        .where(users.c.id == user_id)
+    ).first()
+    return row[0] if row else 0
+
+
+def grant_credits(
+    db: Session,
+    user_id: int,
+    amount: int,
+    tx_type: str,
+    description: str,
+    reference_id: Optional[str] = None,
+) -> int:
+    """
+    Atomically add `amount` purchased credits and write the ledger row.
+    Does NOT commit, so callers can make the grant part of a larger
+    transaction. Returns the new purchased balance.
+    """
+    credits_after = db.execute(
+        update(users)
+        .where(users.c.id == user_id)
+        .values(credits=func.coalesce(users.c.credits, 0) + amount)
+        .returning(users.c.credits)
+    ).scalar_one()
+    db.add(CreditTransaction(
+        user_id=user_id,
+        amount=amount,
+        type=tx_type,
+        description=description[:200],
+        reference_id=reference_id,
+        balance_after=credits_after,
+    ))
+    db.flush()
+    return credits_after
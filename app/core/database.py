@@ -1,20 +1,396 @@
-from sqlalchemy import create_engine
+import logging
+import threading
+import time
+
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, event, exc, text
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
+from app.core import background
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+
+# ─── Pool metrics ─────────────────────────────────────────────────────────────
+
+class PoolMetrics:
+    """
+    Process-wide counters for the connection pool.
+    Exposed via GET /api/health/db so pool exhaustion is visible, not a mystery.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.slow_holds = 0
+        self.hold_seconds_max = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.checkout_timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def record_hold(self, seconds: float, slow: bool):
+        with self._lock:
+            if slow:
+                self.slow_holds += 1
+            self.hold_seconds_max = max(self.hold_seconds_max, seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.checkout_timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 3),
+                "wait_seconds_avg": round(self.wait_seconds_total / self.checkouts, 4) if self.checkouts else 0.0,
+                "wait_seconds_max": round(self.wait_seconds_max, 3),
+                "slow_holds": self.slow_holds,
+                "hold_seconds_max": round(self.hold_seconds_max, 3),
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long callers wait for a free connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            logger.error(
+                "DB pool exhausted: waited %ss for a connection (%s)",
+                settings.DB_POOL_TIMEOUT, self.status(),
+            )
+            raise
+        pool_metrics.record_wait(time.perf_counter() - start)
+        return conn
+
+
+# ─── Engine ───────────────────────────────────────────────────────────────────
+
+# Pool sizes are per process: with N gunicorn workers the service can open
+# N × (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections to Postgres.
 engine = create_engine(
     settings.DATABASE_URL,
+    poolclass=InstrumentedQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
     pool_pre_ping=True,
-    pool_recycle=3600,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    connect_args={"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"},
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+class RoutingSession(Session):
+    """
+    Session that sends its queries to the read replica when the request was
+    routed there (`session.info["replica_bind"]`, set by get_db_reader) and to
+    the primary otherwise. Flushes always go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        replica = self.info.get("replica_bind")
+        if replica is not None and not self._flushing:
+            return replica
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
+
+# Optional asyncpg engine for read-heavy endpoints (DB_ASYNC_READS=true).
+# Writes always go through the sync engine above.
+async_engine = None
+AsyncSessionLocal = None
+if settings.DB_ASYNC_READS:
+    # Imported lazily: needs greenlet + asyncpg, which only matter when enabled
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(
+        settings.ASYNC_DATABASE_URL,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_pre_ping=True,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        connect_args={"server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}},
+    )
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, sync_session_class=RoutingSession, autoflush=False, expire_on_commit=False,
+    )
+
+# Optional read replica (READ_REPLICA_URL). Only the public read endpoints that
+# go through get_db_reader use it; everything else stays on the primary.
+replica_engine = None
+async_replica_engine = None
+if settings.READ_REPLICA_URL:
+    replica_engine = create_engine(
+        settings.READ_REPLICA_URL,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_pre_ping=True,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        connect_args={"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"},
+    )
+    if async_engine is not None:
+        async_replica_engine = create_async_engine(
+            settings.ASYNC_READ_REPLICA_URL,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_pre_ping=True,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            connect_args={"server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}},
+        )
 
 Base = declarative_base()
 
-def get_db():
+
+@event.listens_for(engine, "checkout")
+def _on_checkout(dbapi_conn, connection_record, connection_proxy):
+    connection_record.info["checked_out_at"] = time.monotonic()
+    connection_record.info.pop("request", None)
+
+
+@event.listens_for(engine, "checkin")
+def _on_checkin(dbapi_conn, connection_record):
+    started = connection_record.info.pop("checked_out_at", None)
+    if started is None:
+        return
+    held = time.monotonic() - started
+    slow = held > settings.DB_SLOW_CHECKOUT_WARN_SECONDS
+    pool_metrics.record_hold(held, slow)
+    if slow:
+        logger.warning(
+            "DB connection held for %.1fs (threshold %.1fs) by %s",
+            held,
+            settings.DB_SLOW_CHECKOUT_WARN_SECONDS,
+            connection_record.info.pop("request", "unknown caller"),
+        )
+
+
+@event.listens_for(SessionLocal, "after_begin")
+def _tag_connection_with_request(session, transaction, connection):
+    # Lets the slow-hold warning name the endpoint that held the connection.
+    label = session.info.get("request")
+    if label:
+        connection.info["request"] = label
+
+
+# ─── Read replica health / read-your-writes ──────────────────────────────────
+
+# 0 when the replica has replayed everything it received, otherwise seconds
+# since the last replayed transaction. NULL on a primary (not in recovery).
+_REPLICA_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+class ReplicaMonitor:
+    """
+    Tracks replica replay lag, refreshed by a background task every
+    READ_REPLICA_CHECK_INTERVAL_SECONDS. Reads only go to the replica while the
+    last check succeeded, is recent, and lag is within READ_REPLICA_MAX_LAG_SECONDS.
+    """
+
+    def __init__(self):
+        self.lag_seconds: float | None = None
+        self.checked_at: float | None = None
+        self.check_failed = False
+
+    def check(self):
+        try:
+            with replica_engine.connect() as conn:
+                lag = conn.execute(_REPLICA_LAG_SQL).scalar()
+            # NULL lag means the URL points at a primary: nothing to wait for
+            self.lag_seconds = float(lag) if lag is not None else 0.0
+            self.check_failed = False
+        except Exception as e:
+            self.lag_seconds = None
+            # Logged only: the message can name the replica host
+            self.check_failed = True
+            logger.warning("Read replica check failed, reads use the primary: %s", e)
+        self.checked_at = time.monotonic()
+
+    def is_healthy(self) -> bool:
+        if self.checked_at is None or self.lag_seconds is None:
+            return False
+        # A stalled monitor must not keep routing reads to a replica nobody is watching
+        if time.monotonic() - self.checked_at > 3 * settings.READ_REPLICA_CHECK_INTERVAL_SECONDS:
+            return False
+        return self.lag_seconds <= settings.READ_REPLICA_MAX_LAG_SECONDS
+
+    def snapshot(self) -> dict:
+        return {
+            "healthy": self.is_healthy(),
+            "lag_seconds": round(self.lag_seconds, 3) if self.lag_seconds is not None else None,
+            "max_lag_seconds": settings.READ_REPLICA_MAX_LAG_SECONDS,
+            "check_failed": self.check_failed,
+        }
+
+
+replica_monitor = ReplicaMonitor()
+if replica_engine is not None:
+    background.register(background.PeriodicTask(
+        "replica-lag", settings.READ_REPLICA_CHECK_INTERVAL_SECONDS, replica_monitor.check,
+    ))
+
+
+class RecentWriters:
+    """
+    Users (JWT subject) who issued a write in the last READ_YOUR_WRITES_SECONDS.
+    Their reads stay on the primary so they always see their own changes.
+    Per worker process; the replica lag limit bounds staleness across workers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._until: dict[str, float] = {}
+
+    def mark(self, subject: str):
+        now = time.monotonic()
+        with self._lock:
+            self._until[subject] = now + settings.READ_YOUR_WRITES_SECONDS
+            if len(self._until) > 10000:
+                self._until = {k: v for k, v in self._until.items() if v > now}
+
+    def is_recent(self, subject: str) -> bool:
+        with self._lock:
+            until = self._until.get(subject)
+        return until is not None and until > time.monotonic()
+
+
+recent_writers = RecentWriters()
+
+
+def _request_subject(request: Request):
+    """JWT subject of the caller, or None for anonymous / invalid tokens."""
+    auth = request.headers.get("authorization", "")
+    if not auth.lower().startswith("bearer "):
+        return None
+    # Imported here: app.core.security is not needed by scripts that only use the engine
+    from app.core import security
+
+    payload = security.verify_token(auth[7:].strip())
+    return payload.get("sub") if payload else None
+
+
+def _use_replica(request: Request) -> bool:
+    if replica_engine is None or not replica_monitor.is_healthy():
+        return False
+    subject = _request_subject(request)
+    return subject is None or not recent_writers.is_recent(subject)
+
+
+def get_pool_stats() -> dict:
+    """Current pool occupancy plus cumulative checkout / wait / hold counters."""
+    pool = engine.pool
+    stats = {
+        "pool_size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        # QueuePool counts overflow from -pool_size; clamp to "extra connections open"
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        **pool_metrics.snapshot(),
+    }
+    if async_engine is not None:
+        async_pool = async_engine.pool
+        stats["async_pool"] = {
+            "pool_size": async_pool.size(),
+            "checked_out": async_pool.checkedout(),
+            "overflow": max(async_pool.overflow(), 0),
+        }
+    if replica_engine is not None:
+        stats["replica"] = {
+            "pool_size": replica_engine.pool.size(),
+            "checked_out": replica_engine.pool.checkedout(),
+            **replica_monitor.snapshot(),
+        }
+    return stats
+
+
+def get_db(request: Request):
+    # Writes from an authenticated user pin their reads to the primary for a
+    # short while (marked again on the way out so the window starts after commit)
+    writer = None
+    if replica_engine is not None and request.method not in ("GET", "HEAD", "OPTIONS"):
+        writer = _request_subject(request)
+        if writer:
+            recent_writers.mark(writer)
+
     db = SessionLocal()
+    db.info["request"] = f"{request.method} {request.url.path}"
     try:
         yield db
     finally:
         db.close()
+        if writer:
+            recent_writers.mark(writer)
+
+
+async def get_async_db():
+    """AsyncSession on the asyncpg engine. Only available when DB_ASYNC_READS is on."""
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async database access is disabled (set DB_ASYNC_READS=true).")
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+class DBReader:
+    """
+    Runs a plain sync ORM read function — `fn(db: Session, *args)` — on whichever
+    engine serves reads, so each read endpoint's query code is written only once:
+
+    - DB_ASYNC_READS on:  AsyncSession.run_sync → runs on the event loop over
+      asyncpg, no threadpool slot is occupied while waiting on Postgres.
+    - DB_ASYNC_READS off: a regular Session in the threadpool (previous behaviour).
+
+    With READ_REPLICA_URL set, the session reads from the replica unless it is
+    lagging or the caller wrote something in the last READ_YOUR_WRITES_SECONDS.
+    """
+
+    def __init__(self, session, is_async: bool = False):
+        self.session = session
+        self.is_async = is_async
+
+    async def run(self, fn, *args, **kwargs):
+        if self.is_async:
+            return await self.session.run_sync(fn, *args, **kwargs)
+        return await run_in_threadpool(fn, self.session, *args, **kwargs)
+
+
+async def get_db_reader(request: Request):
+    use_replica = _use_replica(request)
+
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as session:
+            if use_replica and async_replica_engine is not None:
+                session.info["replica_bind"] = async_replica_engine.sync_engine
+            yield DBReader(session, is_async=True)
+        return
+
+    db = SessionLocal()
+    db.info["request"] = f"{request.method} {request.url.path}"
+    if use_replica:
+        db.info["replica_bind"] = replica_engine
+    try:
+        yield DBReader(db)
+    finally:
+        await run_in_threadpool(db.close)
@@ -0,0 +1,188 @@
+"""
+Feed Cache — the head of the global community feed as in-memory ID lists.
+
+For each sort (new / hot / top) every worker keeps the first FEED_CACHE_DEPTH
+creation ids of the global feed (no user_id filter), with their sort keys
+and the feed's total. A page inside that window (by skip or by cursor) is
+a slice of the list plus a hydrate through app/core/object_cache; the
+ordering query and COUNT are skipped. Deeper pages and per-user feeds go to
+the DB.
+
+Snapshots are rebuilt every FEED_CACHE_REFRESH_SECONDS, and immediately on
+the worker that commits a new public creation (`invalidate`). Other workers
+pick it up on their next refresh. Hydration re-applies the feed filter, so
+a creation hidden since the last rebuild drops out of the page (once the
+hydrated row is current, see CREATION_CACHE_SECONDS). Only the order (and
+`total`) can be up to one refresh interval old.
+
+`stats()` reports hits, misses by reason, hit rate and snapshot / served
+ages; GET /api/health/caches exposes it per worker.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.core import background, feed_ranking
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.style import Creation
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class FeedSnapshot:
+    ids: list[int]
+    keys: list           # sort key of each id, for cursors
+    total: int
+    complete: bool       # the whole feed fits, so a short slice is the real end
+    built_at: float      # time.time()
+
+
+@dataclass(frozen=True)
+class FeedWindow:
+    ids: list[int]
+    next_key: Optional[tuple]  # (sort key, id) of the last item on a full page
+    total: int
+
+
+class FeedCache:
+    def __init__(self, depth: int):
+        self.depth = depth
+        self._snapshots: dict[str, FeedSnapshot] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses: dict[str, int] = {"cold": 0, "beyond_depth": 0, "invalid_cursor": 0}
+        self._served_age_total = 0.0
+        self._served_age_max = 0.0
+        self.refreshes = 0
+        self.last_refresh_seconds = 0.0
+
+    def window(self, sort: str, skip: int, limit: int, after: Optional[tuple] = None) -> Optional[FeedWindow]:
+        """The page's ids from the snapshot, or None (counted as a miss) if it can't be served."""
+        snapshot = self._snapshots.get(sort)
+        if snapshot is None:
+            self._miss("cold")
+            return None
+
+        if after is not None and not self._valid_after(sort, after):
+            logger.warning("Feed cache: cursor %r can't be compared with the %s keys", after, sort)
+            self._miss("invalid_cursor")
+            return None
+
+        start = skip if after is None else self._position_after(snapshot, after)
+        end = start + limit
+        if end > len(snapshot.ids) and not snapshot.complete:
+            self._miss("beyond_depth")
+            return None
+
+        ids = snapshot.ids[start:end]
+        next_key = (snapshot.keys[end - 1], ids[-1]) if ids and len(ids) == limit else None
+        age = time.time() - snapshot.built_at
+        with self._lock:
+            self.hits += 1
+            self._served_age_total += age
+            self._served_age_max = max(self._served_age_max, age)
+        return FeedWindow(ids=ids, next_key=next_key, total=snapshot.total)
+
+    @staticmethod
+    def _valid_after(sort: str, after: tuple) -> bool:
+        """Whether `after` is a (sort key, id) pair the snapshot's keys compare with."""
+        if not isinstance(after, tuple) or len(after) != 2 or not isinstance(after[1], int):
+            return False
+        key = after[0]
+        if sort == "new":
+            # created_at is timestamptz: a naive datetime raises TypeError on comparison
+            return isinstance(key, datetime) and key.tzinfo is not None
+        return isinstance(key, (int, float)) and not isinstance(key, bool)
+
+    @staticmethod
+    def _position_after(snapshot: FeedSnapshot, after: tuple) -> int:
+        """Index of the first entry strictly after `after` in (key DESC, id DESC) order."""
+        lo, hi = 0, len(snapshot.ids)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if (snapshot.keys[mid], snapshot.ids[mid]) < after:
+                hi = mid
+            else:
+                lo = mid + 1
+        return lo
+
+    def _miss(self, reason: str) -> None:
+        with self._lock:
+            self.misses[reason] += 1
+
+    def _build(self, db: Session, sort: str) -> FeedSnapshot:
+        query = db.query(Creation.id).filter(*feed_ranking.FEED_FILTER)
+        total = query.count()
+        rows = feed_ranking.sorted_feed(query, sort).limit(self.depth).all()
+        return FeedSnapshot(
+            ids=[row[0] for row in rows],
+            keys=[row[1] for row in rows],
+            total=total,
+            complete=len(rows) < self.depth,
+            built_at=time.time(),
+        )
+
+    def refresh(self) -> None:
+        if not settings.FEED_CACHE_ENABLED:
+            return
+        started = time.monotonic()
+        db = SessionLocal()
+        try:
+            snapshots = {sort: self._build(db, sort) for sort in feed_ranking.SORT_KEYS}
+        finally:
+            db.close()
+        self._snapshots = snapshots
+        with self._lock:
+            self.refreshes += 1
+            self.last_refresh_seconds = time.monotonic() - started
+
+    def clear(self) -> None:
+        self._snapshots = {}
+
+    def stats(self) -> dict:
+        now = time.time()
+        with self._lock:
+            misses = sum(self.misses.values())
+            requests = self.hits + misses
+            return {
+                "enabled": settings.FEED_CACHE_ENABLED,
+                "depth": self.depth,
+                "hits": self.hits,
+                "misses": dict(self.misses),
+                "hit_rate": round(self.hits / requests, 4) if requests else None,
+                "served_age_seconds_avg": round(self._served_age_total / self.hits, 3) if self.hits else None,
+                "served_age_seconds_max": round(self._served_age_max, 3),
+                "refreshes": self.refreshes,
+                "last_refresh_seconds": round(self.last_refresh_seconds, 4),
+                "snapshots": {
+                    sort: {"ids": len(s.ids), "total": s.total, "age_seconds": round(now - s.built_at, 3)}
+                    for sort, s in self._snapshots.items()
+                },
+            }
+
+
+feed_cache = FeedCache(settings.FEED_CACHE_DEPTH)
+
+refresh_task = background.register(background.PeriodicTask(
+    "feed-cache-refresh", settings.FEED_CACHE_REFRESH_SECONDS, feed_cache.refresh,
+))
+
+
+def window(sort: str, skip: int, limit: int, after: Optional[tuple] = None) -> Optional[FeedWindow]:
+    if not settings.FEED_CACHE_ENABLED:
+        return None
+    return feed_cache.window(sort, skip, limit, after)
+
+
+def invalidate() -> None:
+    """Rebuild this worker's snapshots now; call after committing a new public creation."""
+    if settings.FEED_CACHE_ENABLED:
+        refresh_task.run_soon()
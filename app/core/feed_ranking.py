@@ -0,0 +1,202 @@
+"""
+Feed Ranking — materialised sort keys for the community feed's hot / top sorts.
+
+`creation_rankings` holds one row per feed creation (public, not deleted, not
+a challenge entry) with its likes, views and hot score, indexed so that
+
+    ?sort=hot   → ORDER BY hot_score DESC, creation_id DESC
+    ?sort=top   → ORDER BY likes_count DESC, creation_id DESC
+
+are index range scans with keyset pagination, as cheap as ?sort=new.
+
+The hot score is time-decayed without ever being re-decayed:
+
+    hot_score = log10(max(likes + VIEW_WEIGHT * views, 1))
+                + (created_at - HOT_EPOCH) / FEED_HOT_DECAY_SECONDS
+
+A creation needs 10x the engagement to outrank one posted one decay period
+later. The score depends only on the row, not on the current time, so it
+changes only when the creation gets likes or views, and rows never go stale
+just because time passes.
+
+The write paths keep the table current in the same transaction as the change:
+
+    creation saved      → creation_added
+    like / unlike       → likes_changed
+    visibility toggled  → visibility_changed
+    creation deleted    → creation_removed
+
+A periodic refresh reconciles the table with `creations` (rows missed by
+those hooks, view counts, a changed FEED_HOT_DECAY_SECONDS).
+"""
+
+import logging
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, func, literal, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core import background
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.style import Creation, CreationRanking
+
+logger = logging.getLogger(__name__)
+
+# Scores are relative to this instant so they stay small; only differences matter
+HOT_EPOCH = datetime(2026, 1, 1, tzinfo=timezone.utc)
+# A view is worth this many likes
+VIEW_WEIGHT = 0.1
+# pg_try_advisory_xact_lock key for the refresh job (arbitrary, unique to this job)
+REFRESH_LOCK_KEY = 0x5A7E_0003
+
+# Rows of `creations` that appear in the community feed
+FEED_FILTER = (
+    Creation.is_public == True,  # noqa: E712
+    Creation.is_deleted == False,  # noqa: E712
+    Creation.challenge_id == None,  # noqa: E711
+)
+
+
+# ?sort= → (sort key, tie-breaker); hot / top are served from creation_rankings
+SORT_KEYS = {
+    "new": (Creation.created_at, Creation.id),
+    "hot": (CreationRanking.hot_score, CreationRanking.creation_id),
+    "top": (CreationRanking.likes_count, CreationRanking.creation_id),
+}
+
+
+def sorted_feed(query, sort: str):
+    """Order a feed query for `sort` (key DESC, id DESC), adding the sort key as the last column."""
+    sort_key, tie_breaker = SORT_KEYS[sort]
+    if sort != "new":
+        query = query.join(CreationRanking, CreationRanking.creation_id == Creation.id)
+    return query.add_columns(sort_key).order_by(sort_key.desc(), tie_breaker.desc())
+
+
+def hot_score(likes, views, created_at):
+    """SQL expression for the hot score of the given column expressions."""
+    engagement = func.greatest(likes + views * literal(VIEW_WEIGHT), literal(1.0))
+    age = func.extract("epoch", created_at) - HOT_EPOCH.timestamp()
+    return func.log(engagement) + age / literal(settings.FEED_HOT_DECAY_SECONDS)
+
+
+def in_feed(creation) -> bool:
+    """FEED_FILTER for a loaded row (ORM instance or object_cache snapshot)."""
+    return bool(creation.is_public) and not creation.is_deleted and creation.challenge_id is None
+
+
+def _insert(db: Session, creation_id: int) -> None:
+    """Rank a creation from its (flushed) row. Does NOT commit."""
+    likes = func.coalesce(Creation.likes_count, 0)
+    views = func.coalesce(Creation.views_count, 0)
+    source = select(
+        Creation.id, likes, views, Creation.created_at, hot_score(likes, views, Creation.created_at)
+    ).where(Creation.id == creation_id, Creation.created_at.is_not(None))
+    db.execute(
+        pg_insert(CreationRanking)
+        .from_select(["creation_id", "likes_count", "views_count", "created_at", "hot_score"], source)
+        .on_conflict_do_nothing(index_elements=[CreationRanking.creation_id])
+    )
+
+
+def _remove(db: Session, creation_id: int) -> None:
+    db.execute(delete(CreationRanking).where(CreationRanking.creation_id == creation_id))
+
+
+def creation_added(db: Session, creation: Creation) -> None:
+    """Call after flush, so the row (and its created_at) exists."""
+    if in_feed(creation):
+        _insert(db, creation.id)
+
+
+def creation_removed(db: Session, creation: Creation) -> None:
+    _remove(db, creation.id)
+
+
+def visibility_changed(db: Session, creation: Creation, was_public: bool) -> None:
+    if bool(creation.is_public) == bool(was_public):
+        return
+    if in_feed(creation):
+        _insert(db, creation.id)
+    else:
+        _remove(db, creation.id)
+
+
+def likes_changed(db: Session, creation: Creation, delta: int) -> None:
+    """Atomically apply a like delta to the creation's ranking. Does NOT commit."""
+    likes = func.greatest(CreationRanking.likes_count + delta, 0)
+    db.execute(
+        update(CreationRanking)
+        .where(CreationRanking.creation_id == creation.id)
+        .values(
+            likes_count=likes,
+            hot_score=hot_score(likes, CreationRanking.views_count, CreationRanking.created_at),
+            updated_at=func.now(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+# ---------------------------------------------------------------------------
+# Refresh
+# ---------------------------------------------------------------------------
+
+def refresh_rankings() -> dict:
+    """Reconcile `creation_rankings` with `creations`; returns the rows touched."""
+    counts = {"inserted": 0, "updated": 0, "removed": 0}
+    db = SessionLocal()
+    try:
+        if not db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": REFRESH_LOCK_KEY}).scalar():
+            return counts  # another worker is refreshing
+
+        in_feed = select(Creation.id).where(*FEED_FILTER)
+        counts["removed"] = db.execute(
+            delete(CreationRanking)
+            .where(CreationRanking.creation_id.not_in(in_feed))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+        likes = func.coalesce(Creation.likes_count, 0)
+        views = func.coalesce(Creation.views_count, 0)
+        score = hot_score(likes, views, Creation.created_at)
+        counts["updated"] = db.execute(
+            update(CreationRanking)
+            .where(
+                CreationRanking.creation_id == Creation.id,
+                (CreationRanking.likes_count != likes)
+                | (CreationRanking.views_count != views)
+                | (func.abs(CreationRanking.hot_score - score) > 1e-9),
+            )
+            .values(likes_count=likes, views_count=views, hot_score=score, updated_at=func.now())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+        missing = select(Creation.id, likes, views, Creation.created_at, score).where(
+            *FEED_FILTER,
+            Creation.created_at.is_not(None),
+            ~select(CreationRanking.creation_id).where(CreationRanking.creation_id == Creation.id).exists(),
+        )
+        counts["inserted"] = len(db.execute(
+            pg_insert(CreationRanking)
+            .from_select(["creation_id", "likes_count", "views_count", "created_at", "hot_score"], missing)
+            .on_conflict_do_nothing(index_elements=[CreationRanking.creation_id])
+            .returning(CreationRanking.creation_id)
+        ).all())
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    if counts["inserted"] or counts["removed"]:
+        logger.warning("Repaired creation_rankings drift: %s", counts)
+    return counts
+
+
+refresh_task = background.register(background.PeriodicTask(
+    "feed-ranking-refresh", settings.FEED_RANKING_REFRESH_INTERVAL_SECONDS, refresh_rankings,
+    run_immediately=False,
+))
@@ -1,10 +1,24 @@
 import base64
+import hashlib
 import json
+import logging
 import os
+import threading
+import time
+import urllib.request
 import firebase_admin
 from firebase_admin import credentials, auth as firebase_auth
+from google.auth import jwt as google_jwt
+from app.core import background
+from app.core.cache import TTLCache
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+# Google's public certificates for Firebase ID tokens ({kid: PEM})
+ID_TOKEN_CERT_URL = "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+ID_TOKEN_ISSUER_PREFIX = "https://securetoken.google.com/"
+
 
 def _get_firebase_credentials():
     """
@@ -60,6 +74,65 @@ def _initialize_firebase_app():
     return firebase_admin.initialize_app(cred, options or None)
 
 
+def warm_up():
+    """
+    Initialise the Firebase app at startup so the first Google login does not
+    pay for credential decoding. Missing credentials are logged, not fatal.
+    """
+    try:
+        _initialize_firebase_app()
+    except Exception as e:  # noqa: BLE001 - the API must still start without Firebase
+        logger.warning("Firebase not initialised at startup: %s", e)
+
+
+class _SigningCerts:
+    """Google's ID token signing certs, downloaded by a background task."""
+
+    def __init__(self):
+        self._certs: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        with urllib.request.urlopen(ID_TOKEN_CERT_URL, timeout=10) as resp:
+            certs = json.loads(resp.read())
+        with self._lock:
+            self._certs = certs
+
+    def get(self) -> dict:
+        with self._lock:
+            return self._certs
+
+
+_signing_certs = _SigningCerts()
+_certs_task = background.register(background.PeriodicTask(
+    "firebase-certs", settings.FIREBASE_CERTS_REFRESH_SECONDS, _signing_certs.refresh,
+))
+_verified_tokens = TTLCache(settings.FIREBASE_TOKEN_CACHE_SECONDS, max_entries=20000)
+
+
+def _verify_with_cached_certs(id_token: str, project_id: str):
+    """
+    Same checks as firebase_auth.verify_id_token (signature, exp/iat, aud, iss,
+    sub), using the prefetched certs. Returns None when the signing key is not
+    cached yet, so the caller can fall back to the SDK.
+    """
+    certs = _signing_certs.get()
+    header = google_jwt.decode_header(id_token)
+    if header.get("alg") != "RS256" or header.get("kid") not in certs:
+        if certs and header.get("alg") == "RS256":
+            _certs_task.run_soon()  # key rotation: pick up the new cert
+        return None
+
+    decoded = google_jwt.decode(id_token, certs=certs, audience=project_id)
+    if decoded.get("iss") != ID_TOKEN_ISSUER_PREFIX + project_id:
+        raise ValueError("Firebase ID token has incorrect issuer")
+    sub = decoded.get("sub")
+    if not isinstance(sub, str) or not sub or len(sub) > 128:
+        raise ValueError("Firebase ID token has invalid subject")
+    decoded["uid"] = sub
+    return decoded
+
+
 def get_firebase_status() -> dict:
     """
     Return status for debugging: which credential source is set and if config is valid.
@@ -98,14 +171,29 @@ def verify_firebase_id_token(id_token: str) -> dict:
     Verify a Firebase ID token and return the decoded payload.
 
     Raises ValueError if the token is invalid or verification fails.
+
+    Verified tokens are cached by SHA-256 for FIREBASE_TOKEN_CACHE_SECONDS (never
+    past the token's own expiry), so repeated logins with the same token skip
+    the RSA verification.
     """
+    cache_key = hashlib.sha256(id_token.encode("utf-8")).hexdigest()
+    cached = _verified_tokens.get(cache_key)
+    if cached is not None:
+        return dict(cached)
+
     try:
-        _initialize_firebase_app()
-        decoded_token = firebase_auth.verify_id_token(id_token)
-        return decoded_token
+        app = _initialize_firebase_app()
+        decoded_token = None
+        if app.project_id:
+            decoded_token = _verify_with_cached_certs(id_token, app.project_id)
+        if decoded_token is None:
+            decoded_token = firebase_auth.verify_id_token(id_token)
     except Exception as exc:  # noqa: BLE001 - bubble up as ValueError for the API layer
         raise ValueError("Invalid Firebase ID token") from exc
 
+    _verified_tokens.set(cache_key, dict(decoded_token), ttl=decoded_token.get("exp", 0) - time.time())
+    return decoded_token
+
 
 def verify_firebase_android_token(id_token: str) -> dict:
     """
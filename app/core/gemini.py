@@ -9,6 +9,7 @@ Model: gemini-2.0-flash-preview-image-generation
 
 import base64
 import time
+from typing import Optional
 from google import genai
 from google.genai import types
 from app.core.config import settings
@@ -137,10 +138,12 @@ def build_final_prompt(
 def calculate_similarity(
     generated_image_bytes: bytes,
     target_image_url: str,
+    target_image_bytes: Optional[bytes] = None,
 ) -> float:
     """
     Use Gemini to compare the generated result with a target reference image.
-    Returns a score between 0.0 and 100.0.
+    Returns a score between 0.0 and 100.0. Pass `target_image_bytes` when the
+    target is already downloaded; otherwise it is fetched from the URL.
     """
     client = _get_client()
     
@@ -168,9 +171,11 @@ def calculate_similarity(
         
         # For this version, we'll assume the prompt works by describing the target if we don't have its bytes yet
         # or we could fetch the bytes. Let's fetch the bytes since we have target_image_url.
-        import requests
-        target_response = requests.get(target_image_url, timeout=10)
-        target_bytes = target_response.content if target_response.status_code == 200 else None
+        target_bytes = target_image_bytes
+        if target_bytes is None:
+            import requests
+            target_response = requests.get(target_image_url, timeout=10)
+            target_bytes = target_response.content if target_response.status_code == 200 else None
 
         if not target_bytes:
             return 0.0
@@ -0,0 +1,149 @@
+"""
+HTTP caching headers for public GET endpoints.
+
+HTTPCacheMiddleware looks up the matched route's CachePolicy and, for 200
+responses to GET / HEAD, adds:
+
+- Cache-Control: public, max-age=..., s-maxage=..., stale-while-revalidate=...
+- ETag: weak validator, W/ + a hash of the serialized body. Weak because
+  CompressionMiddleware may send the body gzip / Brotli encoded; this way the
+  200 (in any encoding) and the 304 carry the same validator;
+- Vary: Accept-Encoding (plus Authorization for policies with vary_auth).
+
+A request whose If-None-Match matches the ETag gets a bodyless 304. The body
+is still produced (the validator is computed from it), but the client and
+any CDN in front skip the download, and with max-age most requests never
+reach us at all.
+
+Policies are keyed by path template (e.g. "/api/challenges/{challenge_id}/leaderboard");
+each "{param}" matches one path segment.
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+from app.core.config import settings
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    max_age: int
+    s_maxage: Optional[int] = None
+    stale_while_revalidate: int = 0
+    # The response depends on the caller (e.g. read-your-writes after a profile
+    # edit): requests with Authorization are only cached privately
+    vary_auth: bool = False
+
+    def cache_control(self, authorized: bool) -> str:
+        if self.vary_auth and authorized:
+            return f"private, max-age={self.max_age}"
+        parts = ["public", f"max-age={self.max_age}"]
+        if self.s_maxage is not None:
+            parts.append(f"s-maxage={self.s_maxage}")
+        if self.stale_while_revalidate:
+            parts.append(f"stale-while-revalidate={self.stale_while_revalidate}")
+        return ", ".join(parts)
+
+
+# Route path template → policy. Styles and categories change with admin
+# pushes only; challenge data and profiles move with user activity.
+PUBLIC_CACHE_POLICIES = {
+    "/api/styles": CachePolicy(max_age=300, s_maxage=600, stale_while_revalidate=60),
+    "/api/styles/trending": CachePolicy(max_age=300, s_maxage=600, stale_while_revalidate=60),
+    "/api/categories": CachePolicy(max_age=3600, s_maxage=3600, stale_while_revalidate=300),
+    "/api/challenges/current": CachePolicy(max_age=60, s_maxage=60, stale_while_revalidate=30),
+    "/api/challenges/collaborative/story/{group_id}": CachePolicy(max_age=30, s_maxage=30, stale_while_revalidate=30),
+    "/api/challenges/{challenge_id}/leaderboard": CachePolicy(max_age=30, s_maxage=30, stale_while_revalidate=30),
+    "/api/auth/profile/{user_id}": CachePolicy(max_age=60, s_maxage=60, stale_while_revalidate=60, vary_auth=True),
+}
+
+
+def compute_etag(body: bytes) -> str:
+    return 'W/"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match uses weak comparison: W/"x" matches "x"."""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == opaque for tag in candidates)
+
+
+def _compile_template(template: str) -> re.Pattern:
+    pattern = re.sub(r"\\{[^/]+?\\}", "[^/]+", re.escape(template))
+    return re.compile(f"^{pattern}/?$")
+
+
+class HTTPCacheMiddleware:
+    def __init__(self, app, policies: dict[str, CachePolicy] = PUBLIC_CACHE_POLICIES):
+        self.app = app
+        self.policies = [(_compile_template(t), policy) for t, policy in policies.items()]
+
+    def policy_for(self, path: str) -> Optional[CachePolicy]:
+        return next((policy for pattern, policy in self.policies if pattern.match(path)), None)
+
+    async def __call__(self, scope, receive, send):
+        policy = None
+        if scope["type"] == "http" and scope["method"] in ("GET", "HEAD") and settings.HTTP_CACHE_ENABLED:
+            policy = self.policy_for(scope["path"])
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = dict(scope["headers"])
+        start_message = None
+        body_parts: list[bytes] = []
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                if message["status"] != 200:
+                    passthrough = True
+                    await send(message)
+                else:
+                    start_message = message  # held until the body is complete
+                return
+
+            if passthrough:
+                await send(message)
+                return
+
+            body_parts.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            await self._send_cached(send, start_message, b"".join(body_parts), policy, request_headers)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _send_cached(self, send, start_message, body: bytes, policy: CachePolicy, request_headers: dict):
+        headers = [
+            (k, v) for k, v in start_message["headers"]
+            if k not in (b"cache-control", b"etag", b"vary")
+        ]
+        existing_vary = [
+            v.decode("latin-1") for k, v in start_message["headers"] if k == b"vary"
+        ]
+        vary = ["Accept-Encoding"] + (["Authorization"] if policy.vary_auth else [])
+        vary += [v for v in existing_vary if v not in vary]
+
+        etag = compute_etag(body)
+        headers += [
+            (b"cache-control", policy.cache_control(b"authorization" in request_headers).encode()),
+            (b"etag", etag.encode()),
+            (b"vary", ", ".join(vary).encode()),
+        ]
+
+        if_none_match = request_headers.get(b"if-none-match")
+        if if_none_match is not None and etag_matches(if_none_match.decode("latin-1"), etag):
+            headers = [(k, v) for k, v in headers if k not in (b"content-length", b"content-type")]
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        await send({**start_message, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
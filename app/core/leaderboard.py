@@ -0,0 +1,224 @@
+"""
+Leaderboard — per-worker top-K of each challenge's entries, ranked live.
+
+Entries rank by similarity_score DESC, ties going to the earlier submission
+(id ASC); entries without a score are not ranked. That is the order of
+ix_creations_challenge_leaderboard (migration 0006), so every DB read here
+is an index range scan, however many entries a challenge has.
+
+For each challenge being read, a worker keeps a `Board`: the first
+LEADERBOARD_TOP_K entries and the number of ranked entries. A submission
+handled by this worker is inserted into its board at once (`entry_added`).
+Boards are reloaded LEADERBOARD_CACHE_SECONDS after they were loaded, which
+is how other workers' submissions arrive.
+
+- `page(db, challenge_id, limit, after)`: ranked entries after a keyset
+  cursor; from the board while it covers the page, from the index past it.
+- `rank_of(db, challenge_id, entry)`: 1-based rank; the board position for
+  top-K entries, an index range count for the rest.
+"""
+
+import bisect
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.style import Creation
+
+# Boards kept per worker; only the challenges being read need one
+MAX_BOARDS = 64
+
+
+@dataclass(frozen=True)
+class LeaderboardEntry:
+    id: int
+    user_id: int
+    similarity_score: float
+    generated_image_url: Optional[str]
+    created_at: datetime
+
+    @property
+    def key(self) -> tuple:
+        """Ascending sort key of the ranking."""
+        return (-self.similarity_score, self.id)
+
+
+@dataclass(frozen=True)
+class Board:
+    entries: tuple        # the top LeaderboardEntry rows, in rank order
+    total: int            # ranked entries in the challenge
+    expires_at: float     # time.monotonic()
+
+    @property
+    def complete(self) -> bool:
+        return len(self.entries) >= self.total
+
+
+_COLUMNS = (
+    Creation.id, Creation.user_id, Creation.similarity_score,
+    Creation.generated_image_url, Creation.created_at,
+)
+
+
+def _ranked(challenge_id: int) -> tuple:
+    """Criteria for the ranked entries of a challenge (ix_creations_challenge_leaderboard)."""
+    return (
+        Creation.challenge_id == challenge_id,
+        Creation.is_deleted == False,  # noqa: E712
+        Creation.similarity_score.is_not(None),
+    )
+
+
+def _in_rank_order(query):
+    # NULLS LAST matches the index; the criteria exclude NULL scores anyway
+    return query.order_by(Creation.similarity_score.desc().nulls_last(), Creation.id)
+
+
+def _ranked_below(score: float, id_: int):
+    """Entries after (score, id) in rank order, as an index range."""
+    return and_(
+        Creation.similarity_score <= score,
+        or_(Creation.similarity_score < score, Creation.id > id_),
+    )
+
+
+def _ranked_above(score: float, id_: int):
+    return and_(
+        Creation.similarity_score >= score,
+        or_(Creation.similarity_score > score, Creation.id < id_),
+    )
+
+
+def _entry(row) -> LeaderboardEntry:
+    return LeaderboardEntry(**row._asdict())
+
+
+class Leaderboards:
+    def __init__(self, k: int, ttl_seconds: float):
+        self.k = k
+        self.ttl_seconds = ttl_seconds
+        self._boards = TTLCache(ttl_seconds, MAX_BOARDS)
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.db_pages = 0
+        self.db_ranks = 0
+
+    def board(self, db: Session, challenge_id: int) -> Board:
+        board = self._boards.get(challenge_id)
+        if board is None:
+            board = self._load(db, challenge_id)
+            self._boards.set(challenge_id, board)
+        return board
+
+    def _load(self, db: Session, challenge_id: int) -> Board:
+        rows = _in_rank_order(db.query(*_COLUMNS).filter(*_ranked(challenge_id))).limit(self.k).all()
+        total = len(rows)
+        if total == self.k:
+            total = db.query(func.count(Creation.id)).filter(*_ranked(challenge_id)).scalar()
+        with self._lock:
+            self.loads += 1
+        return Board(
+            entries=tuple(_entry(r) for r in rows),
+            total=total,
+            expires_at=time.monotonic() + self.ttl_seconds,
+        )
+
+    def page(
+        self, db: Session, challenge_id: int, limit: int, after: Optional[tuple] = None
+    ) -> tuple[list[tuple[int, LeaderboardEntry]], Optional[tuple]]:
+        """
+        ([(rank, entry)], next `after`) for up to `limit` entries ranked after
+        `after` — the (score, id, rank) of the previous page's last entry.
+        """
+        board = self.board(db, challenge_id)
+        entries = board.entries
+        start = 0
+        if after is not None:
+            start = bisect.bisect_right(entries, (-after[0], after[1]), key=lambda e: e.key)
+        end = start + limit
+
+        if end <= len(entries) or board.complete:
+            ranked = [(start + 1 + i, e) for i, e in enumerate(entries[start:end])]
+            more = end < board.total
+        else:
+            query = db.query(*_COLUMNS).filter(*_ranked(challenge_id))
+            first_rank = start + 1
+            if after is not None:
+                query = query.filter(_ranked_below(after[0], after[1]))
+                if start == len(entries):
+                    # The cursor is past the board: carry its rank on
+                    first_rank = after[2] + 1
+            rows = _in_rank_order(query).limit(limit).all()
+            with self._lock:
+                self.db_pages += 1
+            ranked = [(first_rank + i, _entry(r)) for i, r in enumerate(rows)]
+            more = len(rows) == limit
+
+        if not (ranked and more):
+            return ranked, None
+        rank, last = ranked[-1]
+        return ranked, (last.similarity_score, last.id, rank)
+
+    def rank_of(self, db: Session, challenge_id: int, entry: LeaderboardEntry) -> int:
+        board = self.board(db, challenge_id)
+        i = bisect.bisect_left(board.entries, entry.key, key=lambda e: e.key)
+        if i < len(board.entries) and board.entries[i].id == entry.id:
+            return i + 1
+        with self._lock:
+            self.db_ranks += 1
+        above = (
+            db.query(func.count(Creation.id))
+            .filter(*_ranked(challenge_id), _ranked_above(entry.similarity_score, entry.id))
+            .scalar()
+        )
+        return above + 1
+
+    def best_entry(self, db: Session, challenge_id: int, user_id: int) -> Optional[LeaderboardEntry]:
+        """The user's highest-ranked entry in the challenge, if any."""
+        row = (
+            _in_rank_order(db.query(*_COLUMNS).filter(*_ranked(challenge_id), Creation.user_id == user_id))
+            .first()
+        )
+        return _entry(row) if row else None
+
+    def entry_added(self, challenge_id: int, entry: LeaderboardEntry) -> None:
+        """Rank a committed submission on this worker's board (if it has one)."""
+        if entry.similarity_score is None:
+            return
+        with self._lock:
+            board = self._boards.get(challenge_id)
+            if board is None:
+                return  # loaded, with the entry, on the next read
+            entries = list(board.entries)
+            bisect.insort(entries, entry, key=lambda e: e.key)
+            self._boards.set(
+                challenge_id,
+                Board(entries=tuple(entries[:self.k]), total=board.total + 1, expires_at=board.expires_at),
+                ttl=board.expires_at - time.monotonic(),
+            )
+
+    def clear(self) -> None:
+        self._boards.clear()
+
+    def stats(self) -> dict:
+        stats = self._boards.stats()
+        requests = stats["hits"] + stats["misses"]
+        return {
+            "boards": stats["entries"],
+            "hit_rate": round(stats["hits"] / requests, 4) if requests else None,
+            "loads": self.loads,
+            "db_pages": self.db_pages,
+            "db_ranks": self.db_ranks,
+            "top_k": self.k,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+leaderboards = Leaderboards(settings.LEADERBOARD_TOP_K, settings.LEADERBOARD_CACHE_SECONDS)
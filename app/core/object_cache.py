@@ -0,0 +1,204 @@
+"""
+Object Cache — read-through, per-worker caches of Creation, Style and User rows.
+
+List endpoints (feed, mine, liked, collection detail, leaderboard) first
+find the ids they need, then hydrate them here. `get_many(db, ids)` serves
+what it can from memory and loads every miss with one `WHERE id IN (...)`,
+so popular creations, styles (with their category) and user names are
+shared across requests instead of being re-joined by each query.
+
+Entries are immutable snapshots (frozen dataclasses with the attributes the
+serializers read), never ORM instances, so they are safe to share between
+threads and outlive the session that loaded them.
+
+Freshness: write paths in this process call `invalidate(...)` after they
+commit (like / unlike / visibility → creations, profile edits → users).
+Other workers, and out-of-process writers such as the admin scripts,
+converge within the TTL. Creations carry like counts, so their TTL
+(CREATION_CACHE_SECONDS) is short. Styles and users change rarely
+(OBJECT_CACHE_SECONDS).
+"""
+
+import dataclasses
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.style import Creation, Style
+from app.models.user import User
+
+_MISSING = object()
+
+
+@dataclass(frozen=True)
+class CategoryRow:
+    id: int
+    name: str
+    slug: Optional[str]
+    icon: Optional[str]
+    description: Optional[str]
+    preview_url: Optional[str]
+    display_order: int
+
+
+@dataclass(frozen=True)
+class StyleRow:
+    id: int
+    name: str
+    slug: Optional[str]
+    description: Optional[str]
+    preview_url: str
+    category_id: int
+    uses_count: int
+    is_trending: bool
+    is_new: bool
+    tags: Optional[list]
+    credits_required: int
+    category: CategoryRow
+
+
+@dataclass(frozen=True)
+class UserRow:
+    id: int
+    name: str
+    avatar_url: Optional[str]
+
+
+@dataclass(frozen=True)
+class CreationRow:
+    id: int
+    user_id: int
+    style_id: int
+    original_image_url: str
+    generated_image_url: Optional[str]
+    thumbnail_url: Optional[str]
+    mood: Optional[str]
+    weather: Optional[str]
+    dress_style: Optional[str]
+    credits_used: int
+    challenge_id: Optional[int]
+    similarity_score: Optional[float]
+    processing_time: Optional[float]
+    likes_count: Optional[int]
+    is_public: bool
+    is_deleted: bool
+    created_at: datetime
+    # Filled in by hydrate_creations from the style / user caches
+    style: Optional[StyleRow] = None
+    user: Optional[UserRow] = None
+
+
+class ObjectCache:
+    """LRU + TTL cache of snapshots keyed by id, filled by `loader(db, ids) -> {id: snapshot}`."""
+
+    def __init__(self, name: str, loader: Callable[[Session, list], dict], ttl_seconds: float, max_entries: int):
+        self.name = name
+        self.loader = loader
+        self._cache = TTLCache(ttl_seconds, max_entries)
+        self.loads = 0  # IN (...) queries issued for misses
+
+    def get_many(self, db: Session, ids: Iterable[int]) -> dict:
+        """{id: snapshot} for the ids that exist; at most one query for all misses."""
+        found, missing = {}, []
+        for id_ in dict.fromkeys(ids):
+            value = self._cache.get(id_, _MISSING)
+            if value is _MISSING:
+                missing.append(id_)
+            else:
+                found[id_] = value
+        if missing:
+            self.loads += 1
+            loaded = self.loader(db, missing)
+            for id_, value in loaded.items():
+                self._cache.set(id_, value)
+            found.update(loaded)
+        return found
+
+    def get(self, db: Session, id_: int):
+        return self.get_many(db, [id_]).get(id_)
+
+    def invalidate(self, *ids: int) -> None:
+        for id_ in ids:
+            self._cache.delete(id_)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        stats = self._cache.stats()
+        requests = stats["hits"] + stats["misses"]
+        return {
+            **stats,
+            "hit_rate": round(stats["hits"] / requests, 4) if requests else None,
+            "loads": self.loads,
+            "ttl_seconds": self._cache.ttl_seconds,
+        }
+
+
+# ─── Loaders ──────────────────────────────────────────────────────────────────
+
+def _category_row(cat) -> CategoryRow:
+    return CategoryRow(
+        id=cat.id, name=cat.name, slug=cat.slug, icon=cat.icon, description=cat.description,
+        preview_url=cat.preview_url, display_order=cat.display_order,
+    )
+
+
+def _load_styles(db: Session, ids: list) -> dict:
+    styles = db.query(Style).options(joinedload(Style.category)).filter(Style.id.in_(ids)).all()
+    return {
+        s.id: StyleRow(
+            id=s.id, name=s.name, slug=s.slug, description=s.description, preview_url=s.preview_url,
+            category_id=s.category_id, uses_count=s.uses_count, is_trending=s.is_trending, is_new=s.is_new,
+            tags=s.tags, credits_required=s.credits_required, category=_category_row(s.category),
+        )
+        for s in styles
+    }
+
+
+def _load_users(db: Session, ids: list) -> dict:
+    rows = db.query(User.id, User.name, User.avatar_url).filter(User.id.in_(ids)).all()
+    return {r.id: UserRow(id=r.id, name=r.name, avatar_url=r.avatar_url) for r in rows}
+
+
+_CREATION_COLUMNS = [
+    f.name for f in dataclasses.fields(CreationRow) if f.name not in ("style", "user")
+]
+
+
+def _load_creations(db: Session, ids: list) -> dict:
+    rows = db.query(*(getattr(Creation, name) for name in _CREATION_COLUMNS)).filter(Creation.id.in_(ids)).all()
+    return {r.id: CreationRow(**r._asdict()) for r in rows}
+
+
+styles = ObjectCache("styles", _load_styles, settings.OBJECT_CACHE_SECONDS, settings.OBJECT_CACHE_MAX_ENTRIES)
+users = ObjectCache("users", _load_users, settings.OBJECT_CACHE_SECONDS, settings.OBJECT_CACHE_MAX_ENTRIES)
+creations = ObjectCache(
+    "creations", _load_creations, settings.CREATION_CACHE_SECONDS, settings.OBJECT_CACHE_MAX_ENTRIES
+)
+
+
+def hydrate_creations(
+    db: Session, ids: list[int], keep: Optional[Callable[[CreationRow], bool]] = None
+) -> list[CreationRow]:
+    """
+    Creations for `ids`, in that order, with `.style` / `.user` attached — at
+    most three IN (...) queries, none when everything is cached. Ids that no
+    longer exist, or fail `keep`, are dropped.
+    """
+    rows = creations.get_many(db, ids)
+    ordered = [rows[i] for i in ids if i in rows and (keep is None or keep(rows[i]))]
+    style_map = styles.get_many(db, [c.style_id for c in ordered])
+    user_map = users.get_many(db, [c.user_id for c in ordered])
+    return [
+        dataclasses.replace(c, style=style_map.get(c.style_id), user=user_map.get(c.user_id))
+        for c in ordered
+    ]
+
+
+def stats() -> dict:
+    return {cache.name: cache.stats() for cache in (creations, styles, users)}
@@ -0,0 +1,33 @@
+"""
+Opaque keyset-pagination cursors.
+
+A cursor encodes the sort key of the last item on a page (e.g. its score and
+id); the next page is "rows strictly after this key" in the sort order, an
+index range scan no matter how deep the client has scrolled. Clients treat
+the cursor as an opaque string and pass back `next_cursor` unchanged.
+"""
+
+import base64
+import binascii
+import json
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(*values) -> str:
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], size: int) -> Optional[list]:
+    """The values passed to encode_cursor; 400 for a malformed cursor."""
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return values
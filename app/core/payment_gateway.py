@@ -0,0 +1,299 @@
+"""
+Payment Gateway — async Razorpay client plus an in-memory fake for tests.
+
+RazorpayGateway talks to the Razorpay REST API over a pooled httpx.AsyncClient
+so a slow gateway never blocks the event loop or ties up threadpool workers:
+
+- every call has a connect/read timeout (PAYMENT_GATEWAY_TIMEOUT_SECONDS);
+- transient failures (network errors, 429, 5xx) are retried with backoff;
+- order creation is idempotent on `receipt`: after an ambiguous failure the
+  order is looked up by receipt before retrying, so a timeout can never
+  create two orders for one purchase;
+- payment and webhook signatures are verified locally (HMAC-SHA256), no API call.
+
+Select the implementation with PAYMENT_GATEWAY=razorpay (default) or fake.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import logging
+import random
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Optional
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+RAZORPAY_API_URL = "https://api.razorpay.com/v1"
+
+
+class PaymentGatewayError(Exception):
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        self.status_code = status_code
+        super().__init__(message)
+
+
+def _hmac_sha256(secret: str, message: bytes) -> str:
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+class PaymentGateway(ABC):
+    """Operations the payment endpoints need from a gateway."""
+
+    key_id: str
+    _webhook_secret: str = ""
+
+    @abstractmethod
+    async def create_order(self, amount_paise: int, currency: str, receipt: str, notes: dict) -> dict:
+        ...
+
+    @abstractmethod
+    async def fetch_order(self, order_id: str) -> dict:
+        ...
+
+    @abstractmethod
+    async def find_order_by_receipt(self, receipt: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def list_orders(self, from_ts: int, to_ts: int) -> list[dict]:
+        """All orders created in [from_ts, to_ts] (unix seconds)."""
+
+    @abstractmethod
+    async def fetch_order_payments(self, order_id: str) -> list[dict]:
+        ...
+
+    @abstractmethod
+    def verify_payment_signature(self, order_id: str, payment_id: str, signature: str) -> bool:
+        ...
+
+    def verify_webhook_signature(self, body: bytes, signature: str) -> bool:
+        if not self._webhook_secret:
+            return False
+        return hmac.compare_digest(_hmac_sha256(self._webhook_secret, body), signature or "")
+
+    async def aclose(self):
+        pass
+
+
+class RazorpayGateway(PaymentGateway):
+    def __init__(self, key_id: str, key_secret: str, webhook_secret: str = "", base_url: str = RAZORPAY_API_URL):
+        self.key_id = key_id
+        self._key_secret = key_secret
+        self._webhook_secret = webhook_secret
+        self.max_retries = settings.PAYMENT_GATEWAY_MAX_RETRIES
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            auth=(key_id, key_secret),
+            timeout=httpx.Timeout(settings.PAYMENT_GATEWAY_TIMEOUT_SECONDS, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=settings.PAYMENT_GATEWAY_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.PAYMENT_GATEWAY_MAX_CONNECTIONS,
+            ),
+        )
+
+    async def _backoff(self, attempt: int):
+        await asyncio.sleep(min(0.2 * 2 ** attempt, 2.0) * (0.5 + random.random()))
+
+    async def _request(self, method: str, path: str, **kwargs) -> dict:
+        """Send a request that is safe to repeat (GET), retrying transient failures."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                resp = await self._client.request(method, path, **kwargs)
+            except httpx.TransportError as e:
+                if attempt == self.max_retries:
+                    raise PaymentGatewayError(f"Payment gateway unreachable: {e}") from e
+            else:
+                if resp.status_code < 400:
+                    return resp.json()
+                if resp.status_code != 429 and resp.status_code < 500 or attempt == self.max_retries:
+                    raise PaymentGatewayError(
+                        f"Payment gateway error {resp.status_code}: {resp.text[:200]}", resp.status_code
+                    )
+            await self._backoff(attempt)
+
+    async def create_order(self, amount_paise: int, currency: str, receipt: str, notes: dict) -> dict:
+        payload = {"amount": amount_paise, "currency": currency, "receipt": receipt, "notes": notes}
+        for attempt in range(self.max_retries + 1):
+            try:
+                resp = await self._client.post("/orders", json=payload)
+            except httpx.TransportError as e:
+                error = PaymentGatewayError(f"Payment gateway unreachable: {e}")
+            else:
+                if resp.status_code < 400:
+                    return resp.json()
+                error = PaymentGatewayError(
+                    f"Payment gateway error {resp.status_code}: {resp.text[:200]}", resp.status_code
+                )
+                if resp.status_code != 429 and resp.status_code < 500:
+                    raise error
+
+            # The order may have been created before the failure: reuse it
+            try:
+                existing = await self.find_order_by_receipt(receipt)
+            except PaymentGatewayError:
+                existing = None
+            if existing:
+                return existing
+            if attempt == self.max_retries:
+                raise error
+            logger.warning("Retrying Razorpay order create (receipt=%s): %s", receipt, error)
+            await self._backoff(attempt)
+
+    async def fetch_order(self, order_id: str) -> dict:
+        return await self._request("GET", f"/orders/{order_id}")
+
+    async def find_order_by_receipt(self, receipt: str) -> Optional[dict]:
+        result = await self._request("GET", "/orders", params={"receipt": receipt})
+        items = result.get("items") or []
+        return items[0] if items else None
+
+    async def list_orders(self, from_ts: int, to_ts: int) -> list[dict]:
+        orders, page_size = [], 100
+        while True:
+            page = await self._request(
+                "GET", "/orders", params={"from": from_ts, "to": to_ts, "count": page_size, "skip": len(orders)}
+            )
+            items = page.get("items") or []
+            orders.extend(items)
+            if len(items) < page_size:
+                return orders
+
+    async def fetch_order_payments(self, order_id: str) -> list[dict]:
+        result = await self._request("GET", f"/orders/{order_id}/payments")
+        return result.get("items") or []
+
+    def verify_payment_signature(self, order_id: str, payment_id: str, signature: str) -> bool:
+        expected = _hmac_sha256(self._key_secret, f"{order_id}|{payment_id}".encode())
+        return hmac.compare_digest(expected, signature or "")
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+class FakePaymentGateway(PaymentGateway):
+    """
+    In-memory gateway for tests and local development (PAYMENT_GATEWAY=fake).
+    Signatures use the same HMAC scheme as Razorpay, keyed with `key_secret`;
+    `sign_payment` produces a valid one for a test client.
+    """
+
+    def __init__(
+        self,
+        key_id: str = "rzp_test_fake",
+        key_secret: str = "fake_secret",
+        webhook_secret: str = "fake_webhook_secret",
+        latency_seconds: float = 0.0,
+    ):
+        self.key_id = key_id
+        self._key_secret = key_secret
+        self._webhook_secret = webhook_secret
+        self.latency_seconds = latency_seconds
+        self.orders: dict[str, dict] = {}
+        self.payments: dict[str, list[dict]] = {}
+        self.create_calls = 0
+
+    async def create_order(self, amount_paise: int, currency: str, receipt: str, notes: dict) -> dict:
+        self.create_calls += 1
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        existing = await self.find_order_by_receipt(receipt)
+        if existing:
+            return existing
+        order = {
+            "id": f"order_{uuid.uuid4().hex[:14]}",
+            "entity": "order",
+            "amount": amount_paise,
+            "amount_paid": 0,
+            "currency": currency,
+            "receipt": receipt,
+            "notes": notes,
+            "status": "created",
+            "created_at": int(time.time()),
+        }
+        self.orders[order["id"]] = order
+        return order
+
+    def pay_order(self, order_id: str, payment_id: Optional[str] = None) -> str:
+        """Simulate the customer paying: order becomes `paid` with a captured payment."""
+        payment_id = payment_id or f"pay_{uuid.uuid4().hex[:14]}"
+        order = self.orders[order_id]
+        order.update(status="paid", amount_paid=order["amount"])
+        self.payments.setdefault(order_id, []).append(
+            {"id": payment_id, "order_id": order_id, "status": "captured", "amount": order["amount"]}
+        )
+        return payment_id
+
+    async def fetch_order(self, order_id: str) -> dict:
+        if order_id not in self.orders:
+            raise PaymentGatewayError(f"Order {order_id} not found", 400)
+        return self.orders[order_id]
+
+    async def find_order_by_receipt(self, receipt: str) -> Optional[dict]:
+        return next((o for o in self.orders.values() if o["receipt"] == receipt), None)
+
+    async def list_orders(self, from_ts: int, to_ts: int) -> list[dict]:
+        return [o for o in self.orders.values() if from_ts <= o["created_at"] <= to_ts]
+
+    async def fetch_order_payments(self, order_id: str) -> list[dict]:
+        return list(self.payments.get(order_id, []))
+
+    def sign_webhook(self, body: bytes) -> str:
+        return _hmac_sha256(self._webhook_secret, body)
+
+    def sign_payment(self, order_id: str, payment_id: str) -> str:
+        return _hmac_sha256(self._key_secret, f"{order_id}|{payment_id}".encode())
+
+    def verify_payment_signature(self, order_id: str, payment_id: str, signature: str) -> bool:
+        return hmac.compare_digest(self.sign_payment(order_id, payment_id), signature or "")
+
+
+_gateway: Optional[PaymentGateway] = None
+_fake_gateway: Optional[FakePaymentGateway] = None
+# First calls can race: from the event loop (create_order) and from threadpool
+# threads (verify_payment, webhook enqueue); only one instance may be built
+_gateway_lock = threading.RLock()
+
+
+def create_payment_gateway() -> Optional[PaymentGateway]:
+    """
+    New gateway instance, or None when Razorpay is not configured. Background
+    threads use their own instance because an httpx.AsyncClient is bound to
+    the event loop it was first used on. The fake is shared (no I/O).
+    """
+    global _fake_gateway
+    if settings.PAYMENT_GATEWAY == "fake":
+        with _gateway_lock:
+            if _fake_gateway is None:
+                _fake_gateway = FakePaymentGateway()
+        return _fake_gateway
+    if settings.RAZORPAY_KEY_ID and settings.RAZORPAY_KEY_SECRET:
+        return RazorpayGateway(
+            settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET, settings.RAZORPAY_WEBHOOK_SECRET
+        )
+    return None
+
+
+def get_payment_gateway() -> Optional[PaymentGateway]:
+    """Process-wide gateway used by the API handlers (event loop)."""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = create_payment_gateway()
+    return _gateway
+
+
+async def close_payment_gateway():
+    global _gateway
+    with _gateway_lock:
+        gateway, _gateway = _gateway, None
+    if gateway is not None:
+        await gateway.aclose()
@@ -0,0 +1,245 @@
+"""
+Payment Reconciliation — grants credits for payments the app never confirmed.
+
+Two background tasks close the gap left when the app dies between checkout
+and /payments/verify-payment:
+
+- webhook processor: drains the `payment_webhook_events` inbox filled by
+  POST /payments/webhook. Batches are claimed with FOR UPDATE SKIP LOCKED, so
+  every worker can run the task without two of them applying the same event.
+- stale-order sweeper: lists the gateway's orders for the window covering
+  our stale `created` transactions in one paged call (not one call per order),
+  completes the paid ones and marks long-abandoned ones failed. No session
+  is open during the gateway calls; a session-level advisory lock on a
+  dedicated connection keeps the sweep to one worker at a time.
+
+Both paths complete purchases through purchases.complete_purchase, so they
+can race verify-payment and each other without granting credits twice.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core import background
+from app.core import purchases
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.core.payment_gateway import PaymentGateway, PaymentGatewayError, create_payment_gateway
+from app.models.payment import PaymentWebhookEvent, Transaction
+
+logger = logging.getLogger(__name__)
+
+# Events that still fail after this many attempts are parked as "failed"
+MAX_EVENT_ATTEMPTS = 5
+# pg_try_advisory_lock key for the sweeper (arbitrary, unique to this job)
+SWEEP_LOCK_KEY = 0x5A7E_0001
+# Most stale transactions handled by one sweep; the rest wait for the next one
+SWEEP_BATCH_LIMIT = 500
+
+
+# ---------------------------------------------------------------------------
+# Webhook inbox
+# ---------------------------------------------------------------------------
+
+def enqueue_webhook_event(db: Session, event_id: str, event_type: str, payload: dict) -> bool:
+    """Store a verified webhook. Returns False for a redelivery of a stored event."""
+    row = db.execute(
+        pg_insert(PaymentWebhookEvent)
+        .values(event_id=event_id, event_type=event_type, payload=payload, status="pending", attempts=0)
+        .on_conflict_do_nothing(index_elements=["event_id"])
+        .returning(PaymentWebhookEvent.id)
+    ).first()
+    db.commit()
+    return row is not None
+
+
+def _entity(payload: dict, name: str) -> dict:
+    return ((payload.get("payload") or {}).get(name) or {}).get("entity") or {}
+
+
+def _apply_event(db: Session, event: PaymentWebhookEvent) -> str:
+    """Apply one event and return its final status."""
+    payment = _entity(event.payload, "payment")
+    order_id = payment.get("order_id") or _entity(event.payload, "order").get("id")
+
+    if event.event_type in ("payment.captured", "order.paid"):
+        if not order_id or not payment.get("id"):
+            return "ignored"
+        result = purchases.complete_purchase(db, order_id, payment["id"])
+        if result:
+            logger.info("Webhook %s granted %d credits to user %s", event.event_id, result.credits_added, result.user_id)
+        return "processed"
+
+    if event.event_type == "payment.failed":
+        # One failed attempt; the customer may still pay the same order later,
+        # which complete_purchase accepts on a "failed" transaction.
+        if order_id:
+            purchases.fail_purchase(db, order_id)
+        return "processed"
+
+    return "ignored"
+
+
+def process_webhook_batch(limit: Optional[int] = None) -> int:
+    """Apply up to `limit` pending events. Returns how many were claimed."""
+    limit = limit or settings.PAYMENT_WEBHOOK_BATCH_SIZE
+    db = SessionLocal()
+    try:
+        events = (
+            db.query(PaymentWebhookEvent)
+            .filter(PaymentWebhookEvent.status == "pending")
+            .order_by(PaymentWebhookEvent.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        for event in events:
+            event.attempts += 1
+            try:
+                # Savepoint per event: a bad event never rolls back its batch
+                with db.begin_nested():
+                    new_status = _apply_event(db, event)
+            except Exception as e:
+                logger.exception("Failed to apply payment webhook %s", event.event_id)
+                event.last_error = str(e)[:500]
+                if event.attempts >= MAX_EVENT_ATTEMPTS:
+                    event.status = "failed"
+                continue
+            event.status = new_status
+            event.last_error = None
+            event.processed_at = func.now()
+        db.commit()
+        return len(events)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def drain_webhook_inbox():
+    """Process full batches until the inbox is (momentarily) empty."""
+    batch_size = settings.PAYMENT_WEBHOOK_BATCH_SIZE
+    while process_webhook_batch(batch_size) == batch_size:
+        pass
+
+
+webhook_task = background.register(background.PeriodicTask(
+    "payment-webhooks", settings.PAYMENT_WEBHOOK_PROCESS_INTERVAL_SECONDS, drain_webhook_inbox,
+))
+
+
+# ---------------------------------------------------------------------------
+# Stale order sweeper
+# ---------------------------------------------------------------------------
+
+async def _gateway_state(gateway: PaymentGateway, order_ids: list[str], from_ts: int, to_ts: int) -> dict:
+    """order_id → (gateway order, captured payment id or None), for the orders the gateway knows."""
+    try:
+        orders = {o["id"]: o for o in await gateway.list_orders(from_ts, to_ts)}
+        # Stragglers outside the listed window (clock skew) are fetched one by one
+        for order_id in order_ids:
+            if order_id not in orders:
+                try:
+                    orders[order_id] = await gateway.fetch_order(order_id)
+                except PaymentGatewayError as e:
+                    logger.warning("Sweeper could not fetch order %s: %s", order_id, e)
+
+        state = {}
+        for order_id in order_ids:
+            order = orders.get(order_id)
+            if order is None:
+                continue
+            payment_id = None
+            if order.get("status") == "paid":
+                payments = await gateway.fetch_order_payments(order_id)
+                payment_id = next((p["id"] for p in payments if p.get("status") == "captured"), None)
+            state[order_id] = (order, payment_id)
+        return state
+    finally:
+        await gateway.aclose()
+
+
+def _load_stale_orders(now: datetime) -> list:
+    db = SessionLocal()
+    try:
+        return (
+            db.query(Transaction.order_id, Transaction.created_at)
+            .filter(
+                Transaction.status == "created",
+                Transaction.created_at < now - timedelta(seconds=settings.PAYMENT_SWEEP_MIN_AGE_SECONDS),
+            )
+            .order_by(Transaction.created_at)
+            .limit(SWEEP_BATCH_LIMIT)
+            .all()
+        )
+    finally:
+        db.close()
+
+
+def _sweep(counts: dict) -> None:
+    now = datetime.now(timezone.utc)
+    # Short reads and writes around the gateway calls, which can take minutes:
+    # no connection sits idle in a transaction while they run
+    stale = _load_stale_orders(now)
+    gateway = create_payment_gateway() if stale else None
+    if gateway is None:
+        return
+
+    from_ts = int(stale[0].created_at.timestamp()) - 60
+    to_ts = int(stale[-1].created_at.timestamp()) + 60
+    state = asyncio.run(_gateway_state(gateway, [tx.order_id for tx in stale], from_ts, to_ts))
+
+    abandon_before = now - timedelta(hours=settings.PAYMENT_SWEEP_ABANDON_HOURS)
+    db = SessionLocal()
+    try:
+        # Both updates are conditional on the current status, so orders that
+        # verify-payment or a webhook settled meanwhile are left as they are
+        for tx in stale:
+            if tx.order_id not in state:
+                continue
+            counts["checked"] += 1
+            order, payment_id = state[tx.order_id]
+            if payment_id:
+                if purchases.complete_purchase(db, tx.order_id, payment_id):
+                    counts["completed"] += 1
+            elif order.get("status") != "paid" and tx.created_at < abandon_before:
+                if purchases.fail_purchase(db, tx.order_id):
+                    counts["abandoned"] += 1
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def sweep_stale_orders() -> dict:
+    """Reconcile `created` transactions older than PAYMENT_SWEEP_MIN_AGE_SECONDS."""
+    counts = {"checked": 0, "completed": 0, "abandoned": 0}
+    # Session-level advisory lock on a dedicated connection: one worker sweeps at a time
+    with engine.connect() as lock_conn:
+        locked = lock_conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": SWEEP_LOCK_KEY}).scalar()
+        lock_conn.commit()  # the lock outlives the transaction; don't sit idle in one
+        if not locked:
+            return counts  # another worker is sweeping
+        try:
+            _sweep(counts)
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SWEEP_LOCK_KEY})
+            lock_conn.commit()
+
+    if counts["completed"] or counts["abandoned"]:
+        logger.info("Payment sweep: %s", counts)
+    return counts
+
+
+sweep_task = background.register(background.PeriodicTask(
+    "payment-sweeper", settings.PAYMENT_SWEEP_INTERVAL_SECONDS, sweep_stale_orders,
+))
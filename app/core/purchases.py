@@ -0,0 +1,69 @@
+"""
+Purchase Service — completes credit purchases exactly once.
+
+A purchase can be confirmed by three paths that may race each other: the
+app's verify-payment call, a Razorpay webhook, and the stale-order sweeper.
+All of them go through complete_purchase, whose conditional UPDATE on
+`transactions` lets exactly one caller win; only the winner grants credits.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from app.core import credits as credit_service
+from app.models.payment import Transaction
+
+
+@dataclass
+class PurchaseResult:
+    user_id: int
+    credits_added: int
+    credits_balance: int
+
+
+def complete_purchase(
+    db: Session,
+    order_id: str,
+    payment_id: Optional[str],
+    signature: Optional[str] = None,
+    user_id: Optional[int] = None,
+) -> Optional[PurchaseResult]:
+    """
+    Mark the order successful and grant its credits, unless another caller
+    already did. Returns None when there was nothing to do (unknown order,
+    or already successful). Does NOT commit.
+    """
+    stmt = (
+        update(Transaction)
+        .where(Transaction.order_id == order_id, Transaction.status != "success")
+        .values(status="success", payment_id=payment_id, signature=signature, updated_at=func.now())
+        .returning(Transaction.user_id, Transaction.credits_purchased)
+    )
+    if user_id is not None:
+        stmt = stmt.where(Transaction.user_id == user_id)
+    row = db.execute(stmt).first()
+    if row is None:
+        return None
+
+    buyer_id, credits_purchased = row
+    balance = credit_service.grant_credits(
+        db, buyer_id, credits_purchased,
+        tx_type="purchase",
+        description=f"Purchased {credits_purchased} credits",
+        reference_id=order_id,
+    )
+    return PurchaseResult(user_id=buyer_id, credits_added=credits_purchased, credits_balance=balance)
+
+
+def fail_purchase(db: Session, order_id: str) -> bool:
+    """Mark a still-open order as failed. Never downgrades a successful one. Does NOT commit."""
+    row = db.execute(
+        update(Transaction)
+        .where(Transaction.order_id == order_id, Transaction.status == "created")
+        .values(status="failed", updated_at=func.now())
+        .returning(Transaction.id)
+    ).first()
+    return row is not None
@@ -0,0 +1,20 @@
+"""
+Default JSON response class.
+
+orjson serializes several times faster than the stdlib json module used by
+Starlette's JSONResponse (see scripts/bench_feed_payload.py). FastAPI still
+runs jsonable_encoder / response_model validation first; this class only
+replaces the final dumps.
+
+List endpoints return it directly with plain dicts from app.api.serializers,
+skipping that encoding step; OPT_UTC_Z writes UTC datetimes with a "Z"
+suffix, the same as Pydantic.
+"""
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
@@ -0,0 +1,340 @@
+"""
+Similarity — scores a challenge entry against the challenge's target image.
+
+Two backends, chosen by SIMILARITY_BACKEND:
+
+- "gemini" (default): the Gemini vision comparison
+  (gemini.calculate_similarity), one model call per entry.
+- "local": a deterministic perceptual score computed with NumPy on the API
+  worker, in a few milliseconds and at no cost.
+
+The local score combines three features of a 64x64 thumbnail of each image:
+
+- colour:    joint RGB histogram (8 bins per channel), histogram intersection
+- structure: 64-bit perceptual hash (DCT of a 32x32 grayscale), 1 - Hamming
+- style:     a small embedding (gradient-orientation histograms and colour
+             layout over a 4x4 grid), cosine similarity
+
+The weighted sum is rescaled so that unrelated images score about 0 and an
+identical image 100. SCORE_WEIGHTS / SCORE_FLOOR come from
+scripts/bench_similarity.py; re-check them against the stored Gemini scores
+of a real challenge (--challenge-id) before relying on absolute values.
+
+With the local backend a submission loads its challenge's target features
+(`prepare_target`) before it is charged; the Gemini backend caches the
+target's bytes and still scores an unavailable target 0.0. Entries
+are decoded one by one, but every feature and score is computed for the
+whole batch at once (`score_batch`): concurrent submissions are collected
+by `ScoreBatcher` for up to SIMILARITY_BATCH_WAIT_MS, and
+scripts/rescore_challenge.py scores a challenge's stored entries in batches.
+"""
+
+import io
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import httpx
+import numpy as np
+from PIL import Image
+
+from app.core import gemini as gemini_service
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Thumbnail side every feature is computed from
+THUMB = 64
+# (colour, structure, style) weights of the raw similarity. Structure (pHash) is the
+# composition, which an entry restyled from another photo does not share: keep it light
+SCORE_WEIGHTS = np.array([0.5, 0.1, 0.4])
+# Raw similarity of unrelated images (their 95th percentile); maps to a score of 0
+SCORE_FLOOR = 0.52
+# Target images never change under a URL; keep their features for a day
+TARGET_CACHE_SECONDS = 24 * 3600
+
+
+@dataclass(frozen=True)
+class Features:
+    """Features of N images, one row each."""
+    histogram: np.ndarray   # (N, 512) float, sums to 1
+    hash_bits: np.ndarray   # (N, 63) bool
+    embedding: np.ndarray   # (N, 176) float, unit length
+
+    def __len__(self) -> int:
+        return len(self.histogram)
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)[:, None]
+    x = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * x + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+_DCT32 = _dct_matrix(32)
+_GRAY = np.array([0.299, 0.587, 0.114])
+
+
+def _thumbnail(image_bytes: bytes) -> np.ndarray:
+    """(THUMB, THUMB, 3) uint8 RGB thumbnail of an encoded image."""
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        # JPEGs decode straight at a reduced scale
+        image.draft("RGB", (THUMB * 2, THUMB * 2))
+        thumb = image.convert("RGB").resize((THUMB, THUMB), Image.Resampling.BILINEAR)
+        return np.asarray(thumb, dtype=np.uint8)
+
+
+def _unit(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _smooth(histogram: np.ndarray, axis: int) -> np.ndarray:
+    """[1, 2, 1] / 4 along `axis`, mass at the edges kept in the edge bins."""
+    padded = np.concatenate(
+        [histogram.take([0], axis), histogram, histogram.take([-1], axis)], axis=axis
+    )
+    size = histogram.shape[axis]
+    return (
+        padded.take(range(0, size), axis)
+        + 2 * padded.take(range(1, size + 1), axis)
+        + padded.take(range(2, size + 2), axis)
+    ) / 4
+
+
+def features(images: Sequence[bytes]) -> Features:
+    rgb = np.stack([_thumbnail(b) for b in images])                     # (N, 64, 64, 3) uint8
+    n = len(rgb)
+
+    # Colour: joint 8x8x8 histogram, all images in one bincount, then smoothed
+    # across neighbouring bins so a small shade / lighting shift is not a miss
+    bins = (rgb[..., 0] >> 5).astype(np.int64) * 64 + (rgb[..., 1] >> 5) * 8 + (rgb[..., 2] >> 5)
+    bins = bins.reshape(n, -1) + np.arange(n)[:, None] * 512
+    histogram = np.bincount(bins.ravel(), minlength=n * 512).reshape(n, 8, 8, 8) / (THUMB * THUMB)
+    for axis in (1, 2, 3):
+        histogram = _smooth(histogram, axis)
+    histogram = histogram.reshape(n, 512)
+
+    pixels = rgb.astype(np.float64) / 255.0
+    gray = pixels @ _GRAY                                                 # (N, 64, 64)
+
+    # Structure: pHash — low frequencies of the 32x32 DCT against their median
+    gray32 = gray.reshape(n, 32, 2, 32, 2).mean(axis=(2, 4))
+    dct = _DCT32 @ gray32 @ _DCT32.T
+    low = dct[:, :8, :8].reshape(n, 64)[:, 1:]                            # drop the DC term
+    hash_bits = low > np.median(low, axis=1, keepdims=True)
+
+    # Style: magnitude-weighted gradient orientations (8 bins) per 16x16 cell...
+    gy, gx = np.gradient(gray, axis=(1, 2))
+    magnitude = np.hypot(gx, gy)
+    orientation = ((np.arctan2(gy, gx) % np.pi) / np.pi * 8).astype(np.int64).clip(0, 7)
+    cell = (np.arange(THUMB) // 16)
+    cell_index = cell[:, None] * 4 + cell[None, :]                        # (64, 64) → 0..15
+    slots = (np.arange(n)[:, None, None] * 16 + cell_index) * 8 + orientation
+    gradients = np.bincount(slots.ravel(), weights=magnitude.ravel(), minlength=n * 128).reshape(n, 16, 8)
+    gradients = gradients / np.maximum(gradients.sum(axis=2, keepdims=True), 1e-12)
+    gradients = gradients.reshape(n, 128) - 1 / 8
+    # ...plus the colour layout: each cell's mean colour relative to the image's
+    layout = pixels.reshape(n, 4, 16, 4, 16, 3).mean(axis=(2, 4)).reshape(n, 16, 3)
+    layout = (layout - layout.mean(axis=1, keepdims=True)).reshape(n, 48)
+    embedding = _unit(np.hstack([_unit(gradients), _unit(layout)]))
+
+    return Features(histogram=histogram, hash_bits=hash_bits, embedding=embedding)
+
+
+def raw_similarity(target: Features, candidates: Features) -> np.ndarray:
+    """Weighted (colour, structure, style) similarity (0-1) of every candidate to the first target image."""
+    colour = np.minimum(candidates.histogram, target.histogram[0]).sum(axis=1)
+    structure = 1.0 - (candidates.hash_bits != target.hash_bits[0]).mean(axis=1)
+    style = (candidates.embedding @ target.embedding[0] + 1.0) / 2.0
+    return np.column_stack([colour, structure, style]) @ SCORE_WEIGHTS
+
+
+def similarity(target: Features, candidates: Features) -> np.ndarray:
+    """Scores (0-100) of every candidate against the first image of `target`."""
+    raw = raw_similarity(target, candidates)
+    return np.round(np.clip((raw - SCORE_FLOOR) / (1.0 - SCORE_FLOOR), 0.0, 1.0) * 100.0, 1)
+
+
+# ─── Targets ──────────────────────────────────────────────────────────────────
+
+# Few challenges run at once; an entry only ever needs its own challenge's target.
+# The local backend keeps the target's features, the Gemini one its bytes.
+_targets = TTLCache(TARGET_CACHE_SECONDS, max_entries=16)
+_target_images = TTLCache(TARGET_CACHE_SECONDS, max_entries=16)
+
+
+def _download(target_image_url: str) -> bytes:
+    response = httpx.get(target_image_url, timeout=10, follow_redirects=True)
+    response.raise_for_status()
+    return response.content
+
+
+def target_features(target_image_url: str) -> Features:
+    """
+    Features of a challenge's target image, computed once per TARGET_CACHE_SECONDS.
+    Raises (httpx.HTTPError, or OSError if it is not an image).
+    """
+    cached = _targets.get(target_image_url)
+    if cached is None:
+        cached = features([_download(target_image_url)])
+        _targets.set(target_image_url, cached)
+    return cached
+
+
+def target_image(target_image_url: str) -> bytes:
+    """The target image as downloaded, for the Gemini backend. Raises httpx.HTTPError."""
+    cached = _target_images.get(target_image_url)
+    if cached is None:
+        cached = _download(target_image_url)
+        _target_images.set(target_image_url, cached)
+    return cached
+
+
+def prepare_target(target_image_url: str) -> None:
+    """
+    Load the local backend's target features before a submission is charged
+    for, raising if the target cannot be fetched or decoded. A no-op with the
+    Gemini backend, which scores an unavailable target 0.0.
+    """
+    if settings.SIMILARITY_BACKEND != "gemini":
+        target_features(target_image_url)
+
+
+def score_batch(target_image_url: str, images: Sequence[bytes]) -> list[float]:
+    """Local scores of `images` against the target, in one vectorised pass."""
+    if not images:
+        return []
+    return similarity(target_features(target_image_url), features(images)).tolist()
+
+
+# ─── Submission batching ──────────────────────────────────────────────────────
+
+class _Pending:
+    __slots__ = ("target_image_url", "image", "done", "score", "error")
+
+    def __init__(self, target_image_url: str, image: bytes):
+        self.target_image_url = target_image_url
+        self.image = image
+        self.done = threading.Event()
+        self.score: float = 0.0
+        self.error: Optional[BaseException] = None
+
+
+class ScoreBatcher:
+    """
+    Scores concurrent submissions together. `score()` blocks its (threadpool)
+    caller while one daemon thread collects entries for up to `max_wait`
+    seconds or `max_batch` entries, then runs `score_batch` once per target.
+    If a batch fails, its entries are scored one by one so that a single
+    undecodable image only fails its own submission.
+    """
+
+    def __init__(self, max_batch: int, max_wait: float):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._pending: list[_Pending] = []
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self.batches = 0
+        self.entries = 0
+        self.largest = 0
+        self.fallbacks = 0
+
+    def score(self, target_image_url: str, image: bytes) -> float:
+        item = _Pending(target_image_url, image)
+        with self._cond:
+            self._pending.append(item)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="similarity-batcher", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        item.done.wait()
+        if item.error is not None:
+            raise item.error
+        return item.score
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                deadline = time.monotonic() + self.max_wait
+                while len(self._pending) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+            self._score(batch)
+
+    def _score(self, batch: list[_Pending]) -> None:
+        self.batches += 1
+        self.entries += len(batch)
+        self.largest = max(self.largest, len(batch))
+        by_target: dict[str, list[_Pending]] = {}
+        for item in batch:
+            by_target.setdefault(item.target_image_url, []).append(item)
+
+        for target_image_url, items in by_target.items():
+            try:
+                scores = score_batch(target_image_url, [item.image for item in items])
+                for item, score in zip(items, scores):
+                    item.score = score
+            except Exception:
+                self.fallbacks += 1
+                for item in items:
+                    try:
+                        item.score = score_batch(target_image_url, [item.image])[0]
+                    except Exception as e:
+                        item.error = e
+            for item in items:
+                item.done.set()
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "entries": self.entries,
+            "largest_batch": self.largest,
+            "fallbacks": self.fallbacks,
+        }
+
+
+_batcher = ScoreBatcher(settings.SIMILARITY_BATCH_SIZE, settings.SIMILARITY_BATCH_WAIT_MS / 1000)
+
+
+def calculate_similarity(generated_image_bytes: bytes, target_image_url: str) -> float:
+    """
+    Score (0.0-100.0) of one entry with the configured backend. The local
+    backend raises if the target cannot be fetched or either image decoded;
+    the Gemini one scores its failures 0.0, as it always has. Both cache the
+    target image.
+    """
+    if settings.SIMILARITY_BACKEND == "gemini":
+        try:
+            target_bytes = target_image(target_image_url)
+        except httpx.HTTPError as e:
+            logger.warning("Target image %s unavailable, scoring 0.0: %s", target_image_url, e)
+            return 0.0
+        return gemini_service.calculate_similarity(
+            generated_image_bytes, target_image_url, target_image_bytes=target_bytes,
+        )
+    if settings.SIMILARITY_BATCH_WAIT_MS <= 0:
+        return score_batch(target_image_url, [generated_image_bytes])[0]
+    return _batcher.score(target_image_url, generated_image_bytes)
+
+
+def stats() -> dict:
+    targets = (_target_images if settings.SIMILARITY_BACKEND == "gemini" else _targets).stats()
+    return {
+        "backend": settings.SIMILARITY_BACKEND,
+        "targets": targets["entries"],
+        "target_hits": targets["hits"],
+        "target_misses": targets["misses"],
+        **_batcher.stats(),
+    }
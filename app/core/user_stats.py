@@ -0,0 +1,230 @@
+"""
+User Stats — denormalised counters behind the public profile.
+
+`user_stats` holds, per user, the number of public (non-deleted) creations
+and the likes on them. Every write path that changes either number applies
+a delta in the same transaction as the change itself:
+
+    creation saved      → creation_added
+    like / unlike       → likes_changed
+    visibility toggled  → visibility_changed
+    creation deleted    → creation_removed
+
+Deltas are atomic upserts, so concurrent writers never lose an update. A
+periodic repair job recomputes the counters from `creations` to fix drift
+from code paths that bypass these hooks (admin scripts, manual SQL).
+
+The full public-profile payload is cached per worker for
+PUBLIC_PROFILE_CACHE_SECONDS; writes drop the local entry once their
+transaction commits, other workers converge within the TTL.
+"""
+
+import logging
+from typing import Optional
+
+from sqlalchemy import event, func, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core import background
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.models.style import Creation
+from app.models.user import UserStats
+
+logger = logging.getLogger(__name__)
+
+# Users re-checked per repair transaction
+REPAIR_BATCH_SIZE = 1000
+# pg_try_advisory_lock key for the repair job (arbitrary, unique to this job)
+REPAIR_LOCK_KEY = 0x5A7E_0002
+
+public_profile_cache = TTLCache(settings.PUBLIC_PROFILE_CACHE_SECONDS)
+# Session.info key: users whose cached profile is stale once the session commits
+_STALE_PROFILES = "user_stats.stale_profiles"
+
+
+def _invalidate_on_commit(db: Session, user_id: int) -> None:
+    # Dropped before commit, a concurrent read could re-cache the old counts
+    # for the whole TTL. A rolled-back delta costs one extra drop at the
+    # session's next commit.
+    db.info.setdefault(_STALE_PROFILES, set()).add(user_id)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _drop_stale_profiles(session) -> None:
+    for user_id in session.info.pop(_STALE_PROFILES, ()):
+        public_profile_cache.delete(user_id)
+
+
+def _counts_toward_profile(creation: Creation) -> bool:
+    # Call after flush, so column defaults are populated on new creations
+    return bool(creation.is_public) and not creation.is_deleted
+
+
+def _apply_delta(db: Session, user_id: int, creations: int = 0, likes: int = 0) -> None:
+    """Atomically add deltas to the user's counters. Does NOT commit; the cached profile is dropped on commit."""
+    if not creations and not likes:
+        return
+    stmt = pg_insert(UserStats).values(
+        user_id=user_id,
+        creations_count=max(creations, 0),
+        total_likes=max(likes, 0),
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[UserStats.user_id],
+        set_={
+            "creations_count": UserStats.creations_count + creations,
+            "total_likes": UserStats.total_likes + likes,
+            "updated_at": func.now(),
+        },
+    ))
+    _invalidate_on_commit(db, user_id)
+
+
+def creation_added(db: Session, creation: Creation) -> None:
+    if _counts_toward_profile(creation):
+        _apply_delta(db, creation.user_id, creations=1, likes=creation.likes_count or 0)
+
+
+def creation_removed(db: Session, creation: Creation) -> None:
+    """Call before soft-deleting a creation (while it still counts)."""
+    if _counts_toward_profile(creation):
+        _apply_delta(db, creation.user_id, creations=-1, likes=-(creation.likes_count or 0))
+
+
+def visibility_changed(db: Session, creation: Creation, was_public: bool) -> None:
+    if bool(creation.is_public) == bool(was_public) or creation.is_deleted:
+        return
+    sign = 1 if creation.is_public else -1
+    _apply_delta(db, creation.user_id, creations=sign, likes=sign * (creation.likes_count or 0))
+
+
+def likes_changed(db: Session, creation: Creation, delta: int) -> None:
+    if _counts_toward_profile(creation):
+        _apply_delta(db, creation.user_id, likes=delta)
+
+
+def invalidate_profile(user_id: int) -> None:
+    """Drop the cached public profile, e.g. after a name / avatar change."""
+    public_profile_cache.delete(user_id)
+
+
+def get_stats(db: Session, user_id: int) -> tuple[int, int]:
+    """(creations_count, total_likes); a user without a row has no public creations."""
+    row = db.query(UserStats.creations_count, UserStats.total_likes).filter(UserStats.user_id == user_id).first()
+    return (row.creations_count, row.total_likes) if row else (0, 0)
+
+
+# ---------------------------------------------------------------------------
+# Repair
+# ---------------------------------------------------------------------------
+
+def _public_creations(user_ids=None):
+    """Per-user counters computed from `creations` (the source of truth)."""
+    query = (
+        select(
+            Creation.user_id.label("user_id"),
+            func.count().label("creations_count"),
+            func.coalesce(func.sum(Creation.likes_count), 0).label("total_likes"),
+        )
+        .where(Creation.is_public == True, Creation.is_deleted == False)  # noqa: E712
+        .group_by(Creation.user_id)
+    )
+    if user_ids is not None:
+        query = query.where(Creation.user_id.in_(user_ids))
+    return query.subquery()
+
+
+def _repair_batch(db: Session, after_user_id: int) -> Optional[tuple[int, int]]:
+    """
+    Repair the existing rows for the next batch of users. Returns
+    (last user id, rows fixed), or None when there are no more rows.
+
+    The batch's rows are locked first and recomputed by a later statement,
+    which (READ COMMITTED) sees every write committed while we waited, so a
+    concurrent delta is never overwritten with an older count.
+    """
+    user_ids = db.execute(
+        select(UserStats.user_id)
+        .where(UserStats.user_id > after_user_id)
+        .order_by(UserStats.user_id)
+        .limit(REPAIR_BATCH_SIZE)
+        .with_for_update()
+    ).scalars().all()
+    if not user_ids:
+        return None
+
+    actual = _public_creations(user_ids)
+    new_count = func.coalesce(
+        select(actual.c.creations_count).where(actual.c.user_id == UserStats.user_id).scalar_subquery(), 0
+    )
+    new_likes = func.coalesce(
+        select(actual.c.total_likes).where(actual.c.user_id == UserStats.user_id).scalar_subquery(), 0
+    )
+    fixed = db.execute(
+        update(UserStats)
+        .where(
+            UserStats.user_id.in_(user_ids),
+            (UserStats.creations_count != new_count) | (UserStats.total_likes != new_likes),
+        )
+        .values(creations_count=new_count, total_likes=new_likes, updated_at=func.now())
+        .returning(UserStats.user_id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    for user_id in fixed:
+        _invalidate_on_commit(db, user_id)
+    return user_ids[-1], len(fixed)
+
+
+def _insert_missing(db: Session) -> int:
+    """Create rows for users with public creations but no stats row."""
+    actual = _public_creations()
+    missing = select(actual).where(
+        ~select(UserStats.user_id).where(UserStats.user_id == actual.c.user_id).exists()
+    )
+    inserted = db.execute(
+        pg_insert(UserStats)
+        .from_select(["user_id", "creations_count", "total_likes"], missing)
+        .on_conflict_do_nothing(index_elements=[UserStats.user_id])
+        .returning(UserStats.user_id)
+    ).scalars().all()
+    return len(inserted)
+
+
+def repair_user_stats() -> dict:
+    """Recompute every user's counters from `creations` and fix the ones that drifted."""
+    counts = {"fixed": 0, "inserted": 0}
+    # Session-level advisory lock on a dedicated connection: one worker repairs at a time
+    with engine.connect() as lock_conn:
+        locked = lock_conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": REPAIR_LOCK_KEY}).scalar()
+        lock_conn.commit()  # the lock outlives the transaction; don't sit idle in one
+        if not locked:
+            return counts
+        db = SessionLocal()
+        try:
+            after = 0
+            while (batch := _repair_batch(db, after)) is not None:
+                db.commit()
+                after, fixed = batch
+                counts["fixed"] += fixed
+            counts["inserted"] = _insert_missing(db)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": REPAIR_LOCK_KEY})
+            lock_conn.commit()
+
+    if counts["fixed"] or counts["inserted"]:
+        logger.warning("Repaired user_stats drift: %s", counts)
+    return counts
+
+
+repair_task = background.register(background.PeriodicTask(
+    "user-stats-repair", settings.USER_STATS_REPAIR_INTERVAL_SECONDS, repair_user_stats,
+    run_immediately=False,
+))
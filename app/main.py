@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
@@ -10,9 +12,33 @@ from app.api.challenges import router as challenges_router
 from app.api.rewards import router as rewards_router
 from app.api.collections import router as collections_router
 from app.api.payments import router as payments_router
+from app.api.health import router as health_router
 from app.core.config import settings
+from app.core import background, firebase
+from app.core.challenge_schedule import challenge_schedule
+from app.core.compression import CompressionMiddleware
+from app.core.http_cache import HTTPCacheMiddleware
+from app.core.responses import ORJSONResponse
+from app.core.payment_gateway import close_payment_gateway
+
 
-app = FastAPI(title="MagicPic Backend", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    firebase.warm_up()
+    # Periodic jobs (e.g. read-replica lag check, key refreshes) run per worker process
+    background.start_all()
+    yield
+    background.stop_all()
+    challenge_schedule.close()
+    await close_payment_gateway()
+
+
+app = FastAPI(
+    title="MagicPic Backend",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 # Allow local frontend dev server to call API
 app.add_middleware(
@@ -21,8 +47,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # leaderboard pagination
 )
 
+# Cache-Control + ETag / 304 for the public read endpoints
+app.add_middleware(HTTPCacheMiddleware)
+
+# Outermost: compress what the layers above produced (ETags are computed on the identity body)
+app.add_middleware(CompressionMiddleware)
+
 # Normalize validation errors to frontend spec
 @app.exception_handler(RequestValidationError)
 def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -56,6 +89,7 @@ app.include_router(challenges_router, prefix="/api")
 app.include_router(rewards_router, prefix="/api")
 app.include_router(collections_router, prefix="/api")
 app.include_router(payments_router, prefix="/api")
+app.include_router(health_router, prefix="/api")
 
 @app.get("/")
 def read_root():
@@ -1,7 +1,7 @@
 from app.core.database import Base
 
 #import your models here
-from app.models.payment import Transaction
-from app.models.rewards import CreditTransaction,AdWatch
-from app.models.style import Category,Style,Challenge,Creation,GuestUsage,Collection,CollectionCreation
-from app.models.user import User
\ No newline at end of file
+from app.models.payment import Transaction,PaymentWebhookEvent
+from app.models.rewards import CreditTransaction,AdWatch,AdWatchCounter
+from app.models.style import Category,Style,Challenge,Creation,CreationRanking,GuestUsage,Collection,CollectionCreation
+from app.models.user import User,UserStats
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, JSON, Index, text
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -15,3 +15,24 @@ class Transaction(Base):
     status = Column(String, default="created", index=True) # created, success, failed
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+class PaymentWebhookEvent(Base):
+    """
+    Inbox of Razorpay webhook deliveries. The webhook endpoint only verifies
+    and stores the event; a background batch processor applies it.
+    """
+    __tablename__ = "payment_webhook_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_id = Column(String(100), unique=True, nullable=False)  # X-Razorpay-Event-Id
+    event_type = Column(String(50), nullable=False)
+    payload = Column(JSON, nullable=False)
+    status = Column(String(20), nullable=False, default="pending") # pending, processed, ignored, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String(500), nullable=True)
+    received_at = Column(DateTime(timezone=True), server_default=func.now())
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_payment_webhook_events_pending", "id", postgresql_where=text("status = 'pending'")),
+    )
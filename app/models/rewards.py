@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Date
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Date, Index, UniqueConstraint
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -28,5 +28,22 @@ class AdWatch(Base):
     ad_provider = Column(String(50), default="admob")
     ad_unit_id = Column(String(100), nullable=True)
     credits_earned = Column(Integer, default=1)
+    reward_id = Column(String(100), nullable=True) # AdMob reward callback id (idempotency key)
     watched_date = Column(Date, server_default=func.current_date())
     watched_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("reward_id", name="uq_ad_watches_reward_id"),
+        Index("ix_ad_watches_user_id_watched_date", "user_id", "watched_date"),
+    )
+
+class AdWatchCounter(Base):
+    """
+    Rewarded ads watched per user per (UTC) day. Incremented with a conditional
+    upsert so the daily limit holds under concurrent requests.
+    """
+    __tablename__ = "ad_watch_counters"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    watch_date = Column(Date, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
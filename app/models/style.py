@@ -1,6 +1,6 @@
 from sqlalchemy import (
     Column, Integer, String, Boolean, DateTime, Float,
-    ForeignKey, JSON, Text
+    ForeignKey, JSON, Text, Index, text
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -163,6 +163,44 @@ class Creation(Base):
     challenge  = relationship("Challenge", back_populates="creations", foreign_keys=[challenge_id])
     collections = relationship("Collection", secondary="collection_creations", back_populates="creations")
 
+    # Partial indexes for the hot read paths (migration 0006)
+    __table_args__ = (
+        Index(
+            "ix_creations_feed_new", created_at.desc(), id.desc(),
+            postgresql_where=text("is_public AND NOT is_deleted AND challenge_id IS NULL"),
+        ),
+        Index(
+            "ix_creations_user_history", user_id, created_at.desc(), id.desc(),
+            postgresql_where=text("NOT is_deleted"),
+        ),
+        Index(
+            "ix_creations_challenge_leaderboard", challenge_id, similarity_score.desc().nulls_last(), id,
+            postgresql_where=text("NOT is_deleted AND challenge_id IS NOT NULL"),
+        ),
+    )
+
+
+class CreationRanking(Base):
+    """
+    Ranking keys for the community feed's hot / top sorts, one row per feed
+    creation (public, not deleted, not a challenge entry). Likes update the
+    row in the same transaction; a periodic refresh repairs it from
+    `creations` (see app/core/feed_ranking.py). Both sorts are index scans.
+    """
+    __tablename__ = "creation_rankings"
+
+    creation_id  = Column(Integer, ForeignKey("creations.id", ondelete="CASCADE"), primary_key=True)
+    likes_count  = Column(Integer, nullable=False, default=0)
+    views_count  = Column(Integer, nullable=False, default=0)
+    created_at   = Column(DateTime(timezone=True), nullable=False)   # copy of creations.created_at
+    hot_score    = Column(Float, nullable=False)
+    updated_at   = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_creation_rankings_hot", hot_score.desc(), creation_id.desc()),
+        Index("ix_creation_rankings_top", likes_count.desc(), creation_id.desc()),
+    )
+
 
 class GuestUsage(Base):
     """
@@ -191,7 +229,10 @@ class CreationLike(Base):
     created_at   = Column(DateTime(timezone=True), server_default=func.now())
 
     # Ensure one user can only like a creation once
-    __table_args__ = (UniqueConstraint('user_id', 'creation_id', name='_user_creation_like_uc'),)
+    __table_args__ = (
+        UniqueConstraint('user_id', 'creation_id', name='_user_creation_like_uc'),
+        Index("ix_creation_likes_user_created", "user_id", created_at.desc()),
+    )
 
 
 class Collection(Base):
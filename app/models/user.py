@@ -27,3 +27,18 @@ class User(Base):
     # Relationships
     creations   = relationship("Creation", back_populates="user")
     collections = relationship("Collection", back_populates="user", cascade="all, delete-orphan")
+
+
+class UserStats(Base):
+    """
+    Denormalised public-profile counters, one row per user with at least one
+    public creation. Kept current by the creation / like / visibility write
+    paths (see app/core/user_stats.py) and periodically repaired from
+    `creations`, so reads never aggregate over a user's creations.
+    """
+    __tablename__ = "user_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    creations_count = Column(Integer, nullable=False, default=0)  # public, not deleted
+    total_likes = Column(Integer, nullable=False, default=0)      # likes on those creations
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
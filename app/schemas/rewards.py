@@ -1,10 +1,16 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime
 
+# Length of ad_watches.reward_id / ad_unit_id (String(100))
+AD_ID_MAX_LENGTH = 100
+
 class AdRewardRequest(BaseModel):
-    ad_unit_id: Optional[str] = "rewarded_ad_main"
+    ad_unit_id: Optional[str] = Field("rewarded_ad_main", max_length=AD_ID_MAX_LENGTH)
     platform: Optional[str] = "android"
+    # Unique id of this reward event (AdMob SSV transaction_id, or a UUID the
+    # app generates per onUserEarnedReward). Retries with the same id are no-ops.
+    reward_id: Optional[str] = Field(None, max_length=AD_ID_MAX_LENGTH)
 
 class AdRewardResponseData(BaseModel):
     credits_earned: int
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, ConfigDict
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime
 
 
@@ -78,6 +78,63 @@ class CreationOut(BaseModel):
 GenerateResponse.model_rebuild()
 
 
+# ─── Compact feed shape (?shape=compact) ─────────────────────────────────────
+# Items reference their style by id; each referenced style / category is sent
+# once in the page's top-level `styles` / `categories` maps.
+
+class CompactStyleOut(BaseModel):
+    id: int
+    name: str
+    slug: str
+    description: Optional[str] = None
+    preview_url: str
+    category_id: int
+    uses_count: int
+    is_trending: bool
+    is_new: bool
+    tags: Optional[List[str]] = []
+    credits_required: int
+
+
+class CompactCreationOut(BaseModel):
+    id: int
+    original_image_url: str
+    generated_image_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    style_id: int
+    user_name: Optional[str] = None
+    likes_count: int = 0
+    is_liked: bool = False
+    mood: Optional[str] = None
+    weather: Optional[str] = None
+    dress_style: Optional[str] = None
+    is_public: bool
+    credits_used: int
+    credits_remaining: Optional[int] = None
+    similarity_score: float = 0
+    challenge_id: Optional[int] = None
+    processing_time: Optional[float] = None
+    created_at: datetime
+
+
+class FeedPage(BaseModel):
+    """GET /creations/feed (default shape)."""
+    success: bool = True
+    data: List[CreationOut]
+    total: int
+    next_cursor: Optional[str] = None
+
+
+class CompactFeedPage(BaseModel):
+    """GET /creations/feed?shape=compact; map keys are the ids as strings."""
+    success: bool = True
+    data: List[CompactCreationOut]
+    styles: Dict[str, CompactStyleOut]
+    categories: Dict[str, CategoryOut]
+    total: int
+    next_cursor: Optional[str] = None
+
+
 # ─── Challenges ─────────────────────────────────────────────────────────────
 
 class ChallengeOut(BaseModel):
@@ -106,6 +163,7 @@ class StoryStep(BaseModel):
 
 class ChallengeLeaderboardEntry(BaseModel):
     id: int
+    rank: Optional[int] = None
     user_name: str
     avatar_url: Optional[str] = None
     similarity_score: float
@@ -0,0 +1,89 @@
+"""
+Gunicorn configuration — MagicPic Backend (production)
+======================================================
+Gunicorn is the process manager; each worker runs the FastAPI app on a
+uvicorn event loop (`uvicorn_worker.UvicornWorker`). With `uvicorn[standard]`
+installed the worker picks uvloop and httptools automatically ("auto" loop
+and http implementations), falling back to asyncio / h11 when they are absent.
+
+Every value can be overridden through the environment so the same image can
+be sized per instance type without a rebuild:
+
+    WEB_CONCURRENCY            number of worker processes (default: auto, see below)
+    WEB_MAX_WORKERS            upper bound for the auto-sized worker count (default: 8)
+    PORT                       listen port (default: 8000)
+    GUNICORN_TIMEOUT           seconds before a silent worker is killed (default: 120)
+    GUNICORN_GRACEFUL_TIMEOUT  seconds in-flight requests get on reload/stop (default: 30)
+    GUNICORN_KEEPALIVE         idle keep-alive seconds (default: 65)
+    GUNICORN_MAX_REQUESTS      recycle a worker after N requests (default: 20000)
+    GUNICORN_MAX_REQUESTS_JITTER  random spread so workers don't recycle together (default: 2000)
+    GUNICORN_LOG_LEVEL         gunicorn log level (default: info)
+
+Graceful reload (new code / config, no dropped requests):
+    kill -HUP <gunicorn master pid>        # inside the container the master is PID 1
+
+Usage:
+    gunicorn -c gunicorn.conf.py app.main:app
+"""
+
+import os
+
+
+def _cpu_count() -> int:
+    # Respect the CPU affinity / cgroup cpuset of the container rather than
+    # the host's core count.
+    try:
+        return len(os.sched_getaffinity(0)) or 1
+    except AttributeError:  # macOS / Windows
+        return os.cpu_count() or 1
+
+
+def _auto_workers() -> int:
+    # Handlers are a mix of async endpoints and sync endpoints that run in the
+    # threadpool while waiting on Postgres / S3 / Gemini, so a worker spends a
+    # lot of time idle on I/O. 2 x cores + 1 keeps every core busy without
+    # over-committing database connections (each worker owns its own pool).
+    max_workers = int(os.environ.get("WEB_MAX_WORKERS", 8))
+    return max(1, min(_cpu_count() * 2 + 1, max_workers))
+
+
+# ─── Server socket ────────────────────────────────────────────────────────────
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+backlog = 2048
+
+# ─── Worker processes ─────────────────────────────────────────────────────────
+
+workers = int(os.environ.get("WEB_CONCURRENCY") or _auto_workers())
+worker_class = "uvicorn_worker.UvicornWorker"
+
+# Each worker builds its own SQLAlchemy engine / connection pool after fork,
+# so the app must NOT be preloaded in the master.
+preload_app = False
+
+# Generation requests wait 10–30 s on Gemini; the uvicorn worker heartbeats
+# from its event loop, so this only fires if the loop itself is blocked.
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+
+# Keep-alive must outlive the load balancer's idle timeout (60 s on AWS ALB),
+# otherwise the LB reuses sockets the worker has already closed → sporadic 502s.
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 65))
+
+# Recycle workers periodically to cap slow memory growth (image buffers,
+# SDK clients). Jitter spreads restarts so capacity never drops all at once.
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 20000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 2000))
+
+# ─── Logging ──────────────────────────────────────────────────────────────────
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.environ.get("GUNICORN_LOG_LEVEL", "info")
+
+# Honour X-Forwarded-* from the load balancer / reverse proxy in front of us.
+forwarded_allow_ips = "*"
+
+
+def when_ready(server):
+    server.log.info("MagicPic API ready: %s worker(s) of %s", workers, worker_class)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for Google's AdMob SSV key server, for testing the
+GET /api/rewards/admob-ssv callback without real ads.
+
+It generates a throwaway P-256 key, serves it in the same JSON format as
+https://www.gstatic.com/admob/reward/verifier-keys.json, and can sign
+callback query strings with it.
+
+1. Start the stub:
+       python scripts/admob_ssv_stub.py serve --port 8765
+2. Start the API pointing at it:
+       ADMOB_VERIFIER_KEYS_URL=http://127.0.0.1:8765/verifier-keys.json uvicorn app.main:app
+3. Fire a burst of signed callbacks (unique transaction ids, plus replays):
+       python scripts/admob_ssv_stub.py burst --stub http://127.0.0.1:8765 \\
+           --api http://127.0.0.1:8000 --user-id 1 --count 200 --concurrency 50
+
+`GET /sign?user_id=1&transaction_id=abc` on the stub returns a signed query
+string, for use with curl.
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import httpx
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+KEY_ID = "1234567890"
+
+
+def _make_key():
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode()
+    return private_key, pem
+
+
+def sign_callback(private_key, user_id: str, transaction_id: str, ad_unit: str = "1234567890") -> str:
+    """Build a callback query string the way AdMob does: signature + key_id last."""
+    content = urlencode({
+        "ad_network": "5450213213286189855",
+        "ad_unit": ad_unit,
+        "reward_amount": 1,
+        "reward_item": "Credit",
+        "timestamp": int(time.time() * 1000),
+        "transaction_id": transaction_id,
+        "user_id": user_id,
+    })
+    signature = private_key.sign(content.encode(), ec.ECDSA(hashes.SHA256()))
+    b64 = base64.urlsafe_b64encode(signature).decode().rstrip("=")
+    return f"{content}&signature={b64}&key_id={KEY_ID}"
+
+
+def serve(port: int):
+    private_key, pem = _make_key()
+    keys_body = json.dumps({"keys": [{"keyId": int(KEY_ID), "pem": pem, "base64": ""}]}).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/verifier-keys.json":
+                body = keys_body
+            elif url.path == "/sign":
+                q = parse_qs(url.query)
+                body = sign_callback(
+                    private_key,
+                    q.get("user_id", ["1"])[0],
+                    q.get("transaction_id", [uuid.uuid4().hex])[0],
+                ).encode()
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    print(f"Serving verifier keys at http://127.0.0.1:{port}/verifier-keys.json (key_id={KEY_ID})")
+    ThreadingHTTPServer(("127.0.0.1", port), Handler).serve_forever()
+
+
+async def burst(stub: str, api: str, user_id: str, count: int, concurrency: int, replays: int):
+    async with httpx.AsyncClient(timeout=30) as client:
+        # Sign up front so the burst itself only measures the API
+        tx_ids = [uuid.uuid4().hex for _ in range(count)]
+        queries = [
+            (await client.get(f"{stub}/sign", params={"user_id": user_id, "transaction_id": tx})).text
+            for tx in tx_ids
+        ]
+        queries += queries[:replays]  # AdMob retries / duplicate deliveries
+
+        sem = asyncio.Semaphore(concurrency)
+        statuses, messages, latencies = Counter(), Counter(), []
+
+        async def one(query: str):
+            async with sem:
+                start = time.perf_counter()
+                resp = await client.get(f"{api}/api/rewards/admob-ssv?{query}")
+                latencies.append(time.perf_counter() - start)
+                statuses[resp.status_code] += 1
+                messages[resp.json().get("message") or resp.json().get("error", {}).get("code")] += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(q) for q in queries))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"{len(queries)} callbacks in {elapsed:.2f}s ({len(queries) / elapsed:.0f}/s), "
+          f"p50={latencies[len(latencies) // 2] * 1000:.1f}ms p99={latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f}ms")
+    print("status codes:", dict(statuses))
+    print("messages:", dict(messages))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AdMob SSV key server stand-in")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_serve = sub.add_parser("serve")
+    p_serve.add_argument("--port", type=int, default=8765)
+    p_burst = sub.add_parser("burst")
+    p_burst.add_argument("--stub", default="http://127.0.0.1:8765")
+    p_burst.add_argument("--api", default="http://127.0.0.1:8000")
+    p_burst.add_argument("--user-id", default="1")
+    p_burst.add_argument("--count", type=int, default=100)
+    p_burst.add_argument("--concurrency", type=int, default=50)
+    p_burst.add_argument("--replays", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.cmd == "serve":
+        serve(args.port)
+    else:
+        asyncio.run(burst(args.stub, args.api, args.user_id, args.count, args.concurrency, args.replays))
+
+
+if __name__ == "__main__":
+    main()
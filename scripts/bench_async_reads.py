@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark the hot read endpoints on the sync (threadpool) path vs the
+async (asyncpg) path.
+
+Starts the API twice against the database configured in config.properties /
+environment (point it at a local, seeded Postgres — NOT production):
+once with DB_ASYNC_READS=false and once with DB_ASYNC_READS=true. For each
+mode it load-tests the same endpoints and prints req/s and p99 side by side.
+
+Usage:
+    python scripts/bench_async_reads.py --concurrency 64 --duration 20
+    python scripts/bench_async_reads.py --profile-user-id 1 --port 8050
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from load_test import run as run_load  # noqa: E402
+
+
+def _wait_until_up(base_url: str, timeout: float = 30) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{base_url}/", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.3)
+    raise RuntimeError(f"Server at {base_url} did not come up within {timeout}s")
+
+
+def _bench_mode(async_reads: bool, args, paths: list[str]) -> dict:
+    env = dict(os.environ, DB_ASYNC_READS="true" if async_reads else "false")
+    # Single process so both modes get exactly the same CPU budget
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=ROOT, env=env,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        _wait_until_up(base_url)
+        return {
+            path: asyncio.run(run_load(base_url + path, args.concurrency, args.duration, {}))
+            for path in paths
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=15)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync vs async read path benchmark")
+    parser.add_argument("-c", "--concurrency", type=int, default=64)
+    parser.add_argument("-d", "--duration", type=float, default=20)
+    parser.add_argument("--port", type=int, default=8050)
+    parser.add_argument("--profile-user-id", type=int, default=1, help="User id used for /api/auth/profile/{id}")
+    args = parser.parse_args()
+
+    paths = [
+        "/api/creations/feed?limit=20",
+        "/api/styles",
+        "/api/challenges/current",
+        f"/api/auth/profile/{args.profile_user_id}",
+    ]
+
+    results = {
+        "sync": _bench_mode(False, args, paths),
+        "async": _bench_mode(True, args, paths),
+    }
+
+    print(f"\nconcurrency={args.concurrency} duration={args.duration:.0f}s per endpoint\n")
+    print(f"{'endpoint':40} {'sync req/s':>11} {'sync p99':>10} {'async req/s':>12} {'async p99':>10}")
+    for path in paths:
+        s, a = results["sync"][path], results["async"][path]
+        print(
+            f"{path:40} {s['rps']:>11.1f} {s['p99_ms']:>8.1f}ms "
+            f"{a['rps']:>12.1f} {a['p99_ms']:>8.1f}ms"
+        )
+        if s["errors"] or a["errors"]:
+            print(f"{'':40} errors: sync={s['errors']} async={a['errors']}")
+
+
+if __name__ == "__main__":
+    main()
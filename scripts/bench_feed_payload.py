@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Payload size and serialisation time for one community-feed page.
+
+Builds a feed page of N synthetic creations (each embedding its full style
+and category, exactly as GET /api/creations/feed returns them) and compares:
+
+- serialisation: FastAPI's jsonable_encoder + stdlib JSONResponse (before)
+  vs jsonable_encoder + ORJSONResponse (after);
+- bytes on the wire: identity vs gzip vs brotli at the configured levels,
+  plus the time each compressor takes;
+- the full shape vs ?shape=compact (styles / categories sent once per page).
+
+No database or server needed.
+
+Usage:
+    python scripts/bench_feed_payload.py
+    python scripts/bench_feed_payload.py --items 50 --repeat 500
+"""
+
+import argparse
+import gzip
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.responses import ORJSONResponse  # noqa: E402
+from app.schemas.style import (  # noqa: E402
+    CategoryOut, CompactCreationOut, CompactStyleOut, CreationOut, StyleOut,
+)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+CDN = "https://magicpic-assets.s3.ap-south-1.amazonaws.com"
+
+
+def build_feed_page(items: int) -> dict:
+    categories = [
+        CategoryOut(
+            id=c, name=f"Category {c}", slug=f"category-{c}", icon="✨",
+            description="Dreamy portraits in a hand-painted animation style.",
+            preview_url=f"{CDN}/categories/{c}/preview.jpg", display_order=c,
+        )
+        for c in range(1, 5)
+    ]
+    styles = [
+        StyleOut(
+            id=s, name=f"Style {s}", slug=f"style-{s}",
+            description="Soft pastel colours, warm light and painterly textures.",
+            preview_url=f"{CDN}/styles/{s}/preview.jpg", category=categories[s % len(categories)],
+            uses_count=1000 + s * 37, is_trending=s % 3 == 0, is_new=s % 5 == 0,
+            tags=["anime", "portrait", "pastel"], credits_required=2,
+        )
+        for s in range(1, 13)
+    ]
+    data = [
+        CreationOut(
+            id=10_000 + i,
+            original_image_url=f"{CDN}/creations/originals/{i % 97}/{i:08x}.jpg",
+            generated_image_url=f"{CDN}/creations/generated/{i % 97}/{i:08x}.jpg",
+            thumbnail_url=f"{CDN}/creations/generated/{i % 97}/{i:08x}.jpg",
+            style=styles[i % len(styles)],
+            user_name=f"User {i % 31}",
+            likes_count=i * 7 % 250,
+            is_liked=i % 4 == 0,
+            mood="happy", weather="sunny", dress_style="casual",
+            is_public=True, credits_used=2, processing_time=6.4,
+            created_at=datetime(2026, 10, 1, 12, i % 60, tzinfo=timezone.utc),
+        )
+        for i in range(items)
+    ]
+    return {"success": True, "data": data, "total": 12_345}
+
+
+def build_compact_page(page: dict) -> dict:
+    """The ?shape=compact equivalent of a build_feed_page() page."""
+    styles, categories = {}, {}
+    for c in page["data"]:
+        style = c.style
+        styles.setdefault(str(style.id), CompactStyleOut(
+            **style.model_dump(exclude={"category"}), category_id=style.category.id,
+        ))
+        categories.setdefault(str(style.category.id), style.category)
+    data = [CompactCreationOut(**c.model_dump(exclude={"style"}), style_id=c.style.id) for c in page["data"]]
+    return {"success": True, "data": data, "styles": styles, "categories": categories, "total": page["total"]}
+
+
+def _time_us(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=300)
+    args = parser.parse_args()
+
+    page = build_feed_page(args.items)
+    encoded = jsonable_encoder(page)
+    body_before = JSONResponse(encoded).body
+    body_after = ORJSONResponse(encoded).body
+
+    print(f"Feed page: {args.items} items\n")
+    print("Serialisation (per response)")
+    t_encode = _time_us(lambda: jsonable_encoder(page), args.repeat)
+    t_std = _time_us(lambda: JSONResponse(encoded), args.repeat)
+    t_orjson = _time_us(lambda: ORJSONResponse(encoded), args.repeat)
+    print(f"  jsonable_encoder             {t_encode:9.0f} us  (both)")
+    print(f"  JSONResponse   (before)      {t_std:9.0f} us")
+    print(f"  ORJSONResponse (after)       {t_orjson:9.0f} us  ({t_std / t_orjson:.1f}x faster)")
+    print(f"  total before / after         {t_encode + t_std:9.0f} / {t_encode + t_orjson:.0f} us\n")
+
+    print("Bytes on the wire")
+    print(f"  identity (before)            {len(body_before):9,d} B")
+    print(f"  identity (orjson)            {len(body_after):9,d} B")
+    gz = gzip.compress(body_after, compresslevel=settings.GZIP_COMPRESS_LEVEL)
+    t_gz = _time_us(lambda: gzip.compress(body_after, compresslevel=settings.GZIP_COMPRESS_LEVEL), args.repeat)
+    print(f"  gzip -{settings.GZIP_COMPRESS_LEVEL}                      {len(gz):9,d} B  "
+          f"({len(body_before) / len(gz):.1f}x smaller, {t_gz:.0f} us)")
+    if brotli is not None:
+        br = brotli.compress(body_after, mode=brotli.MODE_TEXT, quality=settings.BROTLI_QUALITY)
+        t_br = _time_us(
+            lambda: brotli.compress(body_after, mode=brotli.MODE_TEXT, quality=settings.BROTLI_QUALITY), args.repeat
+        )
+        print(f"  brotli q{settings.BROTLI_QUALITY}                    {len(br):9,d} B  "
+              f"({len(body_before) / len(br):.1f}x smaller, {t_br:.0f} us)")
+    else:
+        print("  brotli                       (not installed: pip install brotli)")
+
+    compact = build_compact_page(page)
+    compact_body = ORJSONResponse(jsonable_encoder(compact)).body
+    t_compact = _time_us(lambda: ORJSONResponse(jsonable_encoder(compact)), args.repeat)
+    t_full = t_encode + t_orjson
+    print("\nCompact shape (?shape=compact)")
+    print(f"  encode + render full / compact {t_full:7.0f} / {t_compact:.0f} us  ({t_full / t_compact:.1f}x faster)")
+    print(f"  identity full / compact      {len(body_after):9,d} / {len(compact_body):,d} B")
+    gz_compact = gzip.compress(compact_body, compresslevel=settings.GZIP_COMPRESS_LEVEL)
+    print(f"  gzip full / compact          {len(gz):9,d} / {len(gz_compact):,d} B")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Per-item serialisation cost and parity of the list-endpoint fast path.
+
+For each builder in app.api.serializers, compares the Pydantic path the
+endpoints used before (nested model construction + jsonable_encoder +
+ORJSONResponse) with the dict builder + ORJSONResponse, on transient ORM
+objects (no database needed):
+
+- parity: the two response bodies must be byte-identical; any difference is
+  printed and the script exits non-zero. Run it after changing a builder or
+  a schema in app.schemas.style / app.schemas.collection.
+- cost: microseconds per item for each path.
+
+Usage:
+    python scripts/bench_serializers.py
+    python scripts/bench_serializers.py --items 50 --repeat 500
+    python scripts/bench_serializers.py --parity-only
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from app.api import serializers  # noqa: E402
+from app.api.creations import _creation_to_out  # noqa: E402
+from app.core.responses import ORJSONResponse  # noqa: E402
+from app.models.style import Category, Collection, Creation, Style  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.schemas.collection import CollectionDetailOut  # noqa: E402
+from app.schemas.style import CompactCreationOut, CompactStyleOut  # noqa: E402
+
+CDN = "https://magicpic-assets.s3.ap-south-1.amazonaws.com"
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+def build_creations(items: int) -> list[Creation]:
+    """Transient ORM rows covering the edge cases the builders must match:
+    NULL slugs / tags / URLs / likes, anonymous users, non-UTC offsets."""
+    categories = [
+        Category(
+            id=c, name=f"Category {c}", slug=None if c == 4 else f"category-{c}", icon="✨",
+            description="Dreamy portraits in a hand-painted animation style.",
+            preview_url=None if c == 3 else f"{CDN}/categories/{c}/preview.jpg", display_order=c,
+        )
+        for c in range(1, 5)
+    ]
+    styles = [
+        Style(
+            id=s, name=f"Style {s}", slug=None if s == 7 else f"style-{s}",
+            description=None if s % 4 == 0 else "Soft pastel colours, warm light and painterly textures.",
+            preview_url=f"{CDN}/styles/{s}/preview.jpg",
+            category=categories[s % len(categories)], category_id=categories[s % len(categories)].id,
+            uses_count=1000 + s * 37, is_trending=s % 3 == 0, is_new=s % 5 == 0,
+            tags=None if s % 6 == 0 else ["anime", "portrait", "pastel"], credits_required=2,
+        )
+        for s in range(1, 13)
+    ]
+    users = [User(id=u, name=f"User {u}") for u in range(1, 32)]
+    creations = []
+    for i in range(items):
+        style = styles[i % len(styles)]
+        tz = IST if i % 5 == 0 else timezone.utc
+        creations.append(Creation(
+            id=10_000 + i,
+            original_image_url=f"{CDN}/creations/originals/{i % 97}/{i:08x}.jpg",
+            generated_image_url=None if i % 9 == 0 else f"{CDN}/creations/generated/{i % 97}/{i:08x}.jpg",
+            thumbnail_url=f"{CDN}/creations/generated/{i % 97}/{i:08x}.jpg",
+            style=style, style_id=style.id,
+            user=None if i % 11 == 0 else users[i % len(users)],
+            likes_count=None if i % 13 == 0 else i * 7 % 250,
+            mood="happy", weather=None if i % 2 else "sunny", dress_style="casual",
+            is_public=True, credits_used=2, processing_time=None if i % 8 == 0 else 6.4 + i / 100,
+            created_at=datetime(2026, 10, 1, 12, i % 60, i % 60, (i * 7919) % 1_000_000, tzinfo=tz),
+        ))
+    return creations
+
+
+def _body(content) -> bytes:
+    return ORJSONResponse(content).body
+
+
+# ── Pydantic reference paths (what the endpoints returned before) ────────────
+
+def pydantic_creations(creations, liked_ids):
+    return jsonable_encoder([_creation_to_out(c, is_liked=c.id in liked_ids) for c in creations])
+
+
+def pydantic_styles(creations):
+    return jsonable_encoder([_creation_to_out(c).style for c in creations])
+
+
+def pydantic_compact_page(creations, liked_ids):
+    styles, categories, data = {}, {}, []
+    for c in creations:
+        out = _creation_to_out(c, is_liked=c.id in liked_ids)
+        styles.setdefault(str(out.style.id), CompactStyleOut(
+            **out.style.model_dump(exclude={"category"}), category_id=out.style.category.id,
+        ))
+        categories.setdefault(str(out.style.category.id), out.style.category)
+        data.append(CompactCreationOut(**out.model_dump(exclude={"style"}), style_id=out.style.id))
+    return jsonable_encoder({"data": data, "styles": styles, "categories": categories})
+
+
+def pydantic_collection(col, creations, liked_ids):
+    return jsonable_encoder(CollectionDetailOut(
+        id=col.id, user_id=col.user_id, name=col.name, description=col.description, cover_url=col.cover_url,
+        created_at=col.created_at, updated_at=col.updated_at, creations_count=len(creations),
+        creations=[_creation_to_out(c, is_liked=c.id in liked_ids) for c in creations],
+    ))
+
+
+# ── Fast paths ───────────────────────────────────────────────────────────────
+
+def fast_creations(creations, liked_ids):
+    return [serializers.creation_dict(c, is_liked=c.id in liked_ids) for c in creations]
+
+
+def fast_styles(creations):
+    return [serializers.style_dict(c.style) for c in creations]
+
+
+def fast_compact_page(creations, liked_ids):
+    return serializers.compact_page(creations, liked_ids)
+
+
+def fast_collection(col, creations, liked_ids):
+    return serializers.collection_detail_dict(col, fast_creations(creations, liked_ids))
+
+
+def _first_difference(a: bytes, b: bytes) -> str:
+    i = next((i for i, (x, y) in enumerate(zip(a, b)) if x != y), min(len(a), len(b)))
+    return f"at byte {i}:\n    pydantic: ...{a[max(i - 60, 0):i + 60]!r}\n    fast:     ...{b[max(i - 60, 0):i + 60]!r}"
+
+
+def _time_us(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--parity-only", action="store_true")
+    args = parser.parse_args()
+
+    creations = build_creations(args.items)
+    liked_ids = {c.id for c in creations[::3]}
+    col = Collection(
+        id=7, user_id=1, name="Favourites", description=None, cover_url=None,
+        created_at=datetime(2026, 9, 30, 8, 15, 0, 250_000, tzinfo=timezone.utc), updated_at=None,
+    )
+
+    cases = [
+        ("creation (feed / mine / liked)", lambda: pydantic_creations(creations, liked_ids),
+         lambda: fast_creations(creations, liked_ids)),
+        ("creation, compact page", lambda: pydantic_compact_page(creations, liked_ids),
+         lambda: fast_compact_page(creations, liked_ids)),
+        ("style (styles / trending)", lambda: pydantic_styles(creations), lambda: fast_styles(creations)),
+        ("collection detail", lambda: pydantic_collection(col, creations, liked_ids),
+         lambda: fast_collection(col, creations, liked_ids)),
+    ]
+
+    failed = False
+    print(f"Parity ({args.items} items)")
+    for name, reference, fast in cases:
+        expected, actual = _body(reference()), _body(fast())
+        if expected == actual:
+            print(f"  {name:32s} OK ({len(actual):,d} B)")
+        else:
+            failed = True
+            print(f"  {name:32s} MISMATCH {_first_difference(expected, actual)}")
+    if failed or args.parity_only:
+        sys.exit(1 if failed else 0)
+
+    print("\nCost per item (build + encode + render)")
+    print(f"  {'':32s} {'pydantic':>10s} {'fast':>10s}")
+    for name, reference, fast in cases:
+        t_ref = _time_us(lambda: _body(reference()), args.repeat) / args.items
+        t_fast = _time_us(lambda: _body(fast()), args.repeat) / args.items
+        print(f"  {name:32s} {t_ref:8.1f} us {t_fast:8.1f} us  ({t_ref / t_fast:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
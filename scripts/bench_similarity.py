@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Calibration benchmark for challenge scoring (app/core/similarity.py).
+
+Synthetic mode (default, no network or database): renders target images
+from a style (palette, stripe texture, blob scale) and a composition. For
+each target it scores:
+
+- ladders of edits of increasing strength (re-encoding, brightness, blur,
+  noise, crop) of the target itself;
+- "same style, new content": other compositions in the target's style, the
+  closest stand-in for a real entry (the user's photo restyled toward the
+  target; Gemini was told to ignore the subject);
+- the target's composition in a new style, and unrelated images.
+
+It fails unless scores fall along every ladder, the mildest edits always
+beat the unrelated images, and same-style images score clearly above
+unrelated ones (and above 0, so entries don't tie at the floor). It also
+measures one-by-one vs batched throughput. SCORE_FLOOR should sit at the raw
+similarity of the unrelated images.
+
+Synthetic images are no substitute for real entries: run challenge mode
+against stored Gemini scores before making the local backend the default.
+
+Challenge mode (--challenge-id): re-scores a challenge's stored entries
+with the local backend and compares them with their stored scores (Gemini,
+for entries scored before the switch): Pearson / Spearman correlation,
+mean absolute difference, top-10 overlap, and the linear map
+stored ≈ a * local + b. --gemini also re-scores a sample live with Gemini,
+to measure its latency and how much it disagrees with itself.
+
+Usage:
+    python scripts/bench_similarity.py
+    python scripts/bench_similarity.py --targets 20 --batch 256
+    python scripts/bench_similarity.py --challenge-id 12 --limit 200
+    python scripts/bench_similarity.py --challenge-id 12 --limit 30 --gemini
+"""
+
+import argparse
+import io
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx  # noqa: E402
+import numpy as np  # noqa: E402
+from PIL import Image, ImageEnhance, ImageFilter  # noqa: E402
+
+from app.core import similarity  # noqa: E402
+
+SIZE = 512
+
+# Each edit at increasing strength; scores must not rise along a ladder
+LADDERS = {
+    "jpeg quality": [90, 60, 30, 10],
+    "brightness": [1.05, 1.15, 1.3, 1.5],
+    "blur radius": [1, 2, 4, 8],
+    "noise sigma": [5, 15, 30, 60],
+    "crop": [0.95, 0.85, 0.7, 0.5],
+}
+
+
+def _jpeg(image: Image.Image, quality: int = 90) -> bytes:
+    out = io.BytesIO()
+    image.convert("RGB").save(out, "JPEG", quality=quality)
+    return out.getvalue()
+
+
+@dataclass(frozen=True)
+class Style:
+    """What a challenge's look is made of: palette, stripe texture, blob scale."""
+    palette: np.ndarray        # (5, 3)
+    stripe_angle: float
+    stripe_freq: float
+    stripe_mix: float
+    blob_radius: tuple
+
+
+def _style(rng: np.random.Generator) -> Style:
+    return Style(
+        palette=rng.integers(0, 256, size=(5, 3)).astype(np.float64),
+        stripe_angle=rng.uniform(0, np.pi),
+        stripe_freq=rng.uniform(8, 30),
+        stripe_mix=rng.uniform(0.15, 0.45),
+        blob_radius=tuple(sorted(rng.uniform(0.04, 0.3, size=2))),
+    )
+
+
+def _render(style: Style, content_seed: int) -> Image.Image:
+    """
+    A synthetic 'artwork': `style` decides the colours and texture, `content_seed`
+    the composition (gradient direction, where the blobs are, how many).
+    """
+    content = np.random.default_rng(content_seed)
+    palette = style.palette
+    y, x = np.mgrid[0:SIZE, 0:SIZE] / SIZE
+    angle = content.uniform(0, 2 * np.pi)
+    t = (np.cos(angle) * (x - 0.5) + np.sin(angle) * (y - 0.5) + 1) / 2
+    canvas = palette[0] * (1 - t[..., None]) + palette[1] * t[..., None]
+
+    for i in range(content.integers(4, 9)):
+        cx, cy = content.uniform(0, 1, size=2)
+        r = content.uniform(*style.blob_radius)
+        mask = np.exp(-((x - cx) ** 2 + (y - cy) ** 2) / (2 * r * r))[..., None]
+        canvas = canvas * (1 - mask) + palette[2 + i % 3] * mask
+
+    phase = content.uniform(0, 2 * np.pi)
+    wave = (x * np.cos(style.stripe_angle) + y * np.sin(style.stripe_angle)) * style.stripe_freq * np.pi + phase
+    stripes = (np.sin(wave) > 0.6)[..., None]
+    canvas = np.where(stripes, canvas * (1 - style.stripe_mix) + palette[4] * style.stripe_mix, canvas)
+
+    return Image.fromarray(canvas.clip(0, 255).astype(np.uint8))
+
+
+def _unrelated(rng: np.random.Generator) -> Image.Image:
+    return _render(_style(rng), int(rng.integers(1 << 30)))
+
+
+def _edit(image: Image.Image, edit: str, strength: float, rng: np.random.Generator) -> bytes:
+    if edit == "jpeg quality":
+        return _jpeg(image, int(strength))
+    if edit == "brightness":
+        return _jpeg(ImageEnhance.Brightness(image).enhance(strength))
+    if edit == "blur radius":
+        return _jpeg(image.filter(ImageFilter.GaussianBlur(strength)))
+    if edit == "noise sigma":
+        pixels = np.asarray(image, dtype=np.float64) + rng.normal(0, strength, size=(SIZE, SIZE, 3))
+        return _jpeg(Image.fromarray(pixels.clip(0, 255).astype(np.uint8)))
+    if edit == "crop":
+        margin = int(SIZE * (1 - strength) / 2)
+        return _jpeg(image.crop((margin, margin, SIZE - margin, SIZE - margin)).resize((SIZE, SIZE)))
+    raise ValueError(edit)
+
+
+def synthetic(args) -> int:
+    rng = np.random.default_rng(args.seed)
+    steps = [(edit, strength) for edit, ladder in LADDERS.items() for strength in ladder]
+    scores = np.zeros((args.targets, len(steps)))
+    # What a real entry looks like: other content restyled toward the target
+    controls = {"same style, new content": [], "new style, same content": [], "unrelated": []}
+    raw_unrelated = []
+    beaten = np.zeros(len(steps), dtype=int)
+    restyled_beaten = 0
+
+    for t in range(args.targets):
+        style, content_seed = _style(rng), int(rng.integers(1 << 30))
+        target_image = _render(style, content_seed)
+        target = similarity.features([_jpeg(target_image)])
+
+        edited = [_edit(target_image, edit, strength, rng) for edit, strength in steps]
+        restyled = [_jpeg(_render(style, int(rng.integers(1 << 30)))) for _ in range(args.restyled)]
+        repainted = _jpeg(_render(_style(rng), content_seed))
+        unrelated = [_jpeg(_unrelated(rng)) for _ in range(args.unrelated)]
+        candidates = similarity.features(edited + restyled + [repainted] + unrelated)
+        result = similarity.similarity(target, candidates)
+        raw = similarity.raw_similarity(target, candidates)
+
+        n_edits, n_restyled = len(steps), len(restyled)
+        unrelated_from = n_edits + n_restyled + 1
+        scores[t] = result[:n_edits]
+        controls["same style, new content"].extend(result[n_edits:n_edits + n_restyled].tolist())
+        controls["new style, same content"].append(result[n_edits + n_restyled])
+        controls["unrelated"].extend(result[unrelated_from:].tolist())
+        raw_unrelated.extend(raw[unrelated_from:].tolist())
+        # Compared before clipping at 0
+        best_unrelated = raw[unrelated_from:].max()
+        beaten += raw[:n_edits] <= best_unrelated
+        restyled_beaten += int((raw[n_edits:n_edits + n_restyled] <= best_unrelated).sum())
+
+    print(f"{'candidate':<28} {'mean':>6} {'min':>6} {'max':>6} {'lost':>6}")
+    for i, (edit, strength) in enumerate(steps):
+        values = scores[:, i]
+        print(f"{f'{edit} {strength}':<28} {values.mean():6.1f} {values.min():6.1f} {values.max():6.1f} {beaten[i]:6d}")
+    for label, values in controls.items():
+        values = np.array(values)
+        print(f"{label:<28} {values.mean():6.1f} {values.min():6.1f} {values.max():6.1f}")
+    print("(lost: targets where an unrelated image scored at least as high as the edit)")
+
+    non_monotonic = []
+    for edit, ladder in LADDERS.items():
+        means = [scores[:, steps.index((edit, s))].mean() for s in ladder]
+        # Within half a point is a tie: the thumbnail already drops what a 1-2 px blur removes
+        if any(a < b - 0.5 for a, b in zip(means, means[1:])):
+            non_monotonic.append(edit)
+    # The mildest step of every edit must always beat unrelated images
+    mild_lost = sum(beaten[steps.index((edit, ladder[0]))] for edit, ladder in LADDERS.items())
+    restyled = np.array(controls["same style, new content"])
+    unrelated = np.array(controls["unrelated"])
+    restyled_total = args.targets * args.restyled
+
+    raw_unrelated = np.array(raw_unrelated)
+    print(
+        f"\nraw similarity of unrelated images: median {np.median(raw_unrelated):.3f}, "
+        f"p95 {np.percentile(raw_unrelated, 95):.3f} (SCORE_FLOOR = {similarity.SCORE_FLOOR})"
+    )
+    print(f"scores fall along every ladder: {'yes' if not non_monotonic else 'NO: ' + ', '.join(non_monotonic)}")
+    print(f"mildest edits lost to an unrelated image: {mild_lost}")
+    print(
+        f"same style, new content: {(restyled > 0).mean():.0%} score above 0, "
+        f"{restyled_beaten}/{restyled_total} lost to the best unrelated image of their target, "
+        f"{len(np.unique(restyled)) / len(restyled):.0%} distinct scores"
+    )
+    # Real entries are restyled content: they must rank above unrelated images and not pile up on one score
+    restyled_ok = restyled.mean() > unrelated.mean() + 20 and (restyled > 0).mean() >= 0.9
+
+    # Throughput: the request path (one entry, cached target) vs a batch
+    images = [_jpeg(_unrelated(rng)) for _ in range(args.batch)]
+    target = similarity.features([images[0]])
+    started = time.perf_counter()
+    for image in images:
+        similarity.similarity(target, similarity.features([image]))
+    one_by_one = time.perf_counter() - started
+    started = time.perf_counter()
+    similarity.similarity(target, similarity.features(images))
+    batched = time.perf_counter() - started
+    print(
+        f"\n{args.batch} entries: one by one {one_by_one * 1000:.0f} ms "
+        f"({one_by_one / args.batch * 1000:.2f} ms each), batched {batched * 1000:.0f} ms "
+        f"({batched / args.batch * 1000:.2f} ms each)"
+    )
+    return 0 if not non_monotonic and mild_lost == 0 and restyled_ok else 1
+
+
+def _download(urls: list[str]) -> list[bytes]:
+    with httpx.Client(timeout=20, follow_redirects=True) as client, ThreadPoolExecutor(8) as pool:
+        def get(url):
+            response = client.get(url)
+            response.raise_for_status()
+            return response.content
+        return list(pool.map(get, urls))
+
+
+def _rank(values: np.ndarray) -> np.ndarray:
+    ranks = np.empty(len(values))
+    ranks[np.argsort(values, kind="stable")] = np.arange(len(values))
+    return ranks
+
+
+def challenge(args) -> int:
+    from app.core import gemini as gemini_service
+    from app.core.database import SessionLocal
+    from app.models.style import Challenge, Creation
+
+    db = SessionLocal()
+    try:
+        ch = db.get(Challenge, args.challenge_id)
+        if ch is None or not ch.target_image_url:
+            print(f"Challenge {args.challenge_id} not found or has no target image")
+            return 1
+        rows = (
+            db.query(Creation.id, Creation.generated_image_url, Creation.similarity_score)
+            .filter(
+                Creation.challenge_id == ch.id,
+                Creation.is_deleted == False,  # noqa: E712
+                Creation.similarity_score.is_not(None),
+                Creation.generated_image_url.is_not(None),
+            )
+            .order_by(Creation.id.desc())
+            .limit(args.limit)
+            .all()
+        )
+    finally:
+        db.close()
+    if len(rows) < 3:
+        print(f"Challenge {ch.id} has {len(rows)} scored entries; need at least 3")
+        return 1
+
+    started = time.perf_counter()
+    images = _download([r.generated_image_url for r in rows])
+    downloaded = time.perf_counter() - started
+    started = time.perf_counter()
+    local = np.array(similarity.score_batch(ch.target_image_url, images))
+    scored = time.perf_counter() - started
+    stored = np.array([r.similarity_score for r in rows])
+
+    pearson = np.corrcoef(local, stored)[0, 1]
+    spearman = np.corrcoef(_rank(local), _rank(stored))[0, 1]
+    slope, intercept = np.polyfit(local, stored, 1)
+    top = min(10, len(rows))
+    overlap = len(set(np.argsort(-local)[:top]) & set(np.argsort(-stored)[:top]))
+
+    print(f"Challenge {ch.id}: {len(rows)} entries (download {downloaded:.1f} s, local scoring {scored * 1000:.0f} ms)")
+    print(f"  stored mean {stored.mean():.1f} (sd {stored.std():.1f}), local mean {local.mean():.1f} (sd {local.std():.1f})")
+    print(f"  Pearson {pearson:.3f}, Spearman {spearman:.3f}, mean |diff| {np.abs(local - stored).mean():.1f}")
+    print(f"  top-{top} overlap {overlap}/{top}")
+    print(f"  stored ≈ {slope:.3f} * local + {intercept:.1f}")
+
+    if args.gemini:
+        sample = min(args.gemini_sample, len(rows))
+        latencies, gemini = [], []
+        for image in images[:sample]:
+            started = time.perf_counter()
+            gemini.append(gemini_service.calculate_similarity(image, ch.target_image_url))
+            latencies.append(time.perf_counter() - started)
+        gemini = np.array(gemini)
+        print(
+            f"  Gemini, {sample} entries: {np.mean(latencies):.2f} s each (p95 {np.percentile(latencies, 95):.2f} s), "
+            f"mean |live - stored| {np.abs(gemini - stored[:sample]).mean():.1f}, "
+            f"Pearson with local {np.corrcoef(gemini, local[:sample])[0, 1]:.3f}"
+        )
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=50)
+    parser.add_argument("--targets", type=int, default=10, help="synthetic target images")
+    parser.add_argument("--restyled", type=int, default=5, help="same-style, different-content images per target")
+    parser.add_argument("--unrelated", type=int, default=20, help="unrelated images per target")
+    parser.add_argument("--batch", type=int, default=128, help="entries in the throughput run")
+    parser.add_argument("--challenge-id", type=int, help="compare with a challenge's stored scores")
+    parser.add_argument("--limit", type=int, default=200, help="latest entries of the challenge to compare")
+    parser.add_argument("--gemini", action="store_true", help="also re-score a sample live with Gemini")
+    parser.add_argument("--gemini-sample", type=int, default=20)
+    args = parser.parse_args()
+    return challenge(args) if args.challenge_id else synthetic(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Check that the generation endpoints hold no DB connection during Gemini / S3.
+
+POST /api/creations/generate and POST /api/challenges/{id}/submit commit
+and release their connection before the slow external calls, and only
+check one out again to save the result (or refund). This script calls both
+endpoints with Gemini, the S3 uploads, the challenge target download and
+similarity scoring replaced by stubs that assert
+`engine.pool.checkedout() == 0` while they run, then checks that the
+entries were saved and credits charged once.
+
+It creates a throwaway user and challenge (and uses the first active style)
+and deletes them at the end. Background tasks are not started, so nothing
+else checks out connections meanwhile.
+
+Usage:
+    python scripts/check_connection_release.py
+"""
+
+import io
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+
+from app.api import challenges as challenges_api, creations as creations_api  # noqa: E402
+from app.core import security  # noqa: E402
+from app.core.database import SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+
+# 1x1 PNG
+PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000100ffff03000006000557bfabd40000000049454e44ae426082"
+)
+
+calls: list[tuple[str, int]] = []
+
+
+def _stub(name, result):
+    def call(*args, **kwargs):
+        calls.append((name, engine.pool.checkedout()))
+        return result
+    return call
+
+
+def _install_stubs() -> None:
+    for module in (creations_api, challenges_api):
+        module.gemini_service.transform_image = _stub("gemini.transform_image", (PNG, 0.1))
+        module.s3_service.upload_creation_original = _stub("s3.upload_creation_original", "https://s3.invalid/o.png")
+        module.s3_service.upload_creation_generated = _stub("s3.upload_creation_generated", "https://s3.invalid/g.png")
+    challenges_api.similarity.prepare_target = _stub("similarity.prepare_target", None)
+    challenges_api.similarity.calculate_similarity = _stub("similarity.calculate_similarity", 50.0)
+
+
+def main() -> int:
+    email = f"conncheck-{uuid.uuid4().hex[:12]}@example.invalid"
+    db = SessionLocal()
+    style = db.execute(text("SELECT id, uses_count FROM styles WHERE is_active ORDER BY id LIMIT 1")).first()
+    user_id = db.execute(
+        text(
+            "INSERT INTO users (email, hashed_password, name, credits, is_verified, is_active) "
+            "VALUES (:email, 'x', 'conncheck', 10, true, true) RETURNING id"
+        ),
+        {"email": email},
+    ).scalar()
+    challenge_id = db.execute(
+        text(
+            "INSERT INTO challenges (name, target_image_url, prompt_template, challenge_type, is_active, "
+            "starts_at, ends_at) VALUES ('conncheck', 'https://s3.invalid/t.png', 'p', 'mystery', true, "
+            ":now, :ends) RETURNING id"
+        ),
+        {"now": datetime.now(timezone.utc), "ends": datetime.now(timezone.utc) + timedelta(hours=1)},
+    ).scalar()
+    db.commit()
+
+    failures = []
+    try:
+        _install_stubs()
+        client = TestClient(app)
+        headers = {"Authorization": f"Bearer {security.create_access_token(email)}"}
+
+        if style is None:
+            print("No active style: skipping /creations/generate")
+        else:
+            response = client.post(
+                "/api/creations/generate", headers=headers,
+                data={"style_id": str(style.id)}, files={"image": ("p.png", io.BytesIO(PNG), "image/png")},
+            )
+            print(f"POST /api/creations/generate → {response.status_code}")
+            if response.status_code != 200:
+                failures.append(f"/creations/generate returned {response.status_code}: {response.text[:200]}")
+
+        response = client.post(
+            f"/api/challenges/{challenge_id}/submit", headers=headers,
+            files={"image": ("p.png", io.BytesIO(PNG), "image/png")},
+        )
+        print(f"POST /api/challenges/{challenge_id}/submit → {response.status_code}")
+        if response.status_code != 200:
+            failures.append(f"/challenges/submit returned {response.status_code}: {response.text[:200]}")
+
+        for name, checked_out in calls:
+            print(f"  {name}: {checked_out} connection(s) checked out")
+            if checked_out:
+                failures.append(f"{name} ran with {checked_out} connection(s) checked out")
+        if not calls:
+            failures.append("no stub was called")
+
+        saved = db.execute(text("SELECT count(*) FROM creations WHERE user_id = :u"), {"u": user_id}).scalar()
+        credits = db.execute(text("SELECT credits FROM users WHERE id = :u"), {"u": user_id}).scalar()
+        print(f"  saved {saved} creation(s), credits left {credits} (+ daily credits)")
+        if saved != (1 if style is None else 2):
+            failures.append(f"expected every entry saved, found {saved}")
+    finally:
+        db.rollback()
+        db.execute(text("DELETE FROM creations WHERE user_id = :u"), {"u": user_id})
+        db.execute(text("DELETE FROM challenges WHERE id = :c"), {"c": challenge_id})
+        db.execute(text("DELETE FROM users WHERE id = :u"), {"u": user_id})
+        if style is not None:
+            db.execute(text("UPDATE styles SET uses_count = :n WHERE id = :s"), {"n": style.uses_count, "s": style.id})
+        db.commit()
+        db.close()
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    print("OK: no connection held during Gemini / S3 / target image calls" if not failures else f"{len(failures)} failure(s)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Check that hand-made feed cursors get a 400, never a 500.
+
+GET /api/creations/feed?cursor= accepts any opaque string. This script
+sends well-formed and malformed cursors for every sort (garbage, wrong
+arity, keys of the wrong type, a naive timestamp for sort=new, whose keys
+are timestamptz) and checks each status code, first with the feed cache
+built (the head of the feed is served from it) and then with it cold (read
+from the DB). It also hands the cache a naive cursor directly, which must be
+a miss rather than an exception. The feed is only read, so the database is
+left as it was; background tasks are not started.
+
+Usage:
+    python scripts/check_feed_cursors.py
+"""
+
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.feed_cache import feed_cache  # noqa: E402
+from app.core.pagination import encode_cursor  # noqa: E402
+from app.main import app  # noqa: E402
+
+# (sort, cursor, expected status)
+CASES = [
+    ("new", encode_cursor("2024-01-01T00:00:00+00:00", 5), 200),
+    ("new", encode_cursor("2024-01-01T00:00:00", 5), 400),
+    ("new", encode_cursor("yesterday", 5), 400),
+    ("new", encode_cursor(12, 5), 400),
+    ("hot", encode_cursor(3.5, 5), 200),
+    ("hot", encode_cursor("2024-01-01T00:00:00", 5), 400),
+    ("top", encode_cursor(10, 5), 200),
+    ("top", encode_cursor(10, "x"), 400),
+    ("new", encode_cursor(1), 400),
+    ("new", "not-a-cursor", 400),
+]
+
+
+def main() -> int:
+    client = TestClient(app)
+    failures = []
+    settings.FEED_CACHE_ENABLED = True
+    feed_cache.refresh()
+    for cache in ("built", "cold"):
+        for sort, cursor, expected in CASES:
+            response = client.get("/api/creations/feed", params={"sort": sort, "cursor": cursor, "limit": 5})
+            print(f"[cache {cache}] sort={sort} cursor={cursor!r} → {response.status_code}")
+            if response.status_code != expected:
+                failures.append(
+                    f"[cache {cache}] sort={sort} cursor={cursor!r}: expected {expected}, got {response.status_code}"
+                )
+        feed_cache.clear()
+
+    feed_cache.refresh()
+    try:
+        window = feed_cache.window("new", 0, 5, (datetime(2024, 1, 1), 5))
+        if window is not None:
+            failures.append("feed_cache.window served a naive cursor")
+    except TypeError as e:
+        failures.append(f"feed_cache.window raised on a naive cursor: {e}")
+    feed_cache.clear()
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    print("OK: every cursor answered as expected" if not failures else f"{len(failures)} failure(s)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
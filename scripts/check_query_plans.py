@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Query-plan regression check for the hot creation read paths.
+
+Seeds a realistic dataset (users, ~20k creations with a mix of private,
+soft-deleted and challenge rows, rankings, likes, a collection), ANALYZEs
+it, then runs the real endpoint code — feed (new / hot / top, by skip, by
+cursor, per user, with a viewer), feed cache rebuild, /creations/mine,
+/creations/liked, collection detail and the challenge leaderboard (top-K
+board, pages past it, rank lookups) — while
+capturing every SQL statement it issues. Each statement is EXPLAINed with
+its parameters; the script exits non-zero if any plan contains a Seq Scan
+on one of the large tables (creations, creation_likes, creation_rankings,
+collection_creations).
+
+Everything runs in one transaction that is rolled back at the end, so the
+database is left as it was. Run it after `alembic upgrade head`, and after
+changing any of those queries or the indexes behind them (migration 0006).
+
+Usage:
+    python scripts/check_query_plans.py
+    python scripts/check_query_plans.py --creations 50000 --verbose
+    python scripts/check_query_plans.py --no-seed      # plans on existing data
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import event, func, select, text  # noqa: E402
+from sqlalchemy.dialects.postgresql import insert as pg_insert  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.api.challenges import _load_leaderboard, _parse_leaderboard_cursor  # noqa: E402
+from app.api.collections import get_collection_detail  # noqa: E402
+from app.api.creations import _load_feed, _parse_feed_cursor, liked_creations, my_creations  # noqa: E402
+from app.core import feed_ranking, object_cache  # noqa: E402
+from app.core.database import engine  # noqa: E402
+from app.core.feed_cache import FeedCache  # noqa: E402
+from app.core.leaderboard import leaderboards  # noqa: E402
+from app.models.style import Creation, CreationRanking  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+# Tables big enough that a sequential scan on them is a regression
+HOT_TABLES = {"creations", "creation_likes", "creation_rankings", "collection_creations"}
+
+
+def capture_sql(call) -> list[tuple[str, object]]:
+    """(statement, parameters) of every SELECT issued while running `call()`."""
+    captured = []
+
+    def listener(_conn, _cursor, statement, parameters, _context, _executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        call()
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return captured
+
+
+def allowed_statements(db: Session) -> dict[str, str]:
+    """
+    Statements that may scan a whole table, with the reason. The global feed
+    total counts every feed row, which is most of `creations`, so no index
+    makes it cheaper; it runs once per feed cache refresh (and on pages the
+    cache can't serve), not per request.
+    """
+    [(statement, _)] = capture_sql(lambda: db.query(Creation.id).filter(*feed_ranking.FEED_FILTER).count())
+    return {statement: "global feed total"}
+
+
+SEED_SQL = """
+-- Same data (and so the same plans) on every run
+SELECT setseed(0.47);
+
+INSERT INTO users (email, hashed_password, name, credits, is_verified, is_active)
+SELECT 'plancheck-' || g || '@example.invalid', 'x', 'Plan Check ' || g, 10, true, true
+FROM generate_series(1, :users) g;
+
+-- Explicit id: challenge seed scripts insert ids by hand, so the sequence can lag
+INSERT INTO challenges (id, name, target_image_url, prompt_template, challenge_type, ends_at, is_active)
+SELECT COALESCE(max(id), 0) + 1, 'plancheck', 'https://example.invalid/t.jpg', 'x', 'mystery',
+       now() + interval '1 day', true
+FROM challenges;
+
+CREATE TEMP TABLE plancheck_users ON COMMIT DROP AS
+SELECT id, row_number() OVER (ORDER BY id) AS n FROM users WHERE email LIKE 'plancheck-%@example.invalid';
+
+CREATE TEMP TABLE plancheck_styles ON COMMIT DROP AS
+SELECT id, row_number() OVER (ORDER BY id) AS n FROM styles;
+
+INSERT INTO creations (
+    user_id, style_id, original_image_url, generated_image_url, credits_used, challenge_id,
+    similarity_score, likes_count, views_count, is_public, is_featured, is_deleted, created_at
+)
+SELECT u.id, s.id, 'https://example.invalid/o.jpg', 'https://example.invalid/g.jpg', 1,
+       CASE WHEN g % 10 = 0 THEN (SELECT max(id) FROM challenges WHERE name = 'plancheck') END,
+       CASE WHEN g % 10 = 0 THEN random() * 100 ELSE 0 END,
+       (random() * 50)::int, (random() * 500)::int,
+       g % 7 <> 0, false, g % 20 = 0,
+       now() - random() * interval '180 days'
+FROM generate_series(1, :creations) g
+JOIN plancheck_users u ON u.n = 1 + g % :users
+JOIN plancheck_styles s ON s.n = 1 + g % (SELECT count(*) FROM plancheck_styles);
+
+INSERT INTO creation_likes (user_id, creation_id, created_at)
+SELECT u.id, c.id, c.created_at + random() * interval '7 days'
+FROM (
+    SELECT id, created_at, row_number() OVER (ORDER BY random()) AS n
+    FROM creations WHERE user_id IN (SELECT id FROM plancheck_users)
+) c
+JOIN plancheck_users u ON u.n = 1 + (c.n * 7919) % :users
+WHERE c.n <= :likes
+ON CONFLICT DO NOTHING;
+
+INSERT INTO collections (user_id, name) SELECT id, 'plancheck' FROM plancheck_users;
+INSERT INTO collection_creations (collection_id, creation_id)
+SELECT col.id, c.id
+FROM collections col
+JOIN plancheck_users u ON u.id = col.user_id
+JOIN creations c ON c.user_id = u.id
+WHERE col.name = 'plancheck';
+"""
+
+
+def seed(conn, users: int, creations: int, likes: int) -> None:
+    if not conn.execute(text("SELECT count(*) FROM styles")).scalar():
+        sys.exit("No styles in the database; run scripts/seed_styles_and_categories.py first.")
+    params = {"users": users, "creations": creations, "likes": likes}
+    for statement in SEED_SQL.split(";\n"):
+        if statement.strip():
+            conn.execute(text(statement), params)
+
+    likes = func.coalesce(Creation.likes_count, 0)
+    views = func.coalesce(Creation.views_count, 0)
+    ranked = select(
+        Creation.id, likes, views, Creation.created_at, feed_ranking.hot_score(likes, views, Creation.created_at)
+    ).where(*feed_ranking.FEED_FILTER, Creation.created_at.is_not(None))
+    conn.execute(
+        pg_insert(CreationRanking)
+        .from_select(["creation_id", "likes_count", "views_count", "created_at", "hot_score"], ranked)
+        .on_conflict_do_nothing(index_elements=[CreationRanking.creation_id])
+    )
+    conn.execute(text("ANALYZE users, creations, creation_likes, creation_rankings, collections, collection_creations"))
+
+
+def pick_fixtures(conn) -> dict:
+    """Ids to run the endpoints with: the most active liker, a collection, a challenge."""
+    row = conn.execute(text("""
+        SELECT u.id, u.email,
+               (SELECT max(id) FROM collections WHERE user_id = u.id) AS collection_id
+        FROM users u JOIN creation_likes l ON l.user_id = u.id
+        GROUP BY u.id, u.email ORDER BY count(*) DESC LIMIT 1
+    """)).one_or_none()
+    challenge_id = conn.execute(text(
+        "SELECT challenge_id FROM creations WHERE challenge_id IS NOT NULL "
+        "GROUP BY challenge_id ORDER BY count(*) DESC LIMIT 1"
+    )).scalar()
+    collection_id = conn.execute(text(
+        "SELECT collection_id FROM collection_creations GROUP BY collection_id ORDER BY count(*) DESC LIMIT 1"
+    )).scalar()
+    if row is None or challenge_id is None:
+        sys.exit("Not enough data for the check (needs likes and challenge entries); drop --no-seed.")
+    if collection_id is not None:
+        owner = conn.execute(text("SELECT user_id FROM collections WHERE id = :id"), {"id": collection_id}).scalar()
+    else:
+        owner = None
+    return {
+        "user_id": row.id, "email": row.email, "challenge_id": challenge_id,
+        "collection_id": collection_id, "collection_owner": owner,
+    }
+
+
+def run_hot_queries(db: Session, fixtures: dict) -> list[tuple[str, object]]:
+    """Call each endpoint's DB code; returns (label, callable) pairs run in order."""
+    user = db.get(User, fixtures["user_id"])
+    calls = []
+    for sort in feed_ranking.SORT_KEYS:
+        calls.append((f"feed sort={sort}", lambda s=sort: _load_feed(db, 0, 20, None, None, "full", s)))
+        calls.append((f"feed sort={sort} skip=100", lambda s=sort: _load_feed(db, 100, 20, None, None, "full", s)))
+
+        def by_cursor(s=sort):
+            first = _load_feed(db, 0, 20, None, None, "full", s)
+            return _load_feed(db, 0, 20, None, None, "full", s, _parse_feed_cursor(s, first["next_cursor"]))
+        calls.append((f"feed sort={sort} cursor", by_cursor))
+        calls.append((f"feed cache build sort={sort}", lambda s=sort: FeedCache(200)._build(db, s)))
+    calls.append(("feed user_id", lambda: _load_feed(db, 0, 20, fixtures["user_id"], None)))
+    calls.append(("feed with viewer", lambda: _load_feed(db, 0, 20, None, fixtures["email"])))
+    calls.append(("creations/mine", lambda: my_creations(db=db, current_user=user)))
+    calls.append(("creations/liked", lambda: liked_creations(skip=0, limit=20, db=db, current_user=user)))
+    if fixtures["collection_id"] is not None:
+        owner = db.get(User, fixtures["collection_owner"])
+        calls.append((
+            "collection detail",
+            lambda: get_collection_detail(fixtures["collection_id"], current_user=owner, db=db),
+        ))
+    challenge_id = fixtures["challenge_id"]
+    calls.append(("challenge leaderboard", lambda: _load_leaderboard(db, challenge_id)))
+
+    def leaderboard_past_top_k():
+        _, cursor = _load_leaderboard(db, challenge_id, leaderboards.k)
+        return _load_leaderboard(db, challenge_id, 20, _parse_leaderboard_cursor(cursor))
+    calls.append(("challenge leaderboard past top-K", leaderboard_past_top_k))
+
+    def leaderboard_rank():
+        ranked, _ = leaderboards.page(db, challenge_id, leaderboards.k + 20)
+        leaderboards.clear()
+        return leaderboards.rank_of(db, challenge_id, ranked[-1][1])
+    calls.append(("challenge leaderboard rank past top-K", leaderboard_rank))
+    calls.append(("challenge leaderboard best entry", lambda: leaderboards.best_entry(db, challenge_id, user.id)))
+    return calls
+
+
+def seq_scans(plan: dict) -> list[str]:
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in HOT_TABLES:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found.extend(seq_scans(child))
+    return found
+
+
+def scanned_indexes(plan: dict) -> list[str]:
+    found = [plan["Index Name"]] if "Index Name" in plan else []
+    for child in plan.get("Plans", []):
+        found.extend(scanned_indexes(child))
+    return found
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--creations", type=int, default=20000)
+    parser.add_argument("--likes", type=int, default=50000)
+    parser.add_argument("--no-seed", action="store_true", help="check plans against the existing data")
+    parser.add_argument("--verbose", "-v", action="store_true", help="print every statement and its plan")
+    args = parser.parse_args()
+
+    failures = 0
+    with engine.connect() as conn:
+        trans = conn.begin()
+        try:
+            if not args.no_seed:
+                seed(conn, args.users, args.creations, args.likes)
+            fixtures = pick_fixtures(conn)
+
+            db = Session(bind=conn, join_transaction_mode="create_savepoint", autoflush=False)
+            allowed = allowed_statements(db)
+            for label, call in run_hot_queries(db, fixtures):
+                object_cache.styles.clear()
+                object_cache.users.clear()
+                object_cache.creations.clear()
+                leaderboards.clear()
+                statements = capture_sql(call)
+                label_failures = 0
+                for statement, parameters in statements:
+                    plan = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()[0]["Plan"]
+                    bad = seq_scans(plan)
+                    summary = " ".join(statement.split())
+                    if bad and statement in allowed:
+                        if args.verbose:
+                            print(f"allow {label}: Seq Scan on {', '.join(sorted(set(bad)))} ({allowed[statement]})")
+                    elif bad:
+                        label_failures += 1
+                        print(f"FAIL  {label}: Seq Scan on {', '.join(sorted(set(bad)))}")
+                        print(f"      {summary}")
+                    elif args.verbose:
+                        print(f"ok    {label}: {', '.join(scanned_indexes(plan)) or '-'}")
+                        print(f"      {summary[:160]}")
+                if not label_failures and not args.verbose:
+                    print(f"ok    {label} ({len(statements)} queries)")
+                failures += label_failures
+            db.close()
+        finally:
+            trans.rollback()
+
+    if failures:
+        print(f"\n{failures} statement(s) plan a sequential scan on a large table")
+        return 1
+    print("\nNo sequential scans on large tables")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
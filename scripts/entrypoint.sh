@@ -22,5 +22,11 @@ echo "[1/2] Running Alembic migrations..."
 alembic upgrade head
 echo "      Migrations complete."
 
-echo "[2/2] Starting FastAPI server..."
-exec uvicorn app.main:app --host 0.0.0.0 --port 8000
+echo "[2/2] Starting FastAPI server (gunicorn + uvicorn workers)..."
+# Worker count, keep-alive, max-requests recycling etc. live in gunicorn.conf.py
+# and can be overridden with environment variables (see that file).
+# `exec` makes gunicorn PID 1, so `docker kill -s HUP` triggers a graceful reload
+# and `docker stop` (SIGTERM) drains in-flight requests before exiting.
+# gunicorn itself int()-parses WEB_CONCURRENCY, so drop it when empty.
+[ -z "$WEB_CONCURRENCY" ] && unset WEB_CONCURRENCY
+exec gunicorn -c gunicorn.conf.py app.main:app
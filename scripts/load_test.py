@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Minimal HTTP load generator for comparing server process models.
+
+Fires requests at a fixed concurrency for a fixed duration and reports
+throughput and latency percentiles. Only needs httpx (already pulled in by
+google-genai), so it runs anywhere the API runs.
+
+Usage:
+    python scripts/load_test.py http://localhost:8000/ --concurrency 64 --duration 20
+    python scripts/load_test.py http://localhost:8000/api/styles -c 32 -d 30 \\
+        -H "Authorization: Bearer <token>"
+
+See docs/LOAD_TEST.md for the process-model comparison and how to reproduce it.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+async def _worker(client: httpx.AsyncClient, url: str, deadline: float, latencies: list, errors: list):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            response = await client.get(url)
+            if response.status_code >= 500:
+                errors.append(response.status_code)
+            else:
+                latencies.append(time.perf_counter() - start)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+
+
+async def run(url: str, concurrency: int, duration: float, headers: dict) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(headers=headers, limits=limits, timeout=30) as client:
+        # Warm up connections / server-side caches before measuring
+        await asyncio.gather(*(client.get(url) for _ in range(min(concurrency, 16))))
+
+        latencies: list[float] = []
+        errors: list = []
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(_worker(client, url, deadline, latencies, errors) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p95_ms": _percentile(latencies, 95) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+        "mean_ms": (statistics.fmean(latencies) * 1000) if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simple HTTP load test")
+    parser.add_argument("url", help="Full URL to hit, e.g. http://localhost:8000/api/styles")
+    parser.add_argument("-c", "--concurrency", type=int, default=64, help="Concurrent connections (default: 64)")
+    parser.add_argument("-d", "--duration", type=float, default=20, help="Seconds to run (default: 20)")
+    parser.add_argument("-H", "--header", action="append", default=[], help="Extra header 'Name: value' (repeatable)")
+    args = parser.parse_args()
+
+    headers = {}
+    for h in args.header:
+        name, _, value = h.partition(":")
+        headers[name.strip()] = value.strip()
+
+    result = asyncio.run(run(args.url, args.concurrency, args.duration, headers))
+    print(f"URL:         {args.url}")
+    print(f"Concurrency: {args.concurrency}   Duration: {args.duration:.0f}s")
+    print(f"Requests:    {result['requests']}   Errors: {result['errors']}")
+    print(f"Throughput:  {result['rps']:.1f} req/s")
+    print(
+        f"Latency:     p50 {result['p50_ms']:.1f} ms | p95 {result['p95_ms']:.1f} ms | "
+        f"p99 {result['p99_ms']:.1f} ms | mean {result['mean_ms']:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
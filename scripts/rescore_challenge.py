@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Re-score every entry of a challenge with the local similarity backend.
+
+Scores from the Gemini and local backends are on different scales, so a
+challenge must not mix them: after switching SIMILARITY_BACKEND while a
+challenge is running, re-score it with this script. Entries are downloaded
+and scored in batches of --batch-size against the challenge's target image
+(its features are computed once), and each batch is written in one UPDATE.
+
+Running API workers pick up the new scores within LEADERBOARD_CACHE_SECONDS
+(leaderboards) and CREATION_CACHE_SECONDS (creation rows).
+
+Usage:
+    python scripts/rescore_challenge.py --challenge-id 12 --dry-run
+    python scripts/rescore_challenge.py --challenge-id 12 --batch-size 64
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx  # noqa: E402
+from sqlalchemy import update  # noqa: E402
+
+from app.core import similarity  # noqa: E402
+from app.core.database import SessionLocal  # noqa: E402
+from app.models.style import Challenge, Creation  # noqa: E402
+
+
+def _download(client: httpx.Client, pool: ThreadPoolExecutor, urls: list[str]) -> list:
+    """Image bytes per URL, None where the download failed."""
+    def get(url):
+        try:
+            response = client.get(url)
+            response.raise_for_status()
+            return response.content
+        except httpx.HTTPError as e:
+            print(f"  ! {url}: {e}")
+            return None
+    return list(pool.map(get, urls))
+
+
+def rescore(challenge_id: int, batch_size: int, dry_run: bool) -> int:
+    db = SessionLocal()
+    try:
+        challenge = db.get(Challenge, challenge_id)
+        if challenge is None:
+            print(f"Challenge {challenge_id} not found")
+            return 1
+        entries = (
+            db.query(Creation.id, Creation.generated_image_url, Creation.similarity_score)
+            .filter(
+                Creation.challenge_id == challenge_id,
+                Creation.is_deleted == False,  # noqa: E712
+                Creation.generated_image_url.is_not(None),
+            )
+            .order_by(Creation.id)
+            .all()
+        )
+        print(f"Challenge {challenge_id} ({challenge.name}): {len(entries)} entries")
+
+        similarity.target_features(challenge.target_image_url)
+        started = time.perf_counter()
+        scored = skipped = 0
+        with httpx.Client(timeout=20, follow_redirects=True) as client, ThreadPoolExecutor(8) as pool:
+            for start in range(0, len(entries), batch_size):
+                batch = entries[start:start + batch_size]
+                images = _download(client, pool, [e.generated_image_url for e in batch])
+                ready = [(e, image) for e, image in zip(batch, images) if image is not None]
+                skipped += len(batch) - len(ready)
+                if not ready:
+                    continue
+                scores = similarity.score_batch(challenge.target_image_url, [image for _, image in ready])
+
+                for (entry, _), score in zip(ready, scores):
+                    print(f"  creation {entry.id}: {entry.similarity_score} -> {score}")
+                if not dry_run:
+                    db.execute(
+                        update(Creation),
+                        [{"id": entry.id, "similarity_score": score} for (entry, _), score in zip(ready, scores)],
+                    )
+                    db.commit()
+                scored += len(ready)
+
+        elapsed = time.perf_counter() - started
+        action = "Would update" if dry_run else "Updated"
+        print(f"{action} {scored} entries in {elapsed:.1f} s ({skipped} skipped: image not downloadable)")
+        return 0
+    except Exception as e:
+        db.rollback()
+        print(f"FAILED to re-score challenge {challenge_id}: {e}")
+        return 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--challenge-id", type=int, required=True)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--dry-run", action="store_true", help="print the new scores without saving them")
+    args = parser.parse_args()
+    sys.exit(rescore(args.challenge_id, args.batch_size, args.dry_run))
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Concurrency stress test for POST /api/payments/verify-payment.
+
+Creates one order, then fires N verify calls for it at the same time and
+checks that the credits were granted exactly once: one response reports
+`credits_added > 0`, every other one reports "already verified", and the
+user's balance (GET /api/auth/me) grew by exactly one package.
+
+Run it against a local server started with the in-memory gateway, so the
+script can sign payments itself (NOT production):
+
+    PAYMENT_GATEWAY=fake uvicorn app.main:app --port 8000 --workers 4
+
+Usage:
+    python scripts/stress_verify_payment.py --email test@example.com --password secret
+    python scripts/stress_verify_payment.py --token <access token> -n 50 --rounds 5
+"""
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import sys
+import uuid
+
+import httpx
+
+
+def _sign(key_secret: str, order_id: str, payment_id: str) -> str:
+    return hmac.new(key_secret.encode(), f"{order_id}|{payment_id}".encode(), hashlib.sha256).hexdigest()
+
+
+async def _balance(client: httpx.AsyncClient) -> int:
+    me = (await client.get("/api/auth/me")).json()
+    return me["data"]["user"]["credits"] or 0
+
+
+async def _round(client: httpx.AsyncClient, parallel: int, key_secret: str) -> bool:
+    before = await _balance(client)
+    order = (await client.post("/api/payments/create-order", json={"credits": 0})).json()
+    order_id = order["order_id"]
+    payment_id = f"pay_{uuid.uuid4().hex[:14]}"
+    body = {
+        "razorpay_order_id": order_id,
+        "razorpay_payment_id": payment_id,
+        "razorpay_signature": _sign(key_secret, order_id, payment_id),
+    }
+
+    responses = await asyncio.gather(
+        *(client.post("/api/payments/verify-payment", json=body) for _ in range(parallel))
+    )
+    statuses = [r.status_code for r in responses]
+    granted = [r.json()["credits_added"] for r in responses if r.status_code == 200 and r.json()["credits_added"]]
+    after = await _balance(client)
+
+    ok = statuses.count(200) == parallel and len(granted) == 1 and after - before == granted[0]
+    print(
+        f"{order_id}: {statuses.count(200)}/{parallel} OK, {len(granted)} grant(s) {granted}, "
+        f"balance {before} -> {after}  {'PASS' if ok else 'FAIL'}"
+    )
+    return ok
+
+
+async def main(args) -> int:
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60,
+                                 limits=httpx.Limits(max_connections=args.parallel)) as client:
+        token = args.token
+        if not token:
+            login = await client.post("/api/auth/login", json={"email": args.email, "password": args.password})
+            login.raise_for_status()
+            token = login.json()["access_token"]
+        client.headers["Authorization"] = f"Bearer {token}"
+
+        results = [await _round(client, args.parallel, args.key_secret) for _ in range(args.rounds)]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--token", help="Access token (otherwise --email / --password are used to log in)")
+    parser.add_argument("--email")
+    parser.add_argument("--password")
+    parser.add_argument("-n", "--parallel", type=int, default=50, help="Concurrent verify calls per order")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--key-secret", default="fake_secret", help="Gateway key secret used to sign payments")
+    args = parser.parse_args()
+    if not args.token and not (args.email and args.password):
+        parser.error("pass --token or --email and --password")
+    sys.exit(asyncio.run(main(args)))